@@ -1,23 +1,42 @@
 #!/bin/bash
+set -e
 
-# Esperar a que la base de datos est disponible
-echo "Esperando a que PostgreSQL est disponible..."
+# Modos:
+#   desarrollo  migraciones, archivos estáticos y runserver (docker-compose)
+#   produccion  gunicorn con gunicorn.conf.py; las migraciones se aplican
+#               aparte con "migrar" y los estáticos se recolectan en el build
+#   migrar      aplica las migraciones y termina
+# Cualquier otro comando se ejecuta tal cual.
 
-while ! pg_isready -h $DB_HOST -p $DB_PORT -U $DB_USER; do
-  echo "PostgreSQL no est listo - esperando..."
-  sleep 2
-done
+esperar_base_de_datos() {
+  echo "Esperando a que PostgreSQL esté disponible..."
+  while ! pg_isready -h "$DB_HOST" -p "$DB_PORT" -U "$DB_USER"; do
+    echo "PostgreSQL no está listo - esperando..."
+    sleep 2
+  done
+  echo "PostgreSQL está listo!"
+}
 
-echo "PostgreSQL est listo!"
-
-# Ejecutar migraciones
-echo "Aplicando migraciones..."
-python manage.py migrate
-
-# Recolectar archivos estticos (si es necesario)
-echo "Recolectando archivos estticos..."
-python manage.py collectstatic --noinput
-
-# Iniciar el servidor Django
-echo "Iniciando servidor Django..."
-python manage.py runserver 0.0.0.0:8000
\ No newline at end of file
+case "$1" in
+  desarrollo)
+    esperar_base_de_datos
+    echo "Aplicando migraciones..."
+    python manage.py migrate
+    echo "Recolectando archivos estáticos..."
+    python manage.py collectstatic --noinput
+    echo "Iniciando servidor de desarrollo..."
+    exec python manage.py runserver 0.0.0.0:8000
+    ;;
+  produccion)
+    esperar_base_de_datos
+    echo "Iniciando gunicorn (${SERVIDOR_MODO:-wsgi})..."
+    exec gunicorn -c gunicorn.conf.py
+    ;;
+  migrar)
+    esperar_base_de_datos
+    exec python manage.py migrate --noinput
+    ;;
+  *)
+    exec "$@"
+    ;;
+esac
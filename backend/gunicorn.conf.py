@@ -0,0 +1,51 @@
+"""
+Configuración de gunicorn para producción (`docker-entrypoint.sh produccion`).
+
+SERVIDOR_MODO elige la aplicación:
+
+- wsgi (por defecto): workers gthread para la API. Cada hilo mantiene su
+  conexión a PostgreSQL entre requests (DB_CONN_MAX_AGE).
+- asgi: workers de uvicorn para el stream de eventos (SSE) y las lecturas
+  async (inventario/lecturas.py), donde cada conexión abierta es una
+  corrutina y no un hilo. Django no reutiliza conexiones a la base de datos
+  bajo ASGI, así que aquí se desactivan.
+"""
+import multiprocessing
+import os
+
+modo = os.environ.get('SERVIDOR_MODO', 'wsgi')
+nucleos = multiprocessing.cpu_count()
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+
+if modo == 'asgi':
+    wsgi_app = 'proyecto_inventario.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+    workers = int(os.environ.get('GUNICORN_WORKERS', nucleos))
+    os.environ.setdefault('DB_CONN_MAX_AGE', '0')
+else:
+    wsgi_app = 'proyecto_inventario.wsgi:application'
+    worker_class = 'gthread'
+    workers = int(os.environ.get('GUNICORN_WORKERS', nucleos * 2 + 1))
+    # Conexiones abiertas a PostgreSQL: hasta workers * threads
+    threads = int(os.environ.get('GUNICORN_THREADS', 4))
+    os.environ.setdefault('DB_CONN_MAX_AGE', '60')
+
+# Reciclaje de workers: cada uno se reemplaza tras N requests (con jitter
+# para que no se reinicien todos a la vez) y termina las requests en curso
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 200))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# El heartbeat de los workers en memoria y no en el overlay de Docker
+worker_tmp_dir = '/dev/shm'
+
+# Detrás de nginx: confiar en X-Forwarded-Proto/For del proxy
+forwarded_allow_ips = os.environ.get('GUNICORN_FORWARDED_ALLOW_IPS', '*')
+
+# Las requests ya se registran en JSON desde MetricasMiddleware
+accesslog = None
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
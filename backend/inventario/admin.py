@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Repuesto, MovimientoInventario, AlertaStock
+from .models import Repuesto, MovimientoInventario, AlertaStock, NotificacionAlerta, SnapshotInventario
 
 @admin.register(Repuesto)
 class RepuestoAdmin(admin.ModelAdmin):
@@ -24,4 +24,16 @@ class MovimientoInventarioAdmin(admin.ModelAdmin):
 class AlertaStockAdmin(admin.ModelAdmin):
     list_display = ['repuesto', 'stock_actual', 'stock_minimo', 'estado', 'fecha_creacion']
     list_filter = ['estado', 'fecha_creacion']
-    readonly_fields = ['fecha_creacion']
\ No newline at end of file
+    readonly_fields = ['fecha_creacion']
+
+@admin.register(NotificacionAlerta)
+class NotificacionAlertaAdmin(admin.ModelAdmin):
+    list_display = ['alerta', 'destinatario', 'estado', 'intentos', 'proximo_intento', 'fecha_envio']
+    list_filter = ['estado']
+    search_fields = ['destinatario']
+    readonly_fields = ['fecha_creacion', 'fecha_envio']
+
+@admin.register(SnapshotInventario)
+class SnapshotInventarioAdmin(admin.ModelAdmin):
+    list_display = ['fecha_corte', 'total_repuestos', 'valor_total', 'creado_en']
+    readonly_fields = ['fecha_corte', 'total_repuestos', 'valor_total', 'creado_en']
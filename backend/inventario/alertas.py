@@ -0,0 +1,104 @@
+import logging
+import threading
+
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, F, OuterRef
+from .models import Repuesto, AlertaStock
+from .notificaciones import encolar_notificaciones
+from .eventos import publicar_alertas
+
+logger = logging.getLogger(__name__)
+
+# Repuestos tocados en este hilo que aún esperan evaluación
+_pendientes = threading.local()
+
+
+def programar_evaluacion_alertas(repuesto_ids):
+    """
+    Registra repuestos cuyo stock cambió en la transacción en curso. Todos
+    se evalúan juntos, con una sola consulta, al confirmarse la transacción
+    (de inmediato si no hay transacción abierta).
+    """
+    if not transaction.get_connection().in_atomic_block:
+        evaluar_alertas_stock(repuesto_ids)
+        return
+
+    ids = getattr(_pendientes, 'ids', None)
+    if ids is None:
+        ids = _pendientes.ids = set()
+    ids.update(repuesto_ids)
+    # Un callback por llamada: si un rollback descarta alguno, otro sigue
+    # registrado. El primero que se ejecuta evalúa todo el conjunto; un id de
+    # un bloque revertido solo se evalúa de más, contra el stock confirmado
+    transaction.on_commit(_evaluar_pendientes)
+
+
+def _evaluar_pendientes():
+    ids = getattr(_pendientes, 'ids', None)
+    if ids:
+        _pendientes.ids = set()
+        evaluar_alertas_stock(ids)
+
+
+def evaluar_alertas_stock(repuesto_ids):
+    """
+    Evalúa en una sola consulta qué repuestos quedaron bajo el mínimo sin
+    una alerta abierta y crea las alertas faltantes con un único insert
+    masivo. Retorna la lista de alertas creadas.
+    """
+    repuesto_ids = set(repuesto_ids)
+    if not repuesto_ids:
+        return []
+
+    alerta_abierta = AlertaStock.objects.filter(
+        repuesto=OuterRef('pk'),
+        estado__in=AlertaStock.ESTADOS_ABIERTOS
+    )
+    pendientes = Repuesto.objects.filter(
+        pk__in=repuesto_ids,
+        stock_actual__lte=F('stock_minimo_seguridad')
+    ).exclude(
+        Exists(alerta_abierta)
+    ).values_list('pk', 'nombre', 'stock_actual', 'stock_minimo_seguridad')
+
+    alertas = []
+    nombres = {}
+    for repuesto_id, nombre, stock_actual, stock_minimo in pendientes:
+        nombres[repuesto_id] = nombre
+        alertas.append(AlertaStock(
+            repuesto_id=repuesto_id,
+            stock_actual=stock_actual,
+            stock_minimo=stock_minimo
+        ))
+    if not alertas:
+        return []
+
+    # Las notificaciones se encolan en la misma transacción que las alertas
+    try:
+        with transaction.atomic():
+            AlertaStock.objects.bulk_create(alertas)
+            encolar_notificaciones(alertas)
+            publicar_alertas(alertas)
+    except IntegrityError:
+        # Otra transacción abrió alguna de estas alertas en paralelo:
+        # se insertan de a una y se omiten las que ya existen
+        creadas = []
+        for alerta in alertas:
+            try:
+                with transaction.atomic():
+                    alerta.pk = None
+                    alerta.save()
+                    encolar_notificaciones([alerta])
+                    publicar_alertas([alerta])
+                creadas.append(alerta)
+            except IntegrityError:
+                pass
+        alertas = creadas
+
+    for alerta in alertas:
+        logger.warning(
+            'Stock bajo: %s (repuesto %s) - stock %s, mínimo %s',
+            nombres[alerta.repuesto_id], alerta.repuesto_id,
+            alerta.stock_actual, alerta.stock_minimo
+        )
+    return alertas
@@ -0,0 +1,60 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db import connection
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+from rest_framework import filters
+
+# Configuración de text search usada por el trigger de search_vector
+CONFIG_BUSQUEDA = 'spanish'
+
+
+def busqueda_indexada_disponible():
+    """La búsqueda full-text/trigram requiere PostgreSQL (ver migración 0005)"""
+    return connection.vendor == 'postgresql'
+
+
+class RepuestoSearchFilter(filters.SearchFilter):
+    """
+    Búsqueda de repuestos sobre índices: full-text sobre search_vector más
+    similitud trigram en nombre, marca y modelo (tolera errores de tipeo) y
+    prefijo de código de barras. Anota `relevancia` para ordenar resultados.
+    En motores distintos de PostgreSQL usa el icontains estándar de DRF.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terminos = self.get_search_terms(request)
+        if not terminos:
+            return queryset
+
+        if not busqueda_indexada_disponible():
+            return super().filter_queryset(request, queryset, view)
+
+        texto = ' '.join(terminos)
+        consulta = SearchQuery(texto, config=CONFIG_BUSQUEDA, search_type='websearch')
+        similitud = Greatest(
+            TrigramWordSimilarity(texto, 'nombre'),
+            TrigramWordSimilarity(texto, 'marca'),
+            TrigramWordSimilarity(texto, 'modelo'),
+        )
+
+        return queryset.annotate(
+            relevancia=SearchRank(F('search_vector'), consulta) + similitud
+        ).filter(
+            Q(search_vector=consulta) |
+            Q(nombre__trigram_word_similar=texto) |
+            Q(marca__trigram_word_similar=texto) |
+            Q(modelo__trigram_word_similar=texto) |
+            Q(codigo_barras__startswith=texto)
+        )
+
+
+class RepuestoOrderingFilter(filters.OrderingFilter):
+    """Si hay búsqueda y no se pidió un orden explícito, ordena por relevancia"""
+
+    def get_ordering(self, request, queryset, view):
+        if (
+            not request.query_params.get(self.ordering_param)
+            and 'relevancia' in queryset.query.annotations
+        ):
+            return ['-relevancia', 'nombre']
+        return super().get_ordering(request, queryset, view)
@@ -0,0 +1,158 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+CLAVE_VERSION_CATALOGO = 'inventario:catalogo:version'
+
+
+def version_catalogo():
+    """Versión actual del catálogo; cambia con cada escritura de repuestos o movimientos"""
+    version = cache.get(CLAVE_VERSION_CATALOGO)
+    if version is None:
+        cache.add(CLAVE_VERSION_CATALOGO, 1, timeout=None)
+        version = cache.get(CLAVE_VERSION_CATALOGO, 1)
+    return version
+
+
+def invalidar_catalogo():
+    """
+    Incrementa la versión del catálogo al confirmar la transacción en curso,
+    de modo que ningún lector cachee datos previos bajo la versión nueva.
+    """
+    transaction.on_commit(_incrementar_version)
+
+
+def _incrementar_version():
+    try:
+        cache.incr(CLAVE_VERSION_CATALOGO)
+    except ValueError:
+        cache.add(CLAVE_VERSION_CATALOGO, 1, timeout=None)
+
+
+def obtener_estadisticas(filtro, calcular):
+    """
+    Retorna el snapshot de estadísticas para la versión vigente del catálogo,
+    calculándolo con `calcular()` solo si no está en cache. Sin
+    CACHE_COMPARTIDO se calcula siempre: la versión sería la de cada worker y
+    una escritura en otro no invalidaría el snapshot.
+    """
+    if not settings.CACHE_COMPARTIDO:
+        return calcular()
+    clave = f'inventario:estadisticas:{version_catalogo()}:{filtro}'
+    stats = cache.get(clave)
+    if stats is None:
+        stats = calcular()
+        cache.set(clave, stats, timeout=settings.INVENTARIO_ESTADISTICAS_TTL)
+    return stats
+
+
+async def aobtener_estadisticas(filtro, calcular):
+    """Versión async de obtener_estadisticas; `calcular` es una corrutina"""
+    if not settings.CACHE_COMPARTIDO:
+        return await calcular()
+    version = await cache.aget(CLAVE_VERSION_CATALOGO)
+    if version is None:
+        await cache.aadd(CLAVE_VERSION_CATALOGO, 1, timeout=None)
+        version = await cache.aget(CLAVE_VERSION_CATALOGO, 1)
+    clave = f'inventario:estadisticas:{version}:{filtro}'
+    stats = await cache.aget(clave)
+    if stats is None:
+        stats = await calcular()
+        await cache.aset(clave, stats, timeout=settings.INVENTARIO_ESTADISTICAS_TTL)
+    return stats
+
+
+class CacheCodigosBarras:
+    """
+    Cache LRU acotado, en memoria del proceso, de codigo_barras -> registro
+    compacto del repuesto para el endpoint de escaneo. Las escrituras de este
+    proceso invalidan las entradas afectadas; el TTL acota cuánto puede durar
+    un dato escrito desde otro worker.
+
+    Cada invalidación incrementa la generación del cache. Quien llena una
+    entrada toma la generación antes de leer la base de datos y guardar()
+    la descarta si cambió: la lectura pudo ser anterior al commit invalidado.
+    """
+
+    def __init__(self, max_entradas, ttl):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._entradas = OrderedDict()  # codigo -> (expira_en, registro)
+        self._codigo_por_repuesto = {}
+        self._generacion = 0
+        self._lock = threading.Lock()
+
+    @property
+    def generacion(self):
+        return self._generacion
+
+    def obtener(self, codigo):
+        with self._lock:
+            entrada = self._entradas.get(codigo)
+            if entrada is None:
+                return None
+            expira_en, registro = entrada
+            if expira_en < time.monotonic():
+                self._eliminar(codigo)
+                return None
+            self._entradas.move_to_end(codigo)
+            return registro
+
+    def guardar(self, codigo, registro, generacion):
+        with self._lock:
+            if generacion != self._generacion:
+                return
+            # Si el repuesto cambió de código, descartar la entrada anterior
+            anterior = self._codigo_por_repuesto.get(registro['id'])
+            if anterior is not None and anterior != codigo:
+                self._eliminar(anterior)
+            self._entradas[codigo] = (time.monotonic() + self.ttl, registro)
+            self._entradas.move_to_end(codigo)
+            self._codigo_por_repuesto[registro['id']] = codigo
+            while len(self._entradas) > self.max_entradas:
+                self._eliminar(next(iter(self._entradas)))
+
+    def invalidar_repuesto(self, repuesto_id):
+        with self._lock:
+            self._generacion += 1
+            codigo = self._codigo_por_repuesto.get(repuesto_id)
+            if codigo is not None:
+                self._eliminar(codigo)
+
+    def limpiar(self):
+        with self._lock:
+            self._generacion += 1
+            self._entradas.clear()
+            self._codigo_por_repuesto.clear()
+
+    def _eliminar(self, codigo):
+        entrada = self._entradas.pop(codigo, None)
+        if entrada is not None:
+            self._codigo_por_repuesto.pop(entrada[1]['id'], None)
+
+
+cache_codigos_barras = CacheCodigosBarras(
+    max_entradas=settings.INVENTARIO_ESCANEO_CACHE_MAX,
+    ttl=settings.INVENTARIO_ESCANEO_CACHE_TTL,
+)
+
+
+def invalidar_codigos_barras(repuesto_ids=None):
+    """
+    Descarta del cache de escaneo los repuestos indicados (o todos si es
+    None) al confirmar la transacción en curso.
+    """
+    if repuesto_ids is None:
+        transaction.on_commit(cache_codigos_barras.limpiar)
+        return
+    repuesto_ids = list(repuesto_ids)
+
+    def invalidar():
+        for repuesto_id in repuesto_ids:
+            cache_codigos_barras.invalidar_repuesto(repuesto_id)
+
+    transaction.on_commit(invalidar)
@@ -0,0 +1,144 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.exceptions import ValidationError
+
+# Parámetro de query string con la lista de campos a serializar (?fields=id,nombre)
+PARAMETRO_CAMPOS = 'fields'
+
+
+class CamposDinamicosMixin:
+    """
+    Serializer que acepta `campos`: si se indica, solo se serializan esos
+    campos. Las propiedades del modelo declaran en Meta.dependencias qué
+    columnas leen, para que la consulta pueda cargar solo lo necesario.
+    """
+
+    def __init__(self, *args, campos=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if campos is not None:
+            for nombre in set(self.fields) - set(campos):
+                self.fields.pop(nombre)
+
+
+def _columnas_de_campo(modelo, campo, dependencias):
+    """
+    Recorre el `source` de un campo del serializer sobre el modelo. Retorna
+    (relaciones a unir, columnas a cargar) o None si no se puede determinar
+    qué columnas usa (el modelo se carga completo).
+    """
+    if campo.source == '*':
+        return None
+
+    relaciones, columnas, ruta = [], [], []
+    atributos = campo.source_attrs
+    for posicion, atributo in enumerate(atributos):
+        try:
+            campo_modelo = modelo._meta.get_field(atributo)
+        except FieldDoesNotExist:
+            # Propiedad o método del modelo
+            if atributo.startswith('get_') and atributo.endswith('_display'):
+                usadas = [atributo[len('get_'):-len('_display')]]
+            elif not ruta and campo.field_name in dependencias:
+                usadas = dependencias[campo.field_name]
+            else:
+                return None
+            columnas.extend('__'.join(ruta + [columna]) for columna in usadas)
+            return relaciones, columnas
+
+        ultimo = posicion == len(atributos) - 1
+        if campo_modelo.is_relation and not ultimo:
+            if not (campo_modelo.many_to_one or campo_modelo.one_to_one):
+                return None
+            ruta.append(atributo)
+            relaciones.append('__'.join(ruta))
+            # La FK debe cargarse para poder unir la relación
+            columnas.append('__'.join(ruta))
+            modelo = campo_modelo.related_model
+            continue
+        if campo_modelo.many_to_many or campo_modelo.one_to_many:
+            return None
+        columnas.append('__'.join(ruta + [atributo]))
+    return relaciones, columnas
+
+
+def planificar_consulta(queryset, serializer, columnas_adicionales=()):
+    """
+    Aplica al queryset los select_related que necesita el serializer (sus
+    campos con source `relacion.campo`) y, si se puede determinar qué
+    columnas lee cada campo, restringe la carga con only() a esas columnas
+    más `columnas_adicionales` (que pueden cruzar relaciones: `a__b`).
+    """
+    dependencias = getattr(getattr(serializer, 'Meta', None), 'dependencias', {})
+    relaciones, columnas, completo = set(), set(columnas_adicionales), True
+    for columna in columnas_adicionales:
+        partes = columna.split('__')
+        for fin in range(1, len(partes)):
+            relaciones.add('__'.join(partes[:fin]))
+            columnas.add('__'.join(partes[:fin]))
+    for campo in serializer.fields.values():
+        if campo.write_only:
+            continue
+        plan = _columnas_de_campo(queryset.model, campo, dependencias)
+        if plan is None:
+            completo = False
+            continue
+        relaciones.update(plan[0])
+        columnas.update(plan[1])
+
+    if relaciones:
+        queryset = queryset.select_related(*sorted(relaciones))
+    if completo:
+        queryset = queryset.only(*sorted(columnas))
+    return queryset
+
+
+class ConsultaPlanificadaMixin:
+    """
+    ViewSet que arma sus consultas de lectura a partir del serializer: une
+    las relaciones que este muestra (sin consultas N+1) y admite
+    ?fields=campo1,campo2 para devolver y leer solo esas columnas.
+    """
+
+    # Acciones que serializan con serializer_class y aceptan ?fields=
+    acciones_planificadas = ['list', 'retrieve']
+
+    def campos_solicitados(self):
+        """Campos pedidos en ?fields= (None si no se restringe)"""
+        if self.action not in self.acciones_planificadas or self.request is None:
+            return None
+        if not hasattr(self, '_campos_solicitados'):
+            valor = self.request.query_params.get(PARAMETRO_CAMPOS)
+            campos = [campo.strip() for campo in valor.split(',') if campo.strip()] if valor else None
+            if campos:
+                disponibles = self.get_serializer_class()().fields
+                desconocidos = [campo for campo in campos if campo not in disponibles]
+                if desconocidos:
+                    raise ValidationError({
+                        PARAMETRO_CAMPOS: f'Campos desconocidos: {", ".join(desconocidos)}. '
+                                          f'Disponibles: {", ".join(disponibles)}'
+                    })
+            self._campos_solicitados = campos or None
+        return self._campos_solicitados
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action not in self.acciones_planificadas:
+            return queryset
+        serializer = self.get_serializer_class()(campos=self.campos_solicitados())
+        return planificar_consulta(queryset, serializer, self.columnas_adicionales())
+
+    def columnas_adicionales(self):
+        """
+        Columnas leídas fuera del serializer: la paginación por cursor lee el
+        orden de cada fila y los validadores condicionales los timestamps de
+        `campos_modificacion` (ver condicional.py)
+        """
+        ordering = getattr(self.paginator, 'ordering', None) or ()
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        columnas = [campo.lstrip('-') for campo in ordering]
+        return columnas + list(getattr(self, 'campos_modificacion', ()))
+
+    def get_serializer(self, *args, **kwargs):
+        if self.action in self.acciones_planificadas:
+            kwargs.setdefault('campos', self.campos_solicitados())
+        return super().get_serializer(*args, **kwargs)
@@ -0,0 +1,139 @@
+import hashlib
+
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def calcular_etag(*partes):
+    """ETag fuerte a partir de los valores que determinan la representación"""
+    contenido = '|'.join(str(parte) for parte in partes)
+    return quote_etag(hashlib.sha1(contenido.encode()).hexdigest())
+
+
+def _valor_campo(instancia, campo):
+    """Valor de un campo, siguiendo relaciones con la sintaxis `a__b`"""
+    for nombre in campo.split('__'):
+        if instancia is None:
+            return None
+        instancia = getattr(instancia, nombre)
+    return instancia
+
+
+class ConsultaCondicionalMixin:
+    """
+    GET condicional (ETag / Last-Modified) y actualización optimista
+    (If-Match) para ViewSets cuyo modelo registra su última modificación.
+
+    Los validadores se calculan sin serializar: en listas con una única
+    consulta de Count/Max sobre el queryset filtrado y en detalle con el
+    timestamp del objeto. Si el cliente ya tiene la versión vigente se
+    responde 304 sin serializar nada.
+    """
+
+    # Timestamps que cambian cuando cambia la respuesta: el primero es el del
+    # modelo y el resto los de relaciones cuyos datos se serializan
+    campos_modificacion = ['actualizado_en']
+
+    def agregados_lista(self):
+        """Agregados que determinan la versión de una lista: total y timestamps máximos"""
+        maximos = {f'max_{i}': Max(campo) for i, campo in enumerate(self.campos_modificacion)}
+        return {'total': Count('pk'), **maximos}
+
+    def validadores_de_agregados(self, agregados):
+        """(etag, última modificación) a partir del resultado de agregados_lista()"""
+        fechas = [agregados[f'max_{i}'] for i in range(len(self.campos_modificacion))]
+        # La query string distingue filtros, orden y página
+        etag = calcular_etag(
+            self.request.path, self.request.GET.urlencode(), agregados['total'],
+            *(fecha.isoformat() if fecha else '' for fecha in fechas)
+        )
+        return etag, max((fecha for fecha in fechas if fecha), default=None)
+
+    def validadores_lista(self, queryset):
+        """(etag, última modificación) del queryset filtrado"""
+        agregados = queryset.order_by().aggregate(**self.agregados_lista())
+        return self.validadores_de_agregados(agregados)
+
+    def validadores_objeto(self, instancia):
+        """(etag, última modificación) de un objeto"""
+        fechas = [_valor_campo(instancia, campo) for campo in self.campos_modificacion]
+        etag = calcular_etag(
+            instancia._meta.label, instancia.pk,
+            *(fecha.isoformat() if fecha else '' for fecha in fechas)
+        )
+        return etag, max((fecha for fecha in fechas if fecha), default=None)
+
+    def respuesta_condicional(self, etag, ultima_modificacion=None):
+        """
+        Evalúa las precondiciones de la request. Retorna la respuesta 304/412
+        a devolver, o None si hay que procesarla normalmente.
+        """
+        respuesta = get_conditional_response(
+            self.request,
+            etag=etag,
+            last_modified=int(ultima_modificacion.timestamp()) if ultima_modificacion else None,
+        )
+        if respuesta is None:
+            return None
+        if respuesta.status_code == status.HTTP_412_PRECONDITION_FAILED:
+            return Response(
+                {'error': 'El recurso fue modificado por otro usuario. Recargue los datos e intente nuevamente.'},
+                status=status.HTTP_412_PRECONDITION_FAILED,
+            )
+        return self.con_validadores(respuesta, etag, ultima_modificacion)
+
+    def con_validadores(self, respuesta, etag, ultima_modificacion=None):
+        respuesta['ETag'] = etag
+        if ultima_modificacion is not None:
+            respuesta['Last-Modified'] = http_date(ultima_modificacion.timestamp())
+        # El navegador guarda la respuesta pero la revalida en cada uso
+        patch_cache_control(respuesta, private=True, no_cache=True)
+        patch_vary_headers(respuesta, ['Accept', 'Authorization'])
+        return respuesta
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        etag, ultima_modificacion = self.validadores_lista(queryset)
+        condicional = self.respuesta_condicional(etag)
+        if condicional is not None:
+            return condicional
+
+        respuesta = super().list(request, *args, **kwargs)
+        # Sin Last-Modified en listas: borrar una fila no cambia el máximo,
+        # así que If-Modified-Since podría responder 304 con datos viejos
+        return self.con_validadores(respuesta, etag)
+
+    def retrieve(self, request, *args, **kwargs):
+        instancia = self.get_object()
+        etag, ultima_modificacion = self.validadores_objeto(instancia)
+        condicional = self.respuesta_condicional(etag, ultima_modificacion)
+        if condicional is not None:
+            return condicional
+        return self.con_validadores(
+            Response(self.get_serializer(instancia).data), etag, ultima_modificacion
+        )
+
+    def update(self, request, *args, **kwargs):
+        partial = kwargs.pop('partial', False)
+        precondicion = 'HTTP_IF_MATCH' in request.META or 'HTTP_IF_UNMODIFIED_SINCE' in request.META
+        with transaction.atomic():
+            instancia = self.get_object()
+            if precondicion:
+                # Releer con la fila bloqueada: nadie puede modificarla entre
+                # la verificación de If-Match y el guardado
+                instancia = type(instancia).objects.select_for_update().get(pk=instancia.pk)
+                condicional = self.respuesta_condicional(*self.validadores_objeto(instancia))
+                if condicional is not None:
+                    return condicional
+
+            serializer = self.get_serializer(instancia, data=request.data, partial=partial)
+            serializer.is_valid(raise_exception=True)
+            self.perform_update(serializer)
+
+        return self.con_validadores(
+            Response(serializer.data), *self.validadores_objeto(serializer.instance)
+        )
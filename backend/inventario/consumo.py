@@ -0,0 +1,122 @@
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate, TruncMonth, TruncWeek
+from django.utils import timezone
+from .models import MovimientoInventario, ConsumoDiario
+
+# Agrupaciones de la serie de consumo
+PERIODOS = {
+    'dia': None,
+    'semana': TruncWeek,
+    'mes': TruncMonth,
+}
+
+# Rango por defecto de cada agrupación cuando no se indica `desde`
+RANGO_POR_DEFECTO = {
+    'dia': timedelta(days=30),
+    'semana': timedelta(weeks=12),
+    'mes': timedelta(days=365),
+}
+
+TAMANO_LOTE = 2000
+
+
+def _inicio_dia(fecha):
+    return timezone.make_aware(datetime.combine(fecha, time.min))
+
+
+def reconstruir_consumo_diario(desde=None, hasta=None):
+    """
+    Recalcula ConsumoDiario desde los movimientos, opcionalmente solo para
+    los días [desde, hasta]. Reemplaza las filas del rango en una sola
+    transacción. Retorna la cantidad de filas escritas.
+    """
+    movimientos = MovimientoInventario.objects.all()
+    existentes = ConsumoDiario.objects.all()
+    if desde:
+        movimientos = movimientos.filter(fecha_movimiento__gte=_inicio_dia(desde))
+        existentes = existentes.filter(fecha__gte=desde)
+    if hasta:
+        movimientos = movimientos.filter(fecha_movimiento__lt=_inicio_dia(hasta + timedelta(days=1)))
+        existentes = existentes.filter(fecha__lte=hasta)
+
+    totales = movimientos.annotate(
+        # Día en la zona horaria local, igual que el mantenimiento en línea
+        dia=TruncDate('fecha_movimiento', tzinfo=timezone.get_current_timezone())
+    ).values('repuesto_id', 'dia', 'tipo_movimiento').annotate(
+        total_cantidad=Sum('cantidad'),
+        total_valor=Sum(
+            ExpressionWrapper(
+                F('cantidad') * Coalesce('costo_unitario', Value(Decimal('0.00'))),
+                output_field=DecimalField(max_digits=16, decimal_places=2)
+            )
+        ),
+        total_movimientos=Count('id'),
+    ).order_by()
+
+    escritas = 0
+    with transaction.atomic():
+        existentes.delete()
+        lote = []
+        for fila in totales.iterator(chunk_size=TAMANO_LOTE):
+            lote.append(ConsumoDiario(
+                repuesto_id=fila['repuesto_id'],
+                fecha=fila['dia'],
+                tipo_movimiento=fila['tipo_movimiento'],
+                cantidad=fila['total_cantidad'],
+                valor=fila['total_valor'] or Decimal('0.00'),
+                movimientos=fila['total_movimientos'],
+            ))
+            if len(lote) >= TAMANO_LOTE:
+                ConsumoDiario.objects.bulk_create(lote)
+                escritas += len(lote)
+                lote = []
+        if lote:
+            ConsumoDiario.objects.bulk_create(lote)
+            escritas += len(lote)
+    return escritas
+
+
+def serie_consumo(periodo, desde, hasta, tipos, repuesto_ids=None):
+    """
+    Serie de consumo agrupada por día, semana (lunes) o mes, leída solo de
+    ConsumoDiario. Cada punto trae los totales y el desglose por tipo.
+    """
+    filas = ConsumoDiario.objects.filter(
+        fecha__gte=desde, fecha__lte=hasta, tipo_movimiento__in=tipos
+    )
+    if repuesto_ids is not None:
+        filas = filas.filter(repuesto_id__in=repuesto_ids)
+
+    truncar = PERIODOS[periodo]
+    filas = filas.annotate(
+        periodo=truncar('fecha') if truncar else F('fecha')
+    ).values('periodo', 'tipo_movimiento').annotate(
+        total_cantidad=Sum('cantidad'),
+        total_valor=Sum('valor'),
+        total_movimientos=Sum('movimientos'),
+    ).order_by('periodo', 'tipo_movimiento')
+
+    serie = []
+    for fila in filas:
+        if not serie or serie[-1]['periodo'] != fila['periodo']:
+            serie.append({
+                'periodo': fila['periodo'],
+                'cantidad': 0,
+                'valor': Decimal('0.00'),
+                'movimientos': 0,
+                'por_tipo': {},
+            })
+        punto = serie[-1]
+        punto['cantidad'] += fila['total_cantidad']
+        punto['valor'] += fila['total_valor'] or Decimal('0.00')
+        punto['movimientos'] += fila['total_movimientos']
+        punto['por_tipo'][fila['tipo_movimiento']] = fila['total_cantidad']
+
+    for punto in serie:
+        # Decimales como string, igual que los serializers
+        punto['valor'] = str(punto['valor'].quantize(Decimal('0.01')))
+    return serie
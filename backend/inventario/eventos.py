@@ -0,0 +1,249 @@
+import asyncio
+import hashlib
+import itertools
+import json
+import logging
+import secrets
+import select
+import threading
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from rest_framework.authtoken.models import Token
+
+from usuarios.authentication import token_expirado
+
+logger = logging.getLogger(__name__)
+
+# Canal LISTEN/NOTIFY de PostgreSQL por el que viajan los eventos entre procesos
+CANAL = 'inventario_eventos'
+
+# Elementos por evento, para no superar el límite de tamaño de NOTIFY
+MAX_ITEMS_EVENTO = 100
+
+# Marca en cache, renovada por los streams abiertos en cualquier proceso
+CLAVE_SUSCRIPTORES = 'inventario:eventos:suscriptores'
+
+# Los tickets del stream solo sirven para eso (ver emitir_ticket)
+SALT_TICKET = 'inventario.eventos.ticket'
+
+
+class BrokerEventos:
+    """
+    Reparte eventos a los streams SSE abiertos en este proceso. Cada
+    suscriptor tiene una cola acotada en su propio event loop; publicar es
+    seguro desde cualquier hilo (call_soon_threadsafe).
+    """
+
+    def __init__(self, tamano_cola):
+        self.tamano_cola = tamano_cola
+        self._suscriptores = set()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def suscribir(self):
+        cola = asyncio.Queue(maxsize=self.tamano_cola)
+        with self._lock:
+            self._suscriptores.add((asyncio.get_running_loop(), cola))
+        return cola
+
+    @property
+    def hay_suscriptores(self):
+        return bool(self._suscriptores)
+
+    def desuscribir(self, cola):
+        with self._lock:
+            self._suscriptores = {s for s in self._suscriptores if s[1] is not cola}
+
+    def publicar(self, evento):
+        evento = dict(evento, id=next(self._ids))
+        with self._lock:
+            suscriptores = list(self._suscriptores)
+        for loop, cola in suscriptores:
+            try:
+                loop.call_soon_threadsafe(self._encolar, cola, evento)
+            except RuntimeError:
+                # El loop del suscriptor ya se cerró
+                self.desuscribir(cola)
+
+    @staticmethod
+    def _encolar(cola, evento):
+        if cola.full():
+            # Cliente lento: se descartan sus eventos pendientes y se le pide
+            # recargar los datos completos
+            while not cola.empty():
+                cola.get_nowait()
+            evento = {'tipo': 'resync', 'id': evento['id'], 'datos': {}}
+        cola.put_nowait(evento)
+
+
+broker = BrokerEventos(settings.INVENTARIO_EVENTOS_TAMANO_COLA)
+
+
+def usa_notify():
+    return connection.vendor == 'postgresql'
+
+
+def hay_suscriptores():
+    """
+    False si ningún stream está abierto y el evento puede omitirse. En
+    PostgreSQL se consulta la marca de CLAVE_SUSCRIPTORES; sin
+    CACHE_COMPARTIDO no se ven los streams de otros procesos y se asume que sí.
+    """
+    if not usa_notify():
+        return broker.hay_suscriptores
+    if not settings.CACHE_COMPARTIDO:
+        return True
+    return cache.get(CLAVE_SUSCRIPTORES, False)
+
+
+async def marcar_suscriptores():
+    """Renueva la marca de streams abiertos; cada stream la llama por heartbeat"""
+    if settings.CACHE_COMPARTIDO:
+        await cache.aset(CLAVE_SUSCRIPTORES, True, timeout=3 * settings.INVENTARIO_EVENTOS_HEARTBEAT)
+
+
+def publicar_evento(tipo, datos):
+    """
+    Publica un evento cuando la transacción en curso se confirme. En
+    PostgreSQL viaja por NOTIFY (que se entrega solo al hacer commit y llega
+    a todos los procesos); en otros motores se reparte en este proceso.
+    Sin streams abiertos no se publica: NOTIFY serializa los commits.
+    """
+    if not hay_suscriptores():
+        return
+    evento = {'tipo': tipo, 'datos': datos}
+    if usa_notify():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT pg_notify(%s, %s)',
+                [CANAL, json.dumps(evento, cls=DjangoJSONEncoder)]
+            )
+    else:
+        transaction.on_commit(lambda: broker.publicar(evento))
+
+
+def publicar_stock(stocks):
+    """Eventos de cambio de stock; `stocks` es una lista de (repuesto_id, stock_actual)"""
+    stocks = list(stocks)
+    # NOTIFY admite hasta 8000 bytes por mensaje
+    for inicio in range(0, len(stocks), MAX_ITEMS_EVENTO):
+        publicar_evento('stock', {
+            'repuestos': [
+                {'id': repuesto_id, 'stock_actual': stock}
+                for repuesto_id, stock in stocks[inicio:inicio + MAX_ITEMS_EVENTO]
+            ]
+        })
+
+
+def publicar_alertas(alertas):
+    """Eventos de alertas creadas o cambiadas de estado"""
+    alertas = list(alertas)
+    for inicio in range(0, len(alertas), MAX_ITEMS_EVENTO):
+        publicar_evento('alerta', {
+            'alertas': [
+                {
+                    'id': alerta.pk,
+                    'repuesto': alerta.repuesto_id,
+                    'estado': alerta.estado,
+                    'stock_actual': alerta.stock_actual,
+                    'stock_minimo': alerta.stock_minimo,
+                }
+                for alerta in alertas[inicio:inicio + MAX_ITEMS_EVENTO]
+            ]
+        })
+
+
+def _huella(key):
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def emitir_ticket(token):
+    """
+    Ticket firmado para abrir el stream. EventSource no envía cabeceras y la
+    URL queda en los logs del proxy, así que en vez del token viaja esto:
+    vence en INVENTARIO_EVENTOS_TICKET_TTL segundos, se usa una vez y solo
+    lleva la huella del token.
+    """
+    return signing.dumps(
+        {'u': token.user_id, 't': _huella(token.key), 'n': secrets.token_hex(8)},
+        salt=SALT_TICKET
+    )
+
+
+def validar_ticket(ticket):
+    """(user_id, huella del token) si el ticket es válido y su token sigue vigente; si no, None"""
+    ttl = settings.INVENTARIO_EVENTOS_TICKET_TTL
+    try:
+        datos = signing.loads(ticket, salt=SALT_TICKET, max_age=ttl)
+    except signing.BadSignature:
+        return None
+    # Un solo uso (entre procesos, solo con CACHE_COMPARTIDO)
+    if not cache.add('inventario:eventos:ticket:' + _huella(ticket), True, timeout=ttl):
+        return None
+    if not token_vigente(datos['u'], datos['t']):
+        return None
+    return datos['u'], datos['t']
+
+
+def token_vigente(user_id, huella):
+    """True si el token del ticket no fue revocado ni expiró y su usuario sigue activo"""
+    token = Token.objects.select_related('user').filter(user_id=user_id).first()
+    return (
+        token is not None
+        and _huella(token.key) == huella
+        and not token_expirado(token)
+        and token.user.is_active
+    )
+
+
+class EscuchaPostgres(threading.Thread):
+    """
+    Hilo que hace LISTEN sobre CANAL con una conexión propia y reenvía cada
+    notificación al broker del proceso. Se inicia con el primer stream.
+    """
+
+    def __init__(self):
+        super().__init__(name='inventario-eventos', daemon=True)
+
+    def run(self):
+        import psycopg2
+
+        while True:
+            conexion = None
+            try:
+                conexion = psycopg2.connect(**connection.get_connection_params())
+                conexion.autocommit = True
+                with conexion.cursor() as cursor:
+                    cursor.execute(f'LISTEN {CANAL}')
+                while True:
+                    if select.select([conexion], [], [], 30) == ([], [], []):
+                        continue
+                    conexion.poll()
+                    while conexion.notifies:
+                        notificacion = conexion.notifies.pop(0)
+                        broker.publicar(json.loads(notificacion.payload))
+            except Exception:
+                logger.exception('Escucha de eventos de inventario interrumpida; reintentando')
+                if conexion is not None:
+                    conexion.close()
+                time.sleep(5)
+
+
+_escucha = None
+_escucha_lock = threading.Lock()
+
+
+def iniciar_escucha():
+    """Inicia (una vez por proceso) el hilo LISTEN si la base es PostgreSQL"""
+    global _escucha
+    if not usa_notify():
+        return
+    with _escucha_lock:
+        if _escucha is None:
+            _escucha = EscuchaPostgres()
+            _escucha.start()
@@ -0,0 +1,126 @@
+import csv
+import tempfile
+from datetime import datetime
+from decimal import Decimal
+
+from django.http import StreamingHttpResponse, FileResponse
+from django.utils import timezone
+from openpyxl import Workbook
+
+# Filas leídas por vuelta del cursor del lado del servidor
+TAMANO_LOTE = 2000
+
+# (campo para values_list, encabezado)
+COLUMNAS_REPUESTOS = [
+    ('id', 'ID'),
+    ('nombre', 'Nombre'),
+    ('descripcion', 'Descripción'),
+    ('marca', 'Marca'),
+    ('modelo', 'Modelo'),
+    ('codigo_barras', 'Código de barras'),
+    ('unidad_medida', 'Unidad de medida'),
+    ('stock_actual', 'Stock actual'),
+    ('stock_minimo_seguridad', 'Stock mínimo'),
+    ('costo_unitario', 'Costo unitario'),
+    ('activo', 'Activo'),
+    ('creado_en', 'Creado en'),
+    ('actualizado_en', 'Actualizado en'),
+    ('creado_por__username', 'Creado por'),
+]
+
+COLUMNAS_MOVIMIENTOS = [
+    ('id', 'ID'),
+    ('fecha_movimiento', 'Fecha'),
+    ('repuesto_id', 'Repuesto ID'),
+    ('repuesto__nombre', 'Repuesto'),
+    ('tipo_movimiento', 'Tipo de movimiento'),
+    ('cantidad', 'Cantidad'),
+    ('stock_anterior', 'Stock anterior'),
+    ('stock_posterior', 'Stock posterior'),
+    ('costo_unitario', 'Costo unitario'),
+    ('registrado_por__username', 'Registrado por'),
+    ('autorizado_por__username', 'Autorizado por'),
+    ('proveedor', 'Proveedor'),
+    ('numero_factura', 'Número de factura'),
+    ('numero_ot', 'Número de OT'),
+    ('observaciones', 'Observaciones'),
+]
+
+FORMATOS = ['csv', 'xlsx']
+
+
+class _Eco:
+    """Pseudo-archivo para csv.writer: retorna la línea en vez de escribirla"""
+
+    def write(self, value):
+        return value
+
+
+def _filas(queryset, columnas):
+    """Itera las filas con un cursor del lado del servidor (memoria constante)"""
+    campos = [campo for campo, _ in columnas]
+    return queryset.values_list(*campos).iterator(chunk_size=TAMANO_LOTE)
+
+
+def _valor_csv(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, datetime):
+        return timezone.localtime(valor).isoformat()
+    return valor
+
+
+def _valor_xlsx(valor):
+    if isinstance(valor, datetime):
+        # openpyxl no admite datetimes con zona horaria
+        return timezone.localtime(valor).replace(tzinfo=None)
+    if isinstance(valor, Decimal):
+        return float(valor)
+    return valor
+
+
+def exportar_csv(queryset, columnas, nombre_archivo):
+    """Respuesta CSV que se genera fila a fila mientras se lee el cursor"""
+    escritor = csv.writer(_Eco())
+
+    def generar():
+        # BOM para que Excel reconozca UTF-8
+        yield '\ufeff' + escritor.writerow([encabezado for _, encabezado in columnas])
+        for fila in _filas(queryset, columnas):
+            yield escritor.writerow([_valor_csv(valor) for valor in fila])
+
+    response = StreamingHttpResponse(generar(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{nombre_archivo}.csv"'
+    return response
+
+
+def exportar_xlsx(queryset, columnas, nombre_archivo):
+    """
+    Libro XLSX en modo write-only: openpyxl vuelca cada fila a disco, por lo
+    que la memoria no crece con la cantidad de filas. El archivo resultante
+    se envía en bloques desde un archivo temporal.
+    """
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet(title=nombre_archivo[:31])
+    hoja.append([encabezado for _, encabezado in columnas])
+    for fila in _filas(queryset, columnas):
+        hoja.append([_valor_xlsx(valor) for valor in fila])
+
+    archivo = tempfile.TemporaryFile()
+    libro.save(archivo)
+    archivo.seek(0)
+
+    return FileResponse(
+        archivo,
+        as_attachment=True,
+        filename=f'{nombre_archivo}.xlsx',
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    )
+
+
+def exportar(queryset, columnas, nombre, formato):
+    """Exporta el queryset en el formato pedido ('csv' o 'xlsx')"""
+    nombre_archivo = f'{nombre}_{timezone.localdate():%Y%m%d}'
+    if formato == 'xlsx':
+        return exportar_xlsx(queryset, columnas, nombre_archivo)
+    return exportar_csv(queryset, columnas, nombre_archivo)
@@ -0,0 +1,218 @@
+import csv
+import io
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from openpyxl import load_workbook
+from .models import Repuesto
+from .cache import invalidar_catalogo, invalidar_codigos_barras
+from .exportacion import COLUMNAS_REPUESTOS
+
+# Filas validadas y escritas por vuelta
+TAMANO_LOTE = 1000
+
+# Máximo de errores detallados en el reporte
+MAX_ERRORES_REPORTE = 1000
+
+# Columnas importables y su largo máximo (None = sin límite / no texto)
+CAMPOS_IMPORTABLES = {
+    'nombre': 200,
+    'descripcion': None,
+    'marca': 100,
+    'modelo': 100,
+    'codigo_barras': 100,
+    'unidad_medida': 20,
+    'stock_minimo_seguridad': None,
+    'costo_unitario': None,
+    'activo': None,
+}
+
+# Se aceptan tanto los nombres de campo como los encabezados de la exportación
+ENCABEZADOS = {campo: campo for campo in CAMPOS_IMPORTABLES}
+ENCABEZADOS.update({
+    encabezado.lower(): campo
+    for campo, encabezado in COLUMNAS_REPUESTOS
+    if campo in CAMPOS_IMPORTABLES
+})
+
+VALORES_VERDADEROS = {'1', 'true', 'si', 'sí', 's', 'x', 'yes', 'verdadero'}
+VALORES_FALSOS = {'0', 'false', 'no', 'n', 'falso'}
+
+
+class ErrorImportacion(Exception):
+    """Archivo que no se puede procesar (formato o encabezados inválidos)"""
+
+
+def leer_filas(archivo, nombre_archivo):
+    """
+    Retorna (columnas, iterador de (linea, valores)) para un archivo CSV o XLSX.
+    Las filas se leen de forma perezosa para no cargar el archivo completo.
+    """
+    if nombre_archivo.lower().endswith('.xlsx'):
+        libro = load_workbook(archivo, read_only=True, data_only=True)
+        filas = libro.active.iter_rows(values_only=True)
+    elif nombre_archivo.lower().endswith('.csv'):
+        filas = csv.reader(io.TextIOWrapper(archivo, encoding='utf-8-sig'))
+    else:
+        raise ErrorImportacion('Formato no soportado. Use un archivo .csv o .xlsx')
+
+    encabezado = next(filas, None)
+    if not encabezado:
+        raise ErrorImportacion('El archivo está vacío')
+
+    columnas = [ENCABEZADOS.get(str(celda or '').strip().lower()) for celda in encabezado]
+    if 'nombre' not in columnas:
+        raise ErrorImportacion('El archivo debe incluir la columna "nombre"')
+
+    def iterar():
+        for linea, fila in enumerate(filas, start=2):
+            if not any(celda not in (None, '') for celda in fila):
+                continue  # Fila vacía
+            yield linea, {
+                columna: valor
+                for columna, valor in zip(columnas, fila)
+                if columna is not None
+            }
+
+    return [columna for columna in columnas if columna is not None], iterar()
+
+
+def validar_fila(valores):
+    """
+    Valida y normaliza una fila sin consultar la base de datos. Las celdas
+    vacías quedan fuera de `datos`: un repuesto existente conserva ese valor
+    y uno nuevo toma el del modelo. Retorna (datos, errores).
+    """
+    datos = {}
+    errores = {}
+
+    for campo, largo_maximo in CAMPOS_IMPORTABLES.items():
+        if campo not in valores:
+            continue
+        valor = valores[campo]
+        if isinstance(valor, float) and valor.is_integer():
+            # XLSX guarda los números como float: 7801234567890 y no '7801234567890.0'
+            valor = int(valor)
+        texto = '' if valor is None else str(valor).strip()
+        if texto == '':
+            continue
+
+        if campo == 'stock_minimo_seguridad':
+            try:
+                numero = Decimal(texto)
+                if numero != numero.to_integral_value() or numero < 0:
+                    raise InvalidOperation
+                datos[campo] = int(numero)
+            except InvalidOperation:
+                errores[campo] = 'Debe ser un número entero no negativo.'
+
+        elif campo == 'costo_unitario':
+            try:
+                costo = Decimal(texto.replace(',', '.')).quantize(Decimal('0.01'))
+                if costo < 0 or costo >= Decimal('100000000'):
+                    raise InvalidOperation
+                datos[campo] = costo
+            except InvalidOperation:
+                errores[campo] = 'Debe ser un número decimal válido.'
+
+        elif campo == 'activo':
+            if texto.lower() in VALORES_VERDADEROS:
+                datos[campo] = True
+            elif texto.lower() in VALORES_FALSOS:
+                datos[campo] = False
+            else:
+                errores[campo] = 'Debe ser sí/no.'
+
+        elif largo_maximo and len(texto) > largo_maximo:
+            errores[campo] = f'Máximo {largo_maximo} caracteres.'
+
+        else:
+            datos[campo] = texto
+
+    if not errores and not datos.get('nombre'):
+        errores['nombre'] = 'Este campo es requerido.'
+
+    return datos, errores
+
+
+def importar_repuestos(archivo, nombre_archivo, usuario=None):
+    """
+    Importa un catálogo de repuestos desde CSV/XLSX haciendo upsert por
+    codigo_barras. Las filas se validan por lotes; la unicidad de los
+    códigos se resuelve con una sola consulta por lote y la escritura con
+    un bulk insert/update. El stock no se importa: solo cambia con movimientos.
+    """
+    _, filas = leer_filas(archivo, nombre_archivo)
+
+    reporte = {
+        'total_filas': 0,
+        'creados': 0,
+        'actualizados': 0,
+        'rechazados': 0,
+        'errores': [],
+    }
+    codigos_vistos = {}
+
+    def rechazar(linea, errores):
+        reporte['rechazados'] += 1
+        if len(reporte['errores']) < MAX_ERRORES_REPORTE:
+            reporte['errores'].append({'linea': linea, 'errores': errores})
+
+    def procesar_lote(lote):
+        codigos = [datos['codigo_barras'] for _, datos in lote if datos.get('codigo_barras')]
+        existentes = set(
+            Repuesto.objects.filter(codigo_barras__in=codigos).values_list('codigo_barras', flat=True)
+        ) if codigos else set()
+
+        # Agrupadas por las columnas con valor: el upsert de cada grupo solo
+        # actualiza esas columnas y no pisa las demás con el valor por defecto
+        grupos = {}
+        for _, datos in lote:
+            if datos.get('codigo_barras') in existentes:
+                reporte['actualizados'] += 1
+            else:
+                reporte['creados'] += 1
+            grupos.setdefault(frozenset(datos), []).append(Repuesto(creado_por=usuario, **datos))
+
+        for campos, repuestos in grupos.items():
+            # INSERT ... ON CONFLICT (codigo_barras) DO UPDATE de las columnas con valor
+            Repuesto.objects.bulk_create(
+                repuestos,
+                update_conflicts=True,
+                unique_fields=['codigo_barras'],
+                update_fields=sorted(campos - {'codigo_barras'}) + ['actualizado_en'],
+            )
+
+    with transaction.atomic():
+        lote = []
+        for linea, valores in filas:
+            reporte['total_filas'] += 1
+            datos, errores = validar_fila(valores)
+
+            codigo = datos.get('codigo_barras')
+            if not errores and codigo:
+                if codigo in codigos_vistos:
+                    errores = {
+                        'codigo_barras': f'Código repetido en el archivo (línea {codigos_vistos[codigo]}).'
+                    }
+                else:
+                    codigos_vistos[codigo] = linea
+
+            if errores:
+                rechazar(linea, errores)
+                continue
+
+            lote.append((linea, datos))
+            if len(lote) >= TAMANO_LOTE:
+                procesar_lote(lote)
+                lote = []
+
+        if lote:
+            procesar_lote(lote)
+
+        if reporte['creados'] or reporte['actualizados']:
+            # Los bulk_* no disparan signals
+            invalidar_catalogo()
+            invalidar_codigos_barras()
+
+    return reporte
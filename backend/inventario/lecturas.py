@@ -0,0 +1,225 @@
+"""
+Versiones async de los endpoints de lectura del inventario
+(/api/inventario/lecturas/...), para servir con ASGI (SERVIDOR_MODO=asgi).
+
+Responden el mismo JSON que las acciones de los ViewSets, cuyos permisos,
+filtros, paginación y serializers reutilizan: la autenticación y el armado
+del queryset corren en un hilo y las consultas con el ORM async. En los
+listados el conteo con los validadores y la página se consultan a la vez.
+
+Con Django 4.2 el ORM async ejecuta cada consulta con sync_to_async en el
+hilo de la request, así que las consultas lanzadas juntas se ejecutan una
+tras otra sobre la misma conexión; pasan a ser concurrentes con un driver
+async sin cambiar estas vistas. Lo que se gana hoy es que la cantidad de
+requests en curso por proceso no está limitada a workers × hilos.
+"""
+import asyncio
+import logging
+
+from asgiref.sync import sync_to_async
+from django.core.paginator import InvalidPage, Page, Paginator
+from django.http import Http404
+from django.views import View
+from rest_framework.exceptions import NotFound
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from .cache import aobtener_estadisticas
+from .views import AlertaStockViewSet, RepuestoViewSet
+
+logger = logging.getLogger(__name__)
+
+
+class LecturaAsync(View):
+    """
+    GET async que ejecuta la acción `accion` de `viewset`. Las subclases
+    implementan preparar(vista), que arma las consultas en el hilo junto con
+    la autenticación, y la corrutina responder(vista).
+    """
+
+    viewset = None
+    accion = None
+
+    async def get(self, request, *args, **kwargs):
+        vista, respuesta = await sync_to_async(self._iniciar)(request, args, kwargs)
+        if respuesta is None:
+            try:
+                respuesta = await self.responder(vista)
+            except Exception as exc:
+                respuesta = await sync_to_async(vista.handle_exception)(exc)
+        if isinstance(getattr(vista.request, 'accepted_renderer', None), JSONRenderer):
+            return self._finalizar(vista, respuesta)
+        # El renderer navegable consulta formularios y filtros
+        return await sync_to_async(self._finalizar)(vista, respuesta)
+
+    def _iniciar(self, request, args, kwargs):
+        vista = self.viewset(action_map={'get': self.accion, 'head': self.accion})
+        vista.args = args
+        vista.kwargs = kwargs
+        vista.request = vista.initialize_request(request, *args, **kwargs)
+        vista.headers = vista.default_response_headers
+        try:
+            vista.initial(vista.request, *args, **kwargs)
+            self.preparar(vista)
+        except Exception as exc:
+            return vista, vista.handle_exception(exc)
+        return vista, None
+
+    def _finalizar(self, vista, respuesta):
+        respuesta = vista.finalize_response(vista.request, respuesta)
+        if isinstance(respuesta, Response):
+            respuesta.render()
+        return respuesta
+
+    def preparar(self, vista):
+        pass
+
+    async def responder(self, vista):
+        raise NotImplementedError
+
+
+class ListadoAsync(LecturaAsync):
+    """list() con validadores condicionales y paginación por número de página"""
+
+    accion = 'list'
+
+    def preparar(self, vista):
+        self.queryset = vista.filter_queryset(vista.get_queryset())
+        self.filas = self.queryset
+
+    async def serializar(self, vista, filas):
+        return await sync_to_async(lambda: vista.get_serializer(filas, many=True).data)()
+
+    async def responder(self, vista):
+        paginacion = vista.paginator
+        tamano = paginacion.get_page_size(vista.request) if paginacion else None
+        agregados = self.queryset.order_by().aaggregate(**vista.agregados_lista())
+
+        if tamano is None:
+            agregados, filas = await asyncio.gather(agregados, self._leer(self.filas))
+        else:
+            numero = vista.request.query_params.get(paginacion.page_query_param, 1)
+            inicio = _inicio_pagina(numero, tamano)
+            if inicio is None or 'HTTP_IF_NONE_MATCH' in vista.request.META:
+                # Primero los validadores: con 304 (o una página inválida) no
+                # se leen filas
+                agregados = await agregados
+                filas = None
+            else:
+                agregados, filas = await asyncio.gather(
+                    agregados, self._leer(self.filas[inicio:inicio + tamano])
+                )
+
+        etag, _ = vista.validadores_de_agregados(agregados)
+        condicional = vista.respuesta_condicional(etag)
+        if condicional is not None:
+            return condicional
+
+        if tamano is None:
+            return vista.con_validadores(Response(await self.serializar(vista, filas)), etag)
+
+        paginador = Paginator((), tamano)
+        paginador.count = agregados['total']
+        numero = paginacion.get_page_number(vista.request, paginador)
+        try:
+            numero = paginador.validate_number(numero)
+        except InvalidPage as exc:
+            raise NotFound(paginacion.invalid_page_message.format(
+                page_number=numero, message=str(exc)
+            ))
+        if filas is None:
+            inicio = (numero - 1) * tamano
+            filas = await self._leer(self.filas[inicio:inicio + tamano])
+
+        paginacion.request = vista.request
+        paginacion.page = Page(filas, numero, paginador)
+        respuesta = paginacion.get_paginated_response(await self.serializar(vista, filas))
+        # Sin Last-Modified, igual que ConsultaCondicionalMixin.list
+        return vista.con_validadores(respuesta, etag)
+
+    @staticmethod
+    async def _leer(queryset):
+        return [fila async for fila in queryset]
+
+
+def _inicio_pagina(numero, tamano):
+    """Offset de la página pedida, o None si hay que contar las filas para validarla"""
+    try:
+        numero = int(numero)
+    except (TypeError, ValueError):
+        return None
+    return (numero - 1) * tamano if numero >= 1 else None
+
+
+class RepuestosAsync(ListadoAsync):
+    viewset = RepuestoViewSet
+
+    def preparar(self, vista):
+        super().preparar(vista)
+        self.serializacion = vista.serializacion_valores()
+        self.filas = self.serializacion.preparar(self.queryset)
+
+    async def serializar(self, vista, filas):
+        return self.serializacion.serializar(filas)
+
+
+class AlertasAsync(ListadoAsync):
+    viewset = AlertaStockViewSet
+
+
+class RepuestoDetalleAsync(LecturaAsync):
+    viewset = RepuestoViewSet
+    accion = 'retrieve'
+
+    def preparar(self, vista):
+        self.queryset = vista.filter_queryset(vista.get_queryset())
+
+    async def responder(self, vista):
+        clave = vista.lookup_url_kwarg or vista.lookup_field
+        try:
+            instancia = await self.queryset.aget(**{vista.lookup_field: vista.kwargs[clave]})
+        except self.queryset.model.DoesNotExist:
+            raise Http404
+        vista.check_object_permissions(vista.request, instancia)
+
+        # La consulta planificada ya trae los timestamps (ver campos.py), pero
+        # leer un campo diferido desde el event loop falla: se lee en el hilo
+        etag, ultima_modificacion = await sync_to_async(vista.validadores_objeto)(instancia)
+        condicional = vista.respuesta_condicional(etag, ultima_modificacion)
+        if condicional is not None:
+            return condicional
+        datos = await sync_to_async(lambda: vista.get_serializer(instancia).data)()
+        return vista.con_validadores(Response(datos), etag, ultima_modificacion)
+
+
+class StockBajoAsync(LecturaAsync):
+    viewset = RepuestoViewSet
+    accion = 'stock_bajo'
+
+    def preparar(self, vista):
+        self.serializacion = vista.serializacion_valores()
+        self.filas = self.serializacion.preparar(vista.consulta_stock_bajo())
+
+    async def responder(self, vista):
+        filas = [fila async for fila in self.filas]
+        return Response(self.serializacion.serializar(filas))
+
+
+class EstadisticasAsync(LecturaAsync):
+    viewset = RepuestoViewSet
+    accion = 'estadisticas'
+
+    def preparar(self, vista):
+        self.queryset = vista.get_queryset()
+        self.filtro = vista.request.query_params.get('necesita_reposicion', '').lower()
+
+    async def responder(self, vista):
+        async def calcular():
+            stats = await self.queryset.aaggregate(**vista.agregados_estadisticas())
+            return vista.normalizar_estadisticas(stats)
+
+        try:
+            return Response(await aobtener_estadisticas(self.filtro, calcular))
+        except Exception:
+            logger.exception('Error calculando estadísticas del inventario')
+            return Response(vista.ESTADISTICAS_VACIAS)
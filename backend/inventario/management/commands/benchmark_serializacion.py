@@ -0,0 +1,79 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from inventario.campos import planificar_consulta
+from inventario.models import Repuesto
+from inventario.serializers import RepuestoSerializer
+from inventario.valores import SerializacionValores, ANOTACIONES_REPUESTO
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara el listado de repuestos serializado con RepuestoSerializer '
+        'contra la ruta rápida desde .values() y verifica que el JSON sea idéntico'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cantidad', type=int, default=1000, help='Repuestos por respuesta')
+        parser.add_argument('--repeticiones', type=int, default=10)
+
+    def handle(self, *args, **options):
+        cantidad = options['cantidad']
+        repeticiones = options['repeticiones']
+
+        # Los repuestos sintéticos se descartan al terminar
+        with transaction.atomic():
+            faltantes = cantidad - Repuesto.objects.count()
+            if faltantes > 0:
+                Repuesto.objects.bulk_create([
+                    Repuesto(
+                        nombre=f'BENCHMARK {i:06d}',
+                        marca='Marca',
+                        modelo=f'M-{i % 50}',
+                        stock_actual=i % 40,
+                        stock_minimo_seguridad=10,
+                        costo_unitario=(i % 900) + 0.5 if i % 7 else None,
+                    )
+                    for i in range(faltantes)
+                ])
+
+            queryset = Repuesto.objects.order_by('nombre', 'id')
+            serializer = RepuestoSerializer()
+            serializacion = SerializacionValores(serializer, ANOTACIONES_REPUESTO)
+            renderer = JSONRenderer()
+
+            def con_serializer():
+                filas = planificar_consulta(queryset, serializer)[:cantidad]
+                return renderer.render(RepuestoSerializer(filas, many=True).data)
+
+            def con_values():
+                filas = serializacion.preparar(queryset)[:cantidad]
+                return renderer.render(serializacion.serializar(filas))
+
+            if con_serializer() != con_values():
+                self.stdout.write(self.style.ERROR('El JSON de ambas rutas difiere'))
+                transaction.set_rollback(True)
+                return
+
+            tiempos = {}
+            for nombre, funcion in [('serializer', con_serializer), ('values', con_values)]:
+                muestras = []
+                for _ in range(repeticiones):
+                    inicio = time.perf_counter()
+                    funcion()
+                    muestras.append(time.perf_counter() - inicio)
+                tiempos[nombre] = muestras
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(f'Repuestos por respuesta: {cantidad}')
+        for nombre, muestras in tiempos.items():
+            self.stdout.write(
+                f'{nombre:<12} mediana {statistics.median(muestras) * 1000:8.1f} ms   '
+                f'mínimo {min(muestras) * 1000:8.1f} ms'
+            )
+        mejora = statistics.median(tiempos['serializer']) / statistics.median(tiempos['values'])
+        self.stdout.write(self.style.SUCCESS(f'JSON idéntico; ruta values {mejora:.1f}x más rápida'))
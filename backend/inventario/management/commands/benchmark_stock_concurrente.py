@@ -0,0 +1,100 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from inventario.models import Repuesto, MovimientoInventario
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide el throughput de movimientos concurrentes sobre un mismo repuesto '
+        'y verifica que no se pierdan actualizaciones de stock'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hilos', type=int, default=8, help='Escritores en paralelo')
+        parser.add_argument('--movimientos', type=int, default=200, help='Movimientos por hilo')
+        parser.add_argument('--stock-inicial', type=int, default=1_000_000)
+        parser.add_argument(
+            '--legado', action='store_true',
+            help='Emular el read-modify-write anterior para comparar'
+        )
+
+    def handle(self, *args, **options):
+        hilos = options['hilos']
+        por_hilo = options['movimientos']
+        stock_inicial = options['stock_inicial']
+
+        repuesto = Repuesto.objects.create(
+            nombre='BENCHMARK concurrencia',
+            stock_actual=stock_inicial,
+            stock_minimo_seguridad=0,
+        )
+        errores = []
+        barrera = threading.Barrier(hilos)
+
+        def escritor(numero):
+            try:
+                barrera.wait()
+                for i in range(por_hilo):
+                    # Mitad de los hilos descuenta y la otra mitad repone
+                    tipo = 'SALIDA_USO' if numero % 2 else 'ENTRADA'
+                    if options['legado']:
+                        self._movimiento_legado(repuesto.pk, tipo)
+                    else:
+                        MovimientoInventario.objects.create(
+                            repuesto_id=repuesto.pk,
+                            tipo_movimiento=tipo,
+                            cantidad=1,
+                        )
+            except Exception as e:
+                errores.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=escritor, args=(n,)) for n in range(hilos)]
+        inicio = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        duracion = time.perf_counter() - inicio
+
+        total = hilos * por_hilo
+        salidas = sum(por_hilo for n in range(hilos) if n % 2)
+        esperado = stock_inicial + (total - salidas) - salidas
+        repuesto.refresh_from_db()
+        perdidas = abs(esperado - repuesto.stock_actual)
+
+        self.stdout.write(f'Escritores:          {hilos}')
+        self.stdout.write(f'Movimientos:         {total}')
+        self.stdout.write(f'Duración:            {duracion:.2f} s')
+        self.stdout.write(f'Throughput:          {total / duracion:.1f} movimientos/s')
+        self.stdout.write(f'Stock esperado:      {esperado}')
+        self.stdout.write(f'Stock final:         {repuesto.stock_actual}')
+        if errores:
+            self.stdout.write(self.style.ERROR(f'Errores:             {len(errores)} ({errores[0]})'))
+
+        if perdidas:
+            self.stdout.write(self.style.ERROR(f'Actualizaciones perdidas: {perdidas}'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Sin actualizaciones perdidas'))
+
+        repuesto.delete()
+
+    def _movimiento_legado(self, repuesto_id, tipo):
+        """Reproduce el save() anterior: lee el stock, calcula en Python y guarda"""
+        with transaction.atomic():
+            repuesto = Repuesto.objects.get(pk=repuesto_id)
+            anterior = repuesto.stock_actual
+            posterior = MovimientoInventario.calcular_stock_posterior(tipo, anterior, 1)
+            repuesto.stock_actual = posterior
+            repuesto.save()
+            MovimientoInventario.objects.bulk_create([MovimientoInventario(
+                repuesto=repuesto,
+                tipo_movimiento=tipo,
+                cantidad=1,
+                stock_anterior=anterior,
+                stock_posterior=posterior,
+            )])
@@ -0,0 +1,44 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from inventario.recomendacion import recalcular_sugerencias
+
+
+class Command(BaseCommand):
+    help = (
+        'Calcula sugerencias de stock mínimo (punto de reorden) para todo el '
+        'catálogo a partir del consumo diario. Se aprueban vía API.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dias', type=int, default=settings.INVENTARIO_RECOMENDACION_DIAS,
+            help='Días de historia de consumo'
+        )
+        parser.add_argument(
+            '--lead-time', type=int, default=settings.INVENTARIO_LEAD_TIME_DIAS,
+            help='Días de reposición'
+        )
+        parser.add_argument(
+            '--nivel-servicio', type=float, default=settings.INVENTARIO_NIVEL_SERVICIO,
+            help='Probabilidad de no quebrar stock durante la reposición (0-1)'
+        )
+
+    def handle(self, *args, **options):
+        if options['dias'] < 2:
+            raise CommandError('--dias debe ser al menos 2')
+        if options['lead_time'] < 1:
+            raise CommandError('--lead-time debe ser al menos 1')
+        if not 0.5 <= options['nivel_servicio'] < 1:
+            raise CommandError('--nivel-servicio debe estar entre 0.5 y 1')
+
+        inicio = time.perf_counter()
+        resumen = recalcular_sugerencias(options['dias'], options['lead_time'], options['nivel_servicio'])
+        duracion = time.perf_counter() - inicio
+
+        self.stdout.write(f"Ventana:      {resumen['desde']} a {resumen['hasta']}")
+        self.stdout.write(f"Repuestos:    {resumen['repuestos']}")
+        self.stdout.write(f"Con consumo:  {resumen['con_consumo']}")
+        self.stdout.write(f"Sugerencias:  {resumen['sugerencias']}")
+        self.stdout.write(self.style.SUCCESS(f'Cálculo terminado en {duracion:.2f} s'))
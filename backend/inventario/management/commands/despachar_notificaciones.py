@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+from inventario.notificaciones import despachar_notificaciones
+
+
+class Command(BaseCommand):
+    help = 'Envía las notificaciones pendientes de alertas de stock (un resumen por destinatario)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=200, help='Notificaciones por lote')
+        parser.add_argument(
+            '--continuo', action='store_true',
+            help='Sigue ejecutándose y revisa la cola cada --intervalo segundos'
+        )
+        parser.add_argument('--intervalo', type=float, default=10, help='Segundos entre revisiones en modo continuo')
+
+    def handle(self, *args, **options):
+        while True:
+            # Vaciar la cola lote a lote
+            while True:
+                resumen = despachar_notificaciones(options['lote'])
+                procesadas = (
+                    resumen['enviadas'] + resumen['fallidas'] +
+                    resumen['reintentos'] + resumen['descartadas']
+                )
+                if not procesadas:
+                    break
+                self.stdout.write(
+                    f"Correos: {resumen['correos']}  Enviadas: {resumen['enviadas']}  "
+                    f"Reintentos: {resumen['reintentos']}  Fallidas: {resumen['fallidas']}  "
+                    f"Descartadas: {resumen['descartadas']}"
+                )
+                if procesadas < options['lote']:
+                    break
+
+            if not options['continuo']:
+                break
+            time.sleep(options['intervalo'])
@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from inventario.sinteticos import CLAVE_USUARIOS, PREFIJO_USUARIO, generar_datos_sinteticos
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera un dataset sintético de tamaño de producción (usuarios, repuestos, '
+        'movimientos con mezcla de tipos y distribución horaria realistas y alertas) '
+        'con inserciones masivas (COPY en PostgreSQL)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repuestos', type=int, default=10_000)
+        parser.add_argument('--movimientos', type=int, default=500_000)
+        parser.add_argument('--usuarios', type=int, default=50)
+        parser.add_argument('--dias', type=int, default=365, help='Días de historia de los movimientos')
+        parser.add_argument('--semilla', type=int, default=0, help='Misma semilla, mismos datos')
+
+    def handle(self, *args, **options):
+        for opcion in ('repuestos', 'movimientos', 'usuarios'):
+            if options[opcion] < 0:
+                raise CommandError(f'--{opcion} no puede ser negativo')
+        if options['dias'] < 1:
+            raise CommandError('--dias debe ser al menos 1')
+
+        inicio = time.perf_counter()
+        totales = generar_datos_sinteticos(
+            repuestos=options['repuestos'],
+            movimientos=options['movimientos'],
+            usuarios=options['usuarios'],
+            dias=options['dias'],
+            semilla=options['semilla'],
+            progreso=lambda mensaje: self.stdout.write(f'  {mensaje}'),
+        )
+        duracion = time.perf_counter() - inicio
+
+        for nombre, cantidad in totales.items():
+            self.stdout.write(f'{nombre.capitalize():<13} {cantidad}')
+        if totales['usuarios']:
+            self.stdout.write(f'Usuarios {PREFIJO_USUARIO}NNNNN con clave "{CLAVE_USUARIOS}"')
+        self.stdout.write(self.style.SUCCESS(f'Datos generados en {duracion:.1f} s'))
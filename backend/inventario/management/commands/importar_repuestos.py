@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from inventario.importacion import importar_repuestos, ErrorImportacion
+
+
+class Command(BaseCommand):
+    help = 'Importa un catálogo de repuestos desde un archivo CSV o XLSX (upsert por código de barras)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('ruta', help='Ruta del archivo .csv o .xlsx')
+
+    def handle(self, *args, **options):
+        ruta = options['ruta']
+        inicio = time.perf_counter()
+        try:
+            with open(ruta, 'rb') as archivo:
+                reporte = importar_repuestos(archivo, ruta)
+        except (OSError, ErrorImportacion) as e:
+            raise CommandError(str(e))
+        duracion = time.perf_counter() - inicio
+
+        self.stdout.write(f"Filas:        {reporte['total_filas']}")
+        self.stdout.write(f"Creados:      {reporte['creados']}")
+        self.stdout.write(f"Actualizados: {reporte['actualizados']}")
+        self.stdout.write(f"Rechazados:   {reporte['rechazados']}")
+        for error in reporte['errores'][:20]:
+            self.stdout.write(self.style.WARNING(f"  Línea {error['linea']}: {error['errores']}"))
+        self.stdout.write(self.style.SUCCESS(f'Importación terminada en {duracion:.1f} s'))
@@ -0,0 +1,303 @@
+import http.client
+import json
+import math
+import random
+import threading
+import time
+from urllib.parse import urlencode, urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+# Peso de cada escenario en la mezcla de peticiones
+ESCENARIOS = {
+    'repuestos-lista': 25,
+    'movimientos-lista': 20,
+    'alertas-lista': 10,
+    'estadisticas': 15,
+    'entrada-repuestos': 20,
+    'ajustar-stock': 10,
+}
+
+# Páginas del catálogo de las que se toman los repuestos sobre los que se escribe
+PAGINAS_REPUESTOS = 5
+
+
+def percentil(ordenados, p):
+    """Percentil por rango más cercano de una lista ordenada"""
+    if not ordenados:
+        return None
+    return ordenados[max(0, math.ceil(p / 100 * len(ordenados)) - 1)]
+
+
+def resumir(latencias, errores, duracion):
+    ordenadas = sorted(latencias)
+    total = len(ordenadas)
+
+    def ms(valor):
+        return round(valor * 1000, 2) if valor is not None else None
+
+    return {
+        'peticiones': total,
+        'errores': errores,
+        'throughput': round(total / duracion, 2) if duracion else None,
+        'media_ms': ms(sum(ordenadas) / total) if total else None,
+        'p50_ms': ms(percentil(ordenadas, 50)),
+        'p95_ms': ms(percentil(ordenadas, 95)),
+        'p99_ms': ms(percentil(ordenadas, 99)),
+    }
+
+
+class Cliente:
+    """Conexión HTTP keep-alive de un worker, autenticada con token"""
+
+    def __init__(self, url, token=None, timeout=30):
+        partes = urlsplit(url)
+        clase = http.client.HTTPSConnection if partes.scheme == 'https' else http.client.HTTPConnection
+        self.conexion = clase(partes.netloc, timeout=timeout)
+        self.prefijo = partes.path.rstrip('/')
+        self.token = token
+
+    def pedir(self, metodo, ruta, cuerpo=None):
+        """Retorna (status, datos JSON o None)"""
+        cabeceras = {'Accept': 'application/json'}
+        if self.token:
+            cabeceras['Authorization'] = f'Token {self.token}'
+        contenido = None
+        if cuerpo is not None:
+            contenido = json.dumps(cuerpo)
+            cabeceras['Content-Type'] = 'application/json'
+        try:
+            self.conexion.request(metodo, self.prefijo + ruta, body=contenido, headers=cabeceras)
+            respuesta = self.conexion.getresponse()
+            datos = respuesta.read()
+        except (http.client.HTTPException, OSError):
+            # La próxima petición abre una conexión nueva
+            self.conexion.close()
+            raise
+        tipo = respuesta.getheader('Content-Type', '')
+        return respuesta.status, json.loads(datos) if datos and 'json' in tipo else None
+
+    def cerrar(self):
+        self.conexion.close()
+
+
+class Command(BaseCommand):
+    help = (
+        'Prueba de carga reproducible contra un servidor en ejecución: mezcla de '
+        'listados, estadísticas, entrada_repuestos y ajustar_stock con concurrencia '
+        'configurable. Reporta throughput y p50/p95/p99 por escenario en JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://localhost:8000', help='URL base del servidor')
+        parser.add_argument('--token', help='Token de autenticación')
+        parser.add_argument('--usuario', help='Usuario para obtener un token (ajustar-stock requiere supervisor)')
+        parser.add_argument('--clave')
+        parser.add_argument('--concurrencia', type=int, default=8, help='Workers en paralelo')
+        parser.add_argument('--duracion', type=float, default=30, help='Segundos de medición')
+        parser.add_argument('--calentamiento', type=float, default=3, help='Segundos previos sin medir')
+        parser.add_argument(
+            '--escenarios', default=','.join(ESCENARIOS),
+            help=f'Escenarios separados por coma ({", ".join(ESCENARIOS)})'
+        )
+        parser.add_argument('--semilla', type=int, default=0, help='Misma semilla, misma secuencia de peticiones')
+        parser.add_argument('--etiqueta', default='', help='Texto libre guardado en el reporte (p. ej. el commit)')
+        parser.add_argument('--salida', help='Archivo JSON donde guardar el reporte')
+        parser.add_argument('--comparar', help='Reporte JSON anterior con el que comparar')
+
+    def handle(self, *args, **options):
+        escenarios = [nombre.strip() for nombre in options['escenarios'].split(',') if nombre.strip()]
+        desconocidos = [nombre for nombre in escenarios if nombre not in ESCENARIOS]
+        if desconocidos or not escenarios:
+            raise CommandError(f'Escenarios desconocidos: {", ".join(desconocidos) or "(ninguno)"}')
+        if options['concurrencia'] < 1 or options['duracion'] <= 0:
+            raise CommandError('--concurrencia y --duracion deben ser positivos')
+
+        token = options['token'] or self._login(options)
+        contexto = self._preparar(options['url'], token)
+
+        resultados = {nombre: {'latencias': [], 'errores': 0} for nombre in escenarios}
+        lock = threading.Lock()
+        calentamiento = options['calentamiento']
+        inicio_medicion = time.monotonic() + calentamiento
+        fin = inicio_medicion + options['duracion']
+        pesos = [ESCENARIOS[nombre] for nombre in escenarios]
+
+        def worker(numero):
+            rng = random.Random(f"{options['semilla']}-{numero}")
+            cliente = Cliente(options['url'], token)
+            locales = {nombre: {'latencias': [], 'errores': 0} for nombre in escenarios}
+            try:
+                while True:
+                    ahora = time.monotonic()
+                    if ahora >= fin:
+                        break
+                    nombre = rng.choices(escenarios, weights=pesos)[0]
+                    metodo, ruta, cuerpo = getattr(self, 'peticion_' + nombre.replace('-', '_'))(rng, contexto)
+                    inicio = time.perf_counter()
+                    try:
+                        status, _ = cliente.pedir(metodo, ruta, cuerpo)
+                        error = status >= 400
+                    except (http.client.HTTPException, OSError):
+                        error = True
+                    duracion = time.perf_counter() - inicio
+                    if ahora < inicio_medicion:
+                        continue
+                    locales[nombre]['latencias'].append(duracion)
+                    locales[nombre]['errores'] += error
+            finally:
+                cliente.cerrar()
+                with lock:
+                    for nombre, datos in locales.items():
+                        resultados[nombre]['latencias'] += datos['latencias']
+                        resultados[nombre]['errores'] += datos['errores']
+
+        self.stdout.write(
+            f"{options['concurrencia']} workers, {options['duracion']:g} s "
+            f"(+{calentamiento:g} s de calentamiento) contra {options['url']}"
+        )
+        hilos = [threading.Thread(target=worker, args=(n,)) for n in range(options['concurrencia'])]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        duracion = options['duracion']
+
+        reporte = {
+            'fecha': timezone.now().isoformat(),
+            'etiqueta': options['etiqueta'],
+            'configuracion': {
+                'url': options['url'],
+                'concurrencia': options['concurrencia'],
+                'duracion': duracion,
+                'semilla': options['semilla'],
+                'escenarios': {nombre: ESCENARIOS[nombre] for nombre in escenarios},
+            },
+            'total': resumir(
+                [latencia for datos in resultados.values() for latencia in datos['latencias']],
+                sum(datos['errores'] for datos in resultados.values()),
+                duracion,
+            ),
+            'escenarios': {
+                nombre: resumir(datos['latencias'], datos['errores'], duracion)
+                for nombre, datos in resultados.items()
+            },
+        }
+
+        self._imprimir(reporte)
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                json.dump(reporte, archivo, indent=2, sort_keys=True, ensure_ascii=False)
+                archivo.write('\n')
+            self.stdout.write(f"Reporte guardado en {options['salida']}")
+        if options['comparar']:
+            self._comparar(reporte, options['comparar'])
+
+    # Peticiones de cada escenario: (método, ruta, cuerpo)
+
+    def peticion_repuestos_lista(self, rng, contexto):
+        return 'GET', '/api/inventario/repuestos/?' + urlencode({'page': rng.randint(1, contexto['paginas'])}), None
+
+    def peticion_movimientos_lista(self, rng, contexto):
+        return 'GET', '/api/inventario/movimientos/?paginacion=cursor', None
+
+    def peticion_alertas_lista(self, rng, contexto):
+        return 'GET', '/api/inventario/alertas/?estado=PENDIENTE', None
+
+    def peticion_estadisticas(self, rng, contexto):
+        return 'GET', '/api/inventario/repuestos/estadisticas/', None
+
+    def peticion_entrada_repuestos(self, rng, contexto):
+        return 'POST', '/api/inventario/movimientos/entrada_repuestos/', {
+            'repuesto_id': rng.choice(contexto['repuestos']),
+            'cantidad': rng.randint(1, 20),
+            'proveedor': 'Prueba de carga',
+        }
+
+    def peticion_ajustar_stock(self, rng, contexto):
+        repuesto_id = rng.choice(contexto['repuestos'])
+        return 'POST', f'/api/inventario/repuestos/{repuesto_id}/ajustar_stock/', {
+            'cantidad': 1,
+            'tipo_ajuste': rng.choice(('POSITIVO', 'NEGATIVO')),
+            'observaciones': 'Prueba de carga',
+        }
+
+    def _login(self, options):
+        if not options['usuario'] or not options['clave']:
+            raise CommandError('Indique --token o --usuario y --clave')
+        cliente = Cliente(options['url'])
+        try:
+            status, datos = cliente.pedir('POST', '/api/auth/login/', {
+                'username': options['usuario'], 'password': options['clave'],
+            })
+        except (http.client.HTTPException, OSError) as e:
+            raise CommandError(f"No se pudo conectar con {options['url']}: {e}")
+        finally:
+            cliente.cerrar()
+        if status != 200 or not datos or 'token' not in datos:
+            raise CommandError(f'Login fallido ({status}): {datos}')
+        return datos['token']
+
+    def _preparar(self, url, token):
+        """Total de páginas del catálogo e ids de repuestos para las escrituras"""
+        cliente = Cliente(url, token)
+        repuestos, total, tamano_pagina = [], 0, 1
+        try:
+            for pagina in range(1, PAGINAS_REPUESTOS + 1):
+                status, datos = cliente.pedir(
+                    'GET', '/api/inventario/repuestos/?' + urlencode({'page': pagina, 'fields': 'id'})
+                )
+                if status != 200:
+                    break
+                total = datos['count']
+                tamano_pagina = max(tamano_pagina, len(datos['results']))
+                repuestos += [repuesto['id'] for repuesto in datos['results']]
+                if not datos['next']:
+                    break
+        except (http.client.HTTPException, OSError) as e:
+            raise CommandError(f'No se pudo conectar con {url}: {e}')
+        finally:
+            cliente.cerrar()
+        if not repuestos:
+            raise CommandError('No hay repuestos; genere datos con generar_datos_sinteticos')
+        return {'repuestos': repuestos, 'paginas': max(1, math.ceil(total / tamano_pagina))}
+
+    def _imprimir(self, reporte):
+        self.stdout.write(f"{'escenario':<20}{'peticiones':>11}{'errores':>9}{'req/s':>9}"
+                          f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+        filas = list(reporte['escenarios'].items()) + [('total', reporte['total'])]
+        for nombre, datos in filas:
+            self.stdout.write(
+                f"{nombre:<20}{datos['peticiones']:>11}{datos['errores']:>9}{datos['throughput'] or 0:>9.1f}"
+                + ''.join(f"{datos[clave] if datos[clave] is not None else '-':>9}"
+                          for clave in ('p50_ms', 'p95_ms', 'p99_ms'))
+            )
+
+    def _comparar(self, reporte, ruta):
+        try:
+            with open(ruta, encoding='utf-8') as archivo:
+                anterior = json.load(archivo)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'No se pudo leer {ruta}: {e}')
+
+        def variacion(nuevo, viejo):
+            if not nuevo or not viejo:
+                return '-'
+            return f'{(nuevo - viejo) / viejo * 100:+.1f}%'
+
+        self.stdout.write(f"Comparación con {ruta} ({anterior.get('etiqueta') or anterior.get('fecha')}):")
+        # Misma carga contra otro servidor sí es comparable
+        anterior_config = dict(anterior.get('configuracion', {}), url=None)
+        if anterior_config != dict(reporte['configuracion'], url=None):
+            self.stdout.write(self.style.WARNING('La configuración difiere: la comparación no es directa'))
+        filas = list(reporte['escenarios'].items()) + [('total', reporte['total'])]
+        for nombre, datos in filas:
+            viejo = anterior['total'] if nombre == 'total' else anterior.get('escenarios', {}).get(nombre)
+            if not viejo:
+                continue
+            self.stdout.write(
+                f"{nombre:<20} req/s {variacion(datos['throughput'], viejo['throughput']):>8}"
+                f"   p95 {variacion(datos['p95_ms'], viejo['p95_ms']):>8}"
+                f"   p99 {variacion(datos['p99_ms'], viejo['p99_ms']):>8}"
+            )
@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+from inventario.snapshots import tomar_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        'Guarda un snapshot del stock y costo de todos los repuestos. '
+        'Programarlo periódicamente (p. ej. diario y al cierre de mes) con cron'
+    )
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        snapshot = tomar_snapshot()
+        duracion = time.perf_counter() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f'{snapshot}: {snapshot.total_repuestos} repuestos, '
+            f'valor total {snapshot.valor_total} ({duracion:.2f} s)'
+        ))
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0003_alter_repuesto_codigo_barras'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='movimientoinventario',
+            name='inventario__repuest_6cd7a7_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='movimientoinventario',
+            name='inventario__tipo_mo_89d562_idx',
+        ),
+        migrations.AddIndex(
+            model_name='movimientoinventario',
+            index=models.Index(fields=['-fecha_movimiento', 'id'], name='inventario__fecha_m_41dba4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movimientoinventario',
+            index=models.Index(fields=['repuesto', '-fecha_movimiento', 'id'], name='inventario__repuest_51bb97_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movimientoinventario',
+            index=models.Index(fields=['tipo_movimiento', '-fecha_movimiento', 'id'], name='inventario__tipo_mo_42f3c5_idx'),
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:51
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+# Solo PostgreSQL: trigger que mantiene search_vector, índice GIN full-text e
+# índices trigram (pg_trgm) para búsqueda tolerante a errores de tipeo.
+# En otros motores (SQLite en tests) la búsqueda usa icontains.
+SQL_BUSQUEDA = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    CREATE OR REPLACE FUNCTION inventario_repuesto_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('spanish', coalesce(NEW.nombre, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(NEW.codigo_barras, '')), 'A') ||
+            setweight(to_tsvector('spanish', coalesce(NEW.marca, '') || ' ' || coalesce(NEW.modelo, '')), 'B') ||
+            setweight(to_tsvector('spanish', coalesce(NEW.descripcion, '')), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    # Solo se recalcula cuando cambian columnas de texto, no con cada movimiento de stock
+    """
+    CREATE TRIGGER inventario_repuesto_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF nombre, codigo_barras, marca, modelo, descripcion
+    ON inventario_repuesto
+    FOR EACH ROW EXECUTE FUNCTION inventario_repuesto_search_vector()
+    """,
+    "UPDATE inventario_repuesto SET nombre = nombre",
+    "CREATE INDEX inventario_repuesto_search_vector_idx ON inventario_repuesto USING gin (search_vector)",
+    "CREATE INDEX inventario_repuesto_nombre_trgm_idx ON inventario_repuesto USING gin (nombre gin_trgm_ops)",
+    "CREATE INDEX inventario_repuesto_marca_trgm_idx ON inventario_repuesto USING gin (marca gin_trgm_ops)",
+    "CREATE INDEX inventario_repuesto_modelo_trgm_idx ON inventario_repuesto USING gin (modelo gin_trgm_ops)",
+    "CREATE INDEX inventario_repuesto_codigo_barras_trgm_idx ON inventario_repuesto USING gin (codigo_barras gin_trgm_ops)",
+]
+
+SQL_BUSQUEDA_REVERSA = [
+    "DROP INDEX IF EXISTS inventario_repuesto_codigo_barras_trgm_idx",
+    "DROP INDEX IF EXISTS inventario_repuesto_modelo_trgm_idx",
+    "DROP INDEX IF EXISTS inventario_repuesto_marca_trgm_idx",
+    "DROP INDEX IF EXISTS inventario_repuesto_nombre_trgm_idx",
+    "DROP INDEX IF EXISTS inventario_repuesto_search_vector_idx",
+    "DROP TRIGGER IF EXISTS inventario_repuesto_search_vector_trigger ON inventario_repuesto",
+    "DROP FUNCTION IF EXISTS inventario_repuesto_search_vector()",
+]
+
+
+def crear_busqueda(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for sql in SQL_BUSQUEDA:
+        schema_editor.execute(sql)
+
+
+def eliminar_busqueda(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for sql in SQL_BUSQUEDA_REVERSA:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0004_remove_movimientoinventario_inventario__repuest_6cd7a7_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='repuesto',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(crear_busqueda, eliminar_busqueda),
+    ]
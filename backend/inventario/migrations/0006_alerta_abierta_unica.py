@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:58
+
+from django.db import migrations, models
+
+
+def ignorar_alertas_duplicadas(apps, schema_editor):
+    """
+    Deja abierta solo la alerta más reciente de cada repuesto; las demás
+    alertas abiertas pasan a IGNORADA para poder crear la restricción.
+    """
+    AlertaStock = apps.get_model('inventario', 'AlertaStock')
+    abiertas = AlertaStock.objects.filter(estado__in=['PENDIENTE', 'NOTIFICADA'])
+    mas_recientes = abiertas.filter(
+        repuesto=models.OuterRef('repuesto')
+    ).order_by('-fecha_creacion', '-id').values('id')[:1]
+    abiertas.exclude(
+        id=models.Subquery(mas_recientes)
+    ).update(estado='IGNORADA')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0005_busqueda_repuesto'),
+    ]
+
+    operations = [
+        migrations.RunPython(ignorar_alertas_duplicadas, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='alertastock',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='alertastock',
+            constraint=models.UniqueConstraint(condition=models.Q(('estado__in', ['PENDIENTE', 'NOTIFICADA'])), fields=('repuesto',), name='alerta_abierta_unica_por_repuesto'),
+        ),
+    ]
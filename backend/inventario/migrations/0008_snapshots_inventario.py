@@ -0,0 +1,48 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:00
+
+from decimal import Decimal
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0007_notificacionalerta'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SnapshotInventario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha_corte', models.DateTimeField(unique=True)),
+                ('total_repuestos', models.PositiveIntegerField(default=0)),
+                ('valor_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=16)),
+                ('creado_en', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Snapshot de Inventario',
+                'verbose_name_plural': 'Snapshots de Inventario',
+                'ordering': ['-fecha_corte'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SnapshotRepuesto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stock', models.PositiveIntegerField()),
+                ('costo_unitario', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('repuesto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='inventario.repuesto')),
+                ('snapshot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='detalles', to='inventario.snapshotinventario')),
+            ],
+            options={
+                'verbose_name': 'Detalle de Snapshot',
+                'verbose_name_plural': 'Detalles de Snapshot',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='snapshotrepuesto',
+            constraint=models.UniqueConstraint(fields=('snapshot', 'repuesto'), name='snapshot_repuesto_unico'),
+        ),
+    ]
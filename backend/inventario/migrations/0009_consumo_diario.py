@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:02
+
+from decimal import Decimal
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0008_snapshots_inventario'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConsumoDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(help_text='Día local (TIME_ZONE) de los movimientos')),
+                ('tipo_movimiento', models.CharField(choices=[('ENTRADA', 'Entrada de Stock'), ('SALIDA_USO', 'Salida por Uso en OT'), ('SALIDA_SOLICITUD', 'Salida por Solicitud'), ('AJUSTE_POSITIVO', 'Ajuste Positivo'), ('AJUSTE_NEGATIVO', 'Ajuste Negativo'), ('BAJA_POR_DANHO', 'Baja por Daño/Defecto'), ('COMPRA_EXTERNA_USO_DIRECTO', 'Compra Externa para Uso Directo'), ('DEVOLUCION', 'Devolución a Stock')], max_length=30)),
+                ('cantidad', models.BigIntegerField(default=0)),
+                ('valor', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=16)),
+                ('movimientos', models.PositiveIntegerField(default=0)),
+                ('repuesto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='consumo_diario', to='inventario.repuesto')),
+            ],
+            options={
+                'verbose_name': 'Consumo Diario',
+                'verbose_name_plural': 'Consumos Diarios',
+                'ordering': ['-fecha'],
+                'indexes': [models.Index(fields=['fecha', 'tipo_movimiento'], name='inventario__fecha_2cbb0b_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='consumodiario',
+            constraint=models.UniqueConstraint(fields=('repuesto', 'fecha', 'tipo_movimiento'), name='consumo_diario_unico'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:04
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('inventario', '0009_consumo_diario'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SugerenciaStockMinimo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stock_minimo_actual', models.PositiveIntegerField(help_text='Stock mínimo configurado al momento del cálculo')),
+                ('stock_minimo_sugerido', models.PositiveIntegerField(help_text='Punto de reorden: demanda durante el lead time más stock de seguridad')),
+                ('stock_seguridad', models.PositiveIntegerField()),
+                ('demanda_diaria', models.DecimalField(decimal_places=4, max_digits=12)),
+                ('desviacion_diaria', models.DecimalField(decimal_places=4, max_digits=12)),
+                ('dias_historia', models.PositiveIntegerField()),
+                ('lead_time_dias', models.PositiveIntegerField()),
+                ('nivel_servicio', models.DecimalField(decimal_places=4, max_digits=5)),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('APROBADA', 'Aprobada'), ('RECHAZADA', 'Rechazada')], default='PENDIENTE', max_length=20)),
+                ('fecha_calculo', models.DateTimeField(auto_now_add=True)),
+                ('fecha_resolucion', models.DateTimeField(blank=True, null=True)),
+                ('repuesto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sugerencias_stock_minimo', to='inventario.repuesto')),
+                ('resuelta_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Sugerencia de Stock Mínimo',
+                'verbose_name_plural': 'Sugerencias de Stock Mínimo',
+                'ordering': ['-fecha_calculo', 'id'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='sugerenciastockminimo',
+            constraint=models.UniqueConstraint(condition=models.Q(('estado', 'PENDIENTE')), fields=('repuesto',), name='sugerencia_pendiente_unica_por_repuesto'),
+        ),
+    ]
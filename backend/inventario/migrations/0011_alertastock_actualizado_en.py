@@ -0,0 +1,26 @@
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def inicializar_actualizado_en(apps, schema_editor):
+    """Las alertas existentes toman su último cambio de estado conocido"""
+    AlertaStock = apps.get_model('inventario', 'AlertaStock')
+    AlertaStock.objects.update(
+        actualizado_en=Coalesce('fecha_resolucion', 'fecha_notificacion', 'fecha_creacion')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0010_sugerencia_stock_minimo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='alertastock',
+            name='actualizado_en',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(inicializar_actualizado_en, migrations.RunPython.noop),
+    ]
@@ -1,10 +1,107 @@
-from django.db import models
+from django.db import models, connection, transaction
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator
+from django.utils import timezone
 from decimal import Decimal
 
 User = get_user_model()
 
+
+class RepuestoManager(models.Manager):
+
+    def get_queryset(self):
+        # search_vector solo se usa dentro de las consultas de búsqueda
+        return super().get_queryset().defer('search_vector')
+
+    def aplicar_movimiento(self, repuesto_id, tipo_movimiento, cantidad):
+        """
+        Aplica el efecto de un movimiento sobre el stock con un único UPDATE
+        condicional sobre la fila, sin leer el stock previamente en Python.
+        Retorna la tupla (stock_anterior, stock_posterior, actualizado_en),
+        donde actualizado_en es el timestamp escrito en el repuesto (None si
+        el movimiento no lo modificó).
+        """
+        ahora = timezone.now()
+        if tipo_movimiento in MovimientoInventario.TIPOS_ENTRADA:
+            posterior = self._actualizar_stock(
+                'stock_actual + %s', [cantidad], repuesto_id, ahora
+            )
+            if posterior is not None:
+                return posterior - cantidad, posterior, ahora
+
+        elif tipo_movimiento in MovimientoInventario.TIPOS_SALIDA:
+            # Camino rápido: solo descuenta si alcanza el stock
+            posterior = self._actualizar_stock(
+                'stock_actual - %s', [cantidad], repuesto_id, ahora,
+                condicion='stock_actual >= %s', condicion_params=[cantidad]
+            )
+            if posterior is not None:
+                return posterior + cantidad, posterior, ahora
+
+        else:  # COMPRA_EXTERNA_USO_DIRECTO no afecta stock
+            stock = self.filter(pk=repuesto_id).values_list('stock_actual', flat=True).get()
+            return stock, stock, None
+
+        # Stock insuficiente (se deja en 0) o base de datos sin RETURNING
+        anterior, posterior = self._aplicar_movimiento_bloqueando(repuesto_id, tipo_movimiento, cantidad, ahora)
+        return anterior, posterior, ahora
+
+    @staticmethod
+    def soporta_update_returning():
+        """
+        True si el motor acepta UPDATE ... RETURNING: PostgreSQL y SQLite
+        3.35+ (la misma versión que agregó INSERT ... RETURNING). Otros motores,
+        como MariaDB, solo lo aceptan en INSERT.
+        """
+        return connection.vendor == 'postgresql' or (
+            connection.vendor == 'sqlite' and connection.features.can_return_columns_from_insert
+        )
+
+    def _actualizar_stock(self, expresion, params, repuesto_id, ahora, condicion=None, condicion_params=()):
+        """
+        Ejecuta UPDATE ... RETURNING stock_actual. Retorna el nuevo stock,
+        o None si ninguna fila cumplió la condición o el motor no soporta RETURNING.
+        """
+        if not self.soporta_update_returning():
+            return None
+
+        qn = connection.ops.quote_name
+        sql = (
+            f'UPDATE {qn(self.model._meta.db_table)} '
+            f'SET {qn("stock_actual")} = {expresion}, {qn("actualizado_en")} = %s '
+            f'WHERE {qn("id")} = %s'
+        )
+        sql_params = [*params, ahora, repuesto_id]
+        if condicion:
+            sql += f' AND {condicion}'
+            sql_params += condicion_params
+        sql += f' RETURNING {qn("stock_actual")}'
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, sql_params)
+            fila = cursor.fetchone()
+
+        if fila is None and not condicion:
+            raise self.model.DoesNotExist('Repuesto no encontrado')
+        return fila[0] if fila else None
+
+    def _aplicar_movimiento_bloqueando(self, repuesto_id, tipo_movimiento, cantidad, ahora):
+        """Camino lento: bloquea solo la fila del repuesto (SELECT ... FOR UPDATE)"""
+        with transaction.atomic():
+            anterior = self.select_for_update().filter(
+                pk=repuesto_id
+            ).values_list('stock_actual', flat=True).get()
+            posterior = MovimientoInventario.calcular_stock_posterior(
+                tipo_movimiento, anterior, cantidad
+            )
+            self.filter(pk=repuesto_id).update(
+                stock_actual=posterior,
+                actualizado_en=ahora
+            )
+        return anterior, posterior
+
+
 class Repuesto(models.Model):
     """
     Modelo para el catálogo de repuestos e insumos
@@ -71,6 +168,12 @@ class Repuesto(models.Model):
         related_name='repuestos_creados'
     )
 
+    # Vector de búsqueda full-text; en PostgreSQL lo mantiene un trigger
+    # (ver migración 0005) y en otros motores queda vacío
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = RepuestoManager()
+
     class Meta:
         verbose_name = "Repuesto"
         verbose_name_plural = "Repuestos"
@@ -117,6 +220,14 @@ class MovimientoInventario(models.Model):
         ('DEVOLUCION', 'Devolución a Stock'),
     ]
 
+    # Efecto de cada tipo de movimiento sobre el stock
+    TIPOS_ENTRADA = ['ENTRADA', 'AJUSTE_POSITIVO', 'DEVOLUCION']
+    TIPOS_SALIDA = ['SALIDA_USO', 'SALIDA_SOLICITUD', 'AJUSTE_NEGATIVO', 'BAJA_POR_DANHO']
+    # Campos que definen el aporte del movimiento a ConsumoDiario
+    CAMPOS_CONSUMO = frozenset([
+        'repuesto', 'repuesto_id', 'fecha_movimiento', 'tipo_movimiento', 'cantidad', 'costo_unitario'
+    ])
+
     # Relaciones
     repuesto = models.ForeignKey(
         Repuesto, 
@@ -196,8 +307,11 @@ class MovimientoInventario(models.Model):
         verbose_name_plural = "Movimientos de Inventario"
         ordering = ['-fecha_movimiento']
         indexes = [
-            models.Index(fields=['repuesto', '-fecha_movimiento']),
-            models.Index(fields=['tipo_movimiento']),
+            # Índices alineados con el orden (-fecha_movimiento, id) de la
+            # paginación por cursor, sin filtro y con los filtros habituales
+            models.Index(fields=['-fecha_movimiento', 'id']),
+            models.Index(fields=['repuesto', '-fecha_movimiento', 'id']),
+            models.Index(fields=['tipo_movimiento', '-fecha_movimiento', 'id']),
             models.Index(fields=['registrado_por']),
         ]
 
@@ -211,28 +325,54 @@ class MovimientoInventario(models.Model):
             return self.cantidad * self.costo_unitario
         return Decimal('0.00')
 
+    @classmethod
+    def calcular_stock_posterior(cls, tipo_movimiento, stock_anterior, cantidad):
+        """Calcula el stock resultante de aplicar un movimiento"""
+        if tipo_movimiento in cls.TIPOS_ENTRADA:
+            return stock_anterior + cantidad
+        if tipo_movimiento in cls.TIPOS_SALIDA:
+            return max(0, stock_anterior - cantidad)
+        # COMPRA_EXTERNA_USO_DIRECTO no afecta stock
+        return stock_anterior
+
     def save(self, *args, **kwargs):
         """
         Override save para actualizar stock automáticamente
         """
         if not self.pk:  # Solo en creación, no en edición
-            # Guardar stock anterior
-            self.stock_anterior = self.repuesto.stock_actual
-            
-            # Calcular nuevo stock según tipo de movimiento
-            if self.tipo_movimiento in ['ENTRADA', 'AJUSTE_POSITIVO', 'DEVOLUCION']:
-                nuevo_stock = self.repuesto.stock_actual + self.cantidad
-            elif self.tipo_movimiento in ['SALIDA_USO', 'SALIDA_SOLICITUD', 'AJUSTE_NEGATIVO', 'BAJA_POR_DANHO']:
-                nuevo_stock = max(0, self.repuesto.stock_actual - self.cantidad)
-            else:  # COMPRA_EXTERNA_USO_DIRECTO no afecta stock
-                nuevo_stock = self.repuesto.stock_actual
-            
-            # Actualizar stock en el repuesto
-            self.stock_posterior = nuevo_stock
-            self.repuesto.stock_actual = nuevo_stock
-            self.repuesto.save()
-            
-        super().save(*args, **kwargs)
+            with transaction.atomic():
+                # Actualizar stock en la base de datos de forma atómica; el
+                # stock anterior y posterior salen del valor retornado
+                self.stock_anterior, self.stock_posterior, actualizado_en = Repuesto.objects.aplicar_movimiento(
+                    self.repuesto_id, self.tipo_movimiento, self.cantidad
+                )
+                if MovimientoInventario.repuesto.is_cached(self):
+                    # El repuesto en memoria queda igual a la fila (ETag incluido)
+                    self.repuesto.stock_actual = self.stock_posterior
+                    if actualizado_en is not None:
+                        self.repuesto.actualizado_en = actualizado_en
+                super().save(*args, **kwargs)
+                ConsumoDiario.objects.registrar([self])
+            return
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and not self.CAMPOS_CONSUMO.intersection(update_fields):
+            super().save(*args, **kwargs)
+            return
+
+        # Una edición que cambia repuesto, día, tipo, cantidad o costo mueve
+        # el movimiento de fila diaria: se descuenta el original y se suma
+        # el editado en la misma transacción
+        with transaction.atomic():
+            original = MovimientoInventario.objects.select_for_update().filter(pk=self.pk).only(
+                'repuesto_id', 'fecha_movimiento', 'tipo_movimiento', 'cantidad', 'costo_unitario'
+            ).first()
+            super().save(*args, **kwargs)
+            if original is None:
+                ConsumoDiario.objects.registrar([self])
+            elif ConsumoDiario.objects.totales([original]) != ConsumoDiario.objects.totales([self]):
+                ConsumoDiario.objects.descontar([original])
+                ConsumoDiario.objects.registrar([self])
 
 
 class AlertaStock(models.Model):
@@ -247,6 +387,9 @@ class AlertaStock(models.Model):
         ('IGNORADA', 'Ignorada'),
     ]
 
+    # Estados en que la alerta sigue abierta (como máximo una por repuesto)
+    ESTADOS_ABIERTOS = ['PENDIENTE', 'NOTIFICADA']
+
     repuesto = models.ForeignKey(
         Repuesto, 
         on_delete=models.CASCADE, 
@@ -267,6 +410,7 @@ class AlertaStock(models.Model):
     fecha_creacion = models.DateTimeField(auto_now_add=True)
     fecha_notificacion = models.DateTimeField(blank=True, null=True)
     fecha_resolucion = models.DateTimeField(blank=True, null=True)
+    actualizado_en = models.DateTimeField(auto_now=True)
     
     resuelta_por = models.ForeignKey(
         User, 
@@ -280,7 +424,262 @@ class AlertaStock(models.Model):
         verbose_name = "Alerta de Stock"
         verbose_name_plural = "Alertas de Stock"
         ordering = ['-fecha_creacion']
-        unique_together = ['repuesto', 'fecha_creacion']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['repuesto'],
+                condition=models.Q(estado__in=['PENDIENTE', 'NOTIFICADA']),
+                name='alerta_abierta_unica_por_repuesto',
+            ),
+        ]
+
+    def __str__(self):
+        return f"Alerta: {self.repuesto.nombre} - Stock: {self.stock_actual}"
+
+class NotificacionAlerta(models.Model):
+    """
+    Outbox de notificaciones de alertas de stock: se escribe en la misma
+    transacción que la alerta y la despacha `manage.py despachar_notificaciones`
+    fuera del camino de escritura de movimientos.
+    """
+
+    ESTADOS_NOTIFICACION = [
+        ('PENDIENTE', 'Pendiente'),
+        ('ENVIADA', 'Enviada'),
+        ('FALLIDA', 'Fallida'),
+        ('DESCARTADA', 'Descartada'),
+    ]
+
+    alerta = models.ForeignKey(
+        AlertaStock,
+        on_delete=models.CASCADE,
+        related_name='notificaciones'
+    )
+    destinatario = models.EmailField()
+    estado = models.CharField(
+        max_length=20,
+        choices=ESTADOS_NOTIFICACION,
+        default='PENDIENTE'
+    )
+    intentos = models.PositiveIntegerField(default=0)
+    proximo_intento = models.DateTimeField(default=timezone.now)
+    ultimo_error = models.TextField(blank=True)
+
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_envio = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        verbose_name = "Notificación de Alerta"
+        verbose_name_plural = "Notificaciones de Alertas"
+        ordering = ['id']
+        indexes = [
+            # Cola del despachador: pendientes cuyo próximo intento ya venció
+            models.Index(fields=['estado', 'proximo_intento']),
+        ]
+
+    def __str__(self):
+        return f"{self.destinatario} - {self.alerta_id} ({self.estado})"
+
+
+class SnapshotInventario(models.Model):
+    """
+    Foto periódica del stock y costo de todos los repuestos
+    (ver manage.py tomar_snapshot_inventario). Las consultas de stock a una
+    fecha parten del snapshot anterior más cercano.
+    """
+    fecha_corte = models.DateTimeField(unique=True)
+    total_repuestos = models.PositiveIntegerField(default=0)
+    valor_total = models.DecimalField(max_digits=16, decimal_places=2, default=Decimal('0.00'))
+    creado_en = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Snapshot de Inventario"
+        verbose_name_plural = "Snapshots de Inventario"
+        ordering = ['-fecha_corte']
+
+    def __str__(self):
+        return f"Snapshot {self.fecha_corte:%Y-%m-%d %H:%M}"
+
+
+class SnapshotRepuesto(models.Model):
+    """Stock y costo de un repuesto en un snapshot"""
+    snapshot = models.ForeignKey(
+        SnapshotInventario,
+        on_delete=models.CASCADE,
+        related_name='detalles'
+    )
+    repuesto = models.ForeignKey(
+        Repuesto,
+        on_delete=models.CASCADE,
+        related_name='snapshots'
+    )
+    stock = models.PositiveIntegerField()
+    costo_unitario = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
+
+    class Meta:
+        verbose_name = "Detalle de Snapshot"
+        verbose_name_plural = "Detalles de Snapshot"
+        constraints = [
+            models.UniqueConstraint(fields=['snapshot', 'repuesto'], name='snapshot_repuesto_unico'),
+        ]
+
+    def __str__(self):
+        return f"{self.snapshot} - {self.repuesto_id}: {self.stock}"
+
+
+class ConsumoDiarioManager(models.Manager):
+
+    def totales(self, movimientos):
+        """(repuesto_id, fecha local, tipo) -> [cantidad, valor, movimientos]"""
+        totales = {}
+        for movimiento in movimientos:
+            clave = (
+                movimiento.repuesto_id,
+                timezone.localdate(movimiento.fecha_movimiento),
+                movimiento.tipo_movimiento,
+            )
+            total = totales.setdefault(clave, [0, Decimal('0.00'), 0])
+            total[0] += movimiento.cantidad
+            if movimiento.costo_unitario is not None:
+                total[1] += movimiento.cantidad * Decimal(str(movimiento.costo_unitario))
+            total[2] += 1
+        # Orden fijo para que escrituras concurrentes tomen los locks igual
+        return sorted(totales.items())
+
+    def registrar(self, movimientos):
+        """
+        Suma movimientos recién creados a sus filas diarias con un único
+        INSERT ... ON CONFLICT DO UPDATE (PostgreSQL y SQLite).
+        """
+        totales = self.totales(movimientos)
+        if not totales:
+            return
+        tabla = connection.ops.quote_name(self.model._meta.db_table)
+        valores = ', '.join(['(%s, %s, %s, %s, %s, %s)'] * len(totales))
+        params = []
+        for (repuesto_id, fecha, tipo), (cantidad, valor, cuenta) in totales:
+            params += [repuesto_id, fecha, tipo, cantidad, valor, cuenta]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {tabla} "
+                f"(repuesto_id, fecha, tipo_movimiento, cantidad, valor, movimientos) "
+                f"VALUES {valores} "
+                f"ON CONFLICT (repuesto_id, fecha, tipo_movimiento) DO UPDATE SET "
+                f"cantidad = {tabla}.cantidad + EXCLUDED.cantidad, "
+                f"valor = {tabla}.valor + EXCLUDED.valor, "
+                f"movimientos = {tabla}.movimientos + EXCLUDED.movimientos",
+                params
+            )
+
+    def descontar(self, movimientos):
+        """
+        Resta movimientos eliminados. Solo actualiza filas existentes: si el
+        repuesto se está eliminando en cascada, su consumo ya no está.
+        """
+        for (repuesto_id, fecha, tipo), (cantidad, valor, cuenta) in self.totales(movimientos):
+            self.filter(
+                repuesto_id=repuesto_id, fecha=fecha, tipo_movimiento=tipo
+            ).update(
+                cantidad=models.F('cantidad') - cantidad,
+                valor=models.F('valor') - valor,
+                movimientos=models.F('movimientos') - cuenta,
+            )
+
+
+class ConsumoDiario(models.Model):
+    """
+    Totales diarios de movimientos por repuesto y tipo. Se mantiene en línea
+    con cada movimiento (ver ConsumoDiarioManager) y se puede reconstruir con
+    manage.py reconstruir_consumo_diario.
+    """
+    repuesto = models.ForeignKey(
+        Repuesto,
+        on_delete=models.CASCADE,
+        related_name='consumo_diario'
+    )
+    fecha = models.DateField(help_text="Día local (TIME_ZONE) de los movimientos")
+    tipo_movimiento = models.CharField(
+        max_length=30,
+        choices=MovimientoInventario.TIPOS_MOVIMIENTO
+    )
+    cantidad = models.BigIntegerField(default=0)
+    valor = models.DecimalField(max_digits=16, decimal_places=2, default=Decimal('0.00'))
+    movimientos = models.PositiveIntegerField(default=0)
+
+    objects = ConsumoDiarioManager()
+
+    class Meta:
+        verbose_name = "Consumo Diario"
+        verbose_name_plural = "Consumos Diarios"
+        ordering = ['-fecha']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['repuesto', 'fecha', 'tipo_movimiento'],
+                name='consumo_diario_unico'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['fecha', 'tipo_movimiento']),
+        ]
+
+    def __str__(self):
+        return f"{self.fecha} - {self.repuesto_id} {self.tipo_movimiento}: {self.cantidad}"
+
+
+class SugerenciaStockMinimo(models.Model):
+    """
+    Stock mínimo sugerido a partir del consumo histórico (ver
+    inventario/recomendacion.py). Solo se aplica al repuesto al aprobarla.
+    """
+
+    ESTADOS_SUGERENCIA = [
+        ('PENDIENTE', 'Pendiente'),
+        ('APROBADA', 'Aprobada'),
+        ('RECHAZADA', 'Rechazada'),
+    ]
+
+    repuesto = models.ForeignKey(
+        Repuesto,
+        on_delete=models.CASCADE,
+        related_name='sugerencias_stock_minimo'
+    )
+    stock_minimo_actual = models.PositiveIntegerField(
+        help_text="Stock mínimo configurado al momento del cálculo"
+    )
+    stock_minimo_sugerido = models.PositiveIntegerField(
+        help_text="Punto de reorden: demanda durante el lead time más stock de seguridad"
+    )
+    stock_seguridad = models.PositiveIntegerField()
+    demanda_diaria = models.DecimalField(max_digits=12, decimal_places=4)
+    desviacion_diaria = models.DecimalField(max_digits=12, decimal_places=4)
+    dias_historia = models.PositiveIntegerField()
+    lead_time_dias = models.PositiveIntegerField()
+    nivel_servicio = models.DecimalField(max_digits=5, decimal_places=4)
+
+    estado = models.CharField(
+        max_length=20,
+        choices=ESTADOS_SUGERENCIA,
+        default='PENDIENTE'
+    )
+    fecha_calculo = models.DateTimeField(auto_now_add=True)
+    fecha_resolucion = models.DateTimeField(blank=True, null=True)
+    resuelta_por = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True
+    )
+
+    class Meta:
+        verbose_name = "Sugerencia de Stock Mínimo"
+        verbose_name_plural = "Sugerencias de Stock Mínimo"
+        ordering = ['-fecha_calculo', 'id']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['repuesto'],
+                condition=models.Q(estado='PENDIENTE'),
+                name='sugerencia_pendiente_unica_por_repuesto',
+            ),
+        ]
 
     def __str__(self):
-        return f"Alerta: {self.repuesto.nombre} - Stock: {self.stock_actual}"
\ No newline at end of file
+        return f"{self.repuesto_id}: {self.stock_minimo_actual} -> {self.stock_minimo_sugerido} ({self.estado})"
@@ -0,0 +1,156 @@
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from usuarios.roles import SYSTEM_ROLES, CAPACIDADES_POR_ROL, GESTIONAR_REPUESTOS
+from .models import AlertaStock, NotificacionAlerta
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+# Espera máxima entre reintentos (segundos)
+BACKOFF_MAXIMO = 3600
+
+
+def destinatarios_alertas():
+    """Correos de los usuarios activos que gestionan repuestos"""
+    roles = [rol for rol, capacidades in CAPACIDADES_POR_ROL.items() if GESTIONAR_REPUESTOS in capacidades]
+    correos = User.objects.filter(
+        Q(is_superuser=True) |
+        Q(groups__name__in=[SYSTEM_ROLES[rol] for rol in roles]) |
+        Q(rol__in=roles),
+        is_active=True
+    ).exclude(email='').values_list('email', flat=True).distinct()
+    return sorted({correo.lower() for correo in correos})
+
+
+def encolar_notificaciones(alertas):
+    """
+    Escribe en el outbox una notificación por alerta y destinatario. Debe
+    llamarse dentro de la transacción que crea las alertas.
+    """
+    if not alertas:
+        return []
+    destinatarios = destinatarios_alertas()
+    notificaciones = [
+        NotificacionAlerta(alerta=alerta, destinatario=destinatario)
+        for alerta in alertas
+        for destinatario in destinatarios
+    ]
+    return NotificacionAlerta.objects.bulk_create(notificaciones)
+
+
+def calcular_backoff(intentos):
+    """Segundos de espera antes del siguiente intento (exponencial y acotado)"""
+    return min(settings.INVENTARIO_NOTIFICACIONES_BACKOFF * 2 ** (intentos - 1), BACKOFF_MAXIMO)
+
+
+def componer_resumen(destinatario, notificaciones):
+    """Un solo correo con todas las alertas pendientes del destinatario"""
+    lineas = [
+        'Los siguientes repuestos están en o bajo su stock mínimo:',
+        '',
+    ]
+    for notificacion in notificaciones:
+        alerta = notificacion.alerta
+        repuesto = alerta.repuesto
+        codigo = f' [{repuesto.codigo_barras}]' if repuesto.codigo_barras else ''
+        lineas.append(
+            f'- {repuesto.nombre}{codigo}: stock {alerta.stock_actual}, mínimo {alerta.stock_minimo}'
+        )
+    return EmailMessage(
+        subject=f'Alertas de stock bajo ({len(notificaciones)})',
+        body='\n'.join(lineas),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[destinatario],
+    )
+
+
+def despachar_notificaciones(tamano_lote=200):
+    """
+    Envía un lote de notificaciones pendientes agrupadas en un resumen por
+    destinatario. Las filas se toman con SELECT ... FOR UPDATE SKIP LOCKED,
+    de modo que varios despachadores pueden correr en paralelo.
+
+    Retorna un diccionario con los contadores del lote.
+    """
+    resumen = {'enviadas': 0, 'fallidas': 0, 'reintentos': 0, 'descartadas': 0, 'correos': 0}
+    ahora = timezone.now()
+
+    with transaction.atomic():
+        lote = list(
+            NotificacionAlerta.objects.select_for_update(skip_locked=True, of=('self',))
+            .select_related('alerta__repuesto')
+            .filter(estado='PENDIENTE', proximo_intento__lte=ahora)
+            .order_by('id')[:tamano_lote]
+        )
+        if not lote:
+            return resumen
+
+        # Alertas cerradas antes del envío: no se notifican
+        descartadas = [n for n in lote if n.alerta.estado not in AlertaStock.ESTADOS_ABIERTOS]
+        for notificacion in descartadas:
+            notificacion.estado = 'DESCARTADA'
+        resumen['descartadas'] = len(descartadas)
+
+        por_destinatario = defaultdict(list)
+        for notificacion in lote:
+            if notificacion.estado == 'PENDIENTE':
+                por_destinatario[notificacion.destinatario].append(notificacion)
+
+        alertas_notificadas = set()
+        conexion = get_connection()
+        error_conexion = None
+        try:
+            conexion.open()
+        except Exception as e:
+            error_conexion = e
+        try:
+            for destinatario, notificaciones in por_destinatario.items():
+                try:
+                    if error_conexion is not None:
+                        raise error_conexion
+                    conexion.send_messages([componer_resumen(destinatario, notificaciones)])
+                except Exception as e:
+                    for notificacion in notificaciones:
+                        notificacion.intentos += 1
+                        notificacion.ultimo_error = str(e)[:1000]
+                        if notificacion.intentos >= settings.INVENTARIO_NOTIFICACIONES_MAX_INTENTOS:
+                            notificacion.estado = 'FALLIDA'
+                            resumen['fallidas'] += 1
+                        else:
+                            notificacion.proximo_intento = ahora + timedelta(
+                                seconds=calcular_backoff(notificacion.intentos)
+                            )
+                            resumen['reintentos'] += 1
+                    logger.warning('No se pudo notificar a %s: %s', destinatario, e)
+                    continue
+
+                resumen['correos'] += 1
+                for notificacion in notificaciones:
+                    notificacion.intentos += 1
+                    notificacion.estado = 'ENVIADA'
+                    notificacion.fecha_envio = timezone.now()
+                    notificacion.ultimo_error = ''
+                    alertas_notificadas.add(notificacion.alerta_id)
+                resumen['enviadas'] += len(notificaciones)
+        finally:
+            conexion.close()
+
+        NotificacionAlerta.objects.bulk_update(
+            lote, ['estado', 'intentos', 'proximo_intento', 'ultimo_error', 'fecha_envio']
+        )
+        if alertas_notificadas:
+            ahora_envio = timezone.now()
+            AlertaStock.objects.filter(
+                pk__in=alertas_notificadas, estado='PENDIENTE'
+            ).update(estado='NOTIFICADA', fecha_notificacion=ahora_envio, actualizado_en=ahora_envio)
+
+    return resumen
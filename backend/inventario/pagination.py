@@ -0,0 +1,12 @@
+from rest_framework.pagination import CursorPagination
+
+
+class MovimientoCursorPagination(CursorPagination):
+    """
+    Paginación por cursor (keyset) para el kardex de movimientos.
+    Cada página cuesta lo mismo sin importar su profundidad: no usa OFFSET
+    ni COUNT(*), y se apoya en los índices (-fecha_movimiento, id).
+    """
+    ordering = ('-fecha_movimiento', 'id')
+    page_size_query_param = 'page_size'
+    max_page_size = 200
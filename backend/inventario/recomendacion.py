@@ -0,0 +1,167 @@
+import math
+from datetime import timedelta
+from decimal import Decimal
+from statistics import NormalDist
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+from .models import Repuesto, ConsumoDiario, SugerenciaStockMinimo
+from .alertas import programar_evaluacion_alertas
+from .cache import invalidar_catalogo, invalidar_codigos_barras
+
+# Movimientos que cuentan como demanda
+TIPOS_CONSUMO = ['SALIDA_USO', 'SALIDA_SOLICITUD', 'BAJA_POR_DANHO']
+
+TAMANO_LOTE = 2000
+
+
+def cargar_repuestos():
+    """Arreglos (ids ordenados, stock mínimo actual, día de creación) de los repuestos activos"""
+    filas = list(
+        Repuesto.objects.filter(activo=True).order_by('pk').values_list(
+            'pk', 'stock_minimo_seguridad', 'creado_en'
+        )
+    )
+    ids = np.fromiter((fila[0] for fila in filas), dtype=np.int64, count=len(filas))
+    minimos = np.fromiter((fila[1] for fila in filas), dtype=np.int64, count=len(filas))
+    creados = np.fromiter(
+        (timezone.localdate(fila[2]).toordinal() for fila in filas), dtype=np.int64, count=len(filas)
+    )
+    return ids, minimos, creados
+
+
+def cargar_consumo(desde, hasta):
+    """Arreglos (repuesto_id, cantidad) con el consumo total de cada repuesto por día"""
+    filas = list(
+        ConsumoDiario.objects.filter(
+            fecha__gte=desde, fecha__lte=hasta, tipo_movimiento__in=TIPOS_CONSUMO
+        ).values('repuesto_id', 'fecha').annotate(
+            total=Sum('cantidad')
+        ).order_by().values_list('repuesto_id', 'total')
+    )
+    datos = np.array(filas, dtype=np.int64).reshape(-1, 2)
+    return datos[:, 0], datos[:, 1].astype(np.float64)
+
+
+def calcular_puntos_reorden(ids, minimos, creados, consumo_ids, consumo, hasta, dias, lead_time, nivel_servicio):
+    """
+    Calcula para todos los repuestos a la vez la demanda diaria media, su
+    desviación estándar y el punto de reorden:
+
+        stock de seguridad = z * sigma * sqrt(lead time)
+        punto de reorden   = media * lead time + stock de seguridad
+
+    Los días sin consumo cuentan como demanda cero; los repuestos creados
+    dentro de la ventana solo promedian los días desde su creación.
+    """
+    n = len(ids)
+    # Posición de cada fila de consumo en el arreglo de repuestos
+    posiciones = np.searchsorted(ids, consumo_ids)
+    validas = posiciones < n
+    validas[validas] = ids[posiciones[validas]] == consumo_ids[validas]
+    posiciones, consumo = posiciones[validas], consumo[validas]
+
+    suma = np.bincount(posiciones, weights=consumo, minlength=n)
+    suma_cuadrados = np.bincount(posiciones, weights=consumo ** 2, minlength=n)
+
+    dias_historia = np.clip(hasta.toordinal() - creados + 1, 1, dias).astype(np.float64)
+    media = suma / dias_historia
+    varianza = np.maximum(suma_cuadrados - dias_historia * media ** 2, 0) / np.maximum(dias_historia - 1, 1)
+    desviacion = np.sqrt(varianza)
+
+    z = NormalDist().inv_cdf(nivel_servicio)
+    stock_seguridad = np.ceil(z * desviacion * math.sqrt(lead_time))
+    punto_reorden = np.ceil(media * lead_time + z * desviacion * math.sqrt(lead_time))
+
+    return {
+        'suma': suma,
+        'media': media,
+        'desviacion': desviacion,
+        'dias_historia': dias_historia.astype(np.int64),
+        'stock_seguridad': stock_seguridad.astype(np.int64),
+        'punto_reorden': punto_reorden.astype(np.int64),
+    }
+
+
+def recalcular_sugerencias(dias, lead_time, nivel_servicio):
+    """
+    Recalcula las sugerencias de stock mínimo de todo el catálogo en una
+    pasada vectorizada sobre ConsumoDiario. Reemplaza las sugerencias
+    pendientes; solo se sugieren repuestos con consumo en la ventana y cuyo
+    mínimo cambiaría. Retorna un resumen.
+    """
+    # Solo días completos
+    hasta = timezone.localdate() - timedelta(days=1)
+    desde = hasta - timedelta(days=dias - 1)
+
+    ids, minimos, creados = cargar_repuestos()
+    consumo_ids, consumo = cargar_consumo(desde, hasta)
+    resultado = calcular_puntos_reorden(
+        ids, minimos, creados, consumo_ids, consumo, hasta, dias, lead_time, nivel_servicio
+    )
+
+    cambian = np.flatnonzero((resultado['suma'] > 0) & (resultado['punto_reorden'] != minimos))
+    nivel = Decimal(str(nivel_servicio))
+
+    with transaction.atomic():
+        SugerenciaStockMinimo.objects.filter(estado='PENDIENTE').delete()
+        for inicio in range(0, len(cambian), TAMANO_LOTE):
+            SugerenciaStockMinimo.objects.bulk_create([
+                SugerenciaStockMinimo(
+                    repuesto_id=int(ids[i]),
+                    stock_minimo_actual=int(minimos[i]),
+                    stock_minimo_sugerido=int(resultado['punto_reorden'][i]),
+                    stock_seguridad=int(resultado['stock_seguridad'][i]),
+                    demanda_diaria=Decimal(f"{resultado['media'][i]:.4f}"),
+                    desviacion_diaria=Decimal(f"{resultado['desviacion'][i]:.4f}"),
+                    dias_historia=int(resultado['dias_historia'][i]),
+                    lead_time_dias=lead_time,
+                    nivel_servicio=nivel,
+                )
+                for i in cambian[inicio:inicio + TAMANO_LOTE]
+            ])
+
+    return {
+        'repuestos': len(ids),
+        'con_consumo': int((resultado['suma'] > 0).sum()),
+        'sugerencias': len(cambian),
+        'desde': desde,
+        'hasta': hasta,
+    }
+
+
+def aprobar_sugerencias(sugerencias, usuario):
+    """
+    Aplica las sugerencias pendientes indicadas al stock mínimo de sus
+    repuestos. Retorna la cantidad aplicada.
+    """
+    with transaction.atomic():
+        pendientes = list(
+            sugerencias.select_for_update().filter(estado='PENDIENTE').select_related('repuesto')
+        )
+        if not pendientes:
+            return 0
+
+        ahora = timezone.now()
+        repuestos = []
+        for sugerencia in pendientes:
+            sugerencia.estado = 'APROBADA'
+            sugerencia.fecha_resolucion = ahora
+            sugerencia.resuelta_por = usuario
+            sugerencia.repuesto.stock_minimo_seguridad = sugerencia.stock_minimo_sugerido
+            sugerencia.repuesto.actualizado_en = ahora
+            repuestos.append(sugerencia.repuesto)
+
+        Repuesto.objects.bulk_update(repuestos, ['stock_minimo_seguridad', 'actualizado_en'])
+        SugerenciaStockMinimo.objects.bulk_update(pendientes, ['estado', 'fecha_resolucion', 'resuelta_por'])
+
+        repuesto_ids = [repuesto.pk for repuesto in repuestos]
+        # Un mínimo más alto puede dejar repuestos bajo el umbral
+        programar_evaluacion_alertas(repuesto_ids)
+        # Los bulk_* no disparan signals
+        invalidar_catalogo()
+        invalidar_codigos_barras(repuesto_ids)
+
+    return len(pendientes)
@@ -1,7 +1,13 @@
+import logging
+
 from rest_framework import serializers
-from .models import Repuesto, MovimientoInventario, AlertaStock
+from .models import Repuesto, MovimientoInventario, AlertaStock, SugerenciaStockMinimo
+from .campos import CamposDinamicosMixin
+
+logger = logging.getLogger(__name__)
 
-class RepuestoSerializer(serializers.ModelSerializer):
+
+class RepuestoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     # Campos calculados
     necesita_reposicion = serializers.ReadOnlyField()
     valor_total_stock = serializers.ReadOnlyField()
@@ -17,6 +23,11 @@ class RepuestoSerializer(serializers.ModelSerializer):
             'creado_en', 'actualizado_en', 'creado_por_username'
         ]
         read_only_fields = ['stock_actual', 'creado_en', 'actualizado_en']
+        # Columnas que leen las propiedades del modelo
+        dependencias = {
+            'necesita_reposicion': ['stock_actual', 'stock_minimo_seguridad'],
+            'valor_total_stock': ['stock_actual', 'costo_unitario'],
+        }
 
     def validate_codigo_barras(self, value):
         """Validar codigo_barras y manejar strings vacíos"""
@@ -42,9 +53,6 @@ class RepuestoSerializer(serializers.ModelSerializer):
 
     def validate(self, data):
         """Validaciones adicionales"""
-        # ✅ DEBUG: Imprimir datos recibidos
-        print(f"DEBUG RepuestoSerializer.validate: datos recibidos = {data}")
-        
         # Asegurar que los campos numéricos sean del tipo correcto
         if 'stock_minimo_seguridad' in data:
             try:
@@ -61,11 +69,11 @@ class RepuestoSerializer(serializers.ModelSerializer):
                 raise serializers.ValidationError({
                     'costo_unitario': 'Debe ser un número decimal válido.'
                 })
-        
-        print(f"DEBUG RepuestoSerializer.validate: datos procesados = {data}")
+
+        logger.debug('Repuesto validado', extra={'campos': sorted(data)})
         return data
 
-class MovimientoInventarioSerializer(serializers.ModelSerializer):
+class MovimientoInventarioSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     repuesto_nombre = serializers.CharField(source='repuesto.nombre', read_only=True)
     tipo_movimiento_display = serializers.CharField(source='get_tipo_movimiento_display', read_only=True)
     registrado_por_username = serializers.CharField(source='registrado_por.username', read_only=True)
@@ -90,8 +98,41 @@ class MovimientoInventarioSerializer(serializers.ModelSerializer):
         return data
 
 
-class AlertaStockSerializer(serializers.ModelSerializer):
+class MovimientoLoteSerializer(serializers.Serializer):
+    """Valida cada fila de un lote de movimientos (sin consultar la base de datos)"""
+    # Los ajustes requieren autorización y se registran con ajustar_stock
+    TIPOS_PERMITIDOS = [
+        (clave, nombre) for clave, nombre in MovimientoInventario.TIPOS_MOVIMIENTO
+        if not clave.startswith('AJUSTE_')
+    ]
+
+    repuesto = serializers.IntegerField()
+    tipo_movimiento = serializers.ChoiceField(choices=TIPOS_PERMITIDOS)
+    cantidad = serializers.IntegerField(min_value=1)
+    costo_unitario = serializers.DecimalField(
+        max_digits=10, decimal_places=2, required=False, allow_null=True
+    )
+    observaciones = serializers.CharField(required=False, allow_blank=True, default='')
+    proveedor = serializers.CharField(max_length=200, required=False, allow_blank=True, default='')
+    numero_factura = serializers.CharField(max_length=100, required=False, allow_blank=True, default='')
+    numero_ot = serializers.CharField(max_length=50, required=False, allow_blank=True, default='')
+
+
+class AlertaStockSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     repuesto_nombre = serializers.CharField(source='repuesto.nombre', read_only=True) # O un SerializerMethodField
     class Meta:
         model = AlertaStock
-        fields = '__all__'
\ No newline at end of file
+        # Explícitos: actualizado_en solo alimenta el ETag y no es parte de la API
+        fields = [
+            'id', 'repuesto', 'repuesto_nombre', 'stock_actual', 'stock_minimo', 'estado',
+            'fecha_creacion', 'fecha_notificacion', 'fecha_resolucion', 'resuelta_por', 'observaciones',
+        ]
+
+
+class SugerenciaStockMinimoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    repuesto_nombre = serializers.CharField(source='repuesto.nombre', read_only=True)
+    resuelta_por_username = serializers.CharField(source='resuelta_por.username', read_only=True)
+
+    class Meta:
+        model = SugerenciaStockMinimo
+        fields = '__all__'
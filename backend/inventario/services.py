@@ -0,0 +1,98 @@
+from django.db import transaction
+from django.utils import timezone
+from .models import Repuesto, MovimientoInventario, ConsumoDiario
+from .alertas import programar_evaluacion_alertas
+from .eventos import publicar_stock
+from .cache import invalidar_catalogo, invalidar_codigos_barras
+
+
+def registrar_movimientos_lote(filas, usuario):
+    """
+    Aplica un lote de movimientos en una sola transacción.
+
+    `filas` es una lista de tuplas (indice, datos) ya validadas. Los movimientos
+    se aplican en el orden recibido, agrupados por repuesto: el stock se
+    calcula en memoria sobre los repuestos bloqueados y se persiste con un
+    bulk_update, los movimientos con un bulk_create y las alertas se evalúan
+    una sola vez al confirmar la transacción.
+
+    Retorna un diccionario indice -> resultado.
+    """
+    resultados = {}
+    if not filas:
+        return resultados
+
+    with transaction.atomic():
+        repuesto_ids = sorted({datos['repuesto'] for _, datos in filas})
+        # Bloquear filas en orden de id para evitar deadlocks entre lotes
+        repuestos = {
+            repuesto.pk: repuesto
+            for repuesto in Repuesto.objects.select_for_update().filter(
+                pk__in=repuesto_ids
+            ).order_by('pk')
+        }
+
+        movimientos = []
+        indices = []
+        for indice, datos in filas:
+            repuesto = repuestos.get(datos['repuesto'])
+            if repuesto is None:
+                resultados[indice] = {
+                    'indice': indice,
+                    'estado': 'error',
+                    'errores': {'repuesto': ['Repuesto no encontrado']},
+                }
+                continue
+
+            stock_anterior = repuesto.stock_actual
+            stock_posterior = MovimientoInventario.calcular_stock_posterior(
+                datos['tipo_movimiento'], stock_anterior, datos['cantidad']
+            )
+            repuesto.stock_actual = stock_posterior
+
+            movimientos.append(MovimientoInventario(
+                repuesto=repuesto,
+                tipo_movimiento=datos['tipo_movimiento'],
+                cantidad=datos['cantidad'],
+                stock_anterior=stock_anterior,
+                stock_posterior=stock_posterior,
+                costo_unitario=datos.get('costo_unitario'),
+                registrado_por=usuario,
+                observaciones=datos.get('observaciones', ''),
+                proveedor=datos.get('proveedor', ''),
+                numero_factura=datos.get('numero_factura', ''),
+                numero_ot=datos.get('numero_ot', ''),
+            ))
+            indices.append(indice)
+
+        if not movimientos:
+            return resultados
+
+        MovimientoInventario.objects.bulk_create(movimientos)
+        ConsumoDiario.objects.registrar(movimientos)
+
+        # Un solo UPDATE para todos los repuestos tocados
+        ahora = timezone.now()
+        tocados = {movimiento.repuesto_id: movimiento.repuesto for movimiento in movimientos}
+        for repuesto in tocados.values():
+            repuesto.actualizado_en = ahora
+        Repuesto.objects.bulk_update(tocados.values(), ['stock_actual', 'actualizado_en'])
+
+        publicar_stock((repuesto.pk, repuesto.stock_actual) for repuesto in tocados.values())
+        programar_evaluacion_alertas(tocados.keys())
+        # Los bulk_* no disparan signals
+        invalidar_catalogo()
+        invalidar_codigos_barras(tocados.keys())
+
+    for indice, movimiento in zip(indices, movimientos):
+        resultados[indice] = {
+            'indice': indice,
+            'estado': 'ok',
+            'id': movimiento.id,
+            'repuesto': movimiento.repuesto_id,
+            'tipo_movimiento': movimiento.tipo_movimiento,
+            'cantidad': movimiento.cantidad,
+            'stock_anterior': movimiento.stock_anterior,
+            'stock_posterior': movimiento.stock_posterior,
+        }
+    return resultados
@@ -1,33 +1,39 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from .models import MovimientoInventario, AlertaStock
-from django.utils import timezone
+from .models import Repuesto, MovimientoInventario, ConsumoDiario
+from .cache import invalidar_catalogo, invalidar_codigos_barras
+from .alertas import programar_evaluacion_alertas
+from .eventos import publicar_stock
+
+
+@receiver([post_save, post_delete], sender=Repuesto)
+@receiver([post_save, post_delete], sender=MovimientoInventario)
+def invalidar_cache_catalogo(sender, instance, **kwargs):
+    """Invalida los snapshots cacheados (estadísticas y escaneo) ante cualquier escritura"""
+    invalidar_catalogo()
+    repuesto_id = instance.pk if sender is Repuesto else instance.repuesto_id
+    invalidar_codigos_barras([repuesto_id])
+
+
+@receiver(post_save, sender=MovimientoInventario)
+def publicar_cambio_stock(sender, instance, created, **kwargs):
+    """Avisa el nuevo stock a los clientes conectados al stream de eventos"""
+    # Registrada antes que verificar_stock_bajo: el stock llega antes que la alerta
+    if created and instance.stock_posterior != instance.stock_anterior:
+        publicar_stock([(instance.repuesto_id, instance.stock_posterior)])
+
 
 @receiver(post_save, sender=MovimientoInventario)
 def verificar_stock_bajo(sender, instance, created, **kwargs):
     """
-    Signal para verificar automáticamente si se necesita generar alerta de stock bajo
+    Programa la evaluación de alertas de stock bajo del repuesto para el
+    final de la transacción (ver alertas.programar_evaluacion_alertas)
     """
     if created:  # Solo en movimientos nuevos
-        repuesto = instance.repuesto
-        
-        # Verificar si el stock está por debajo del mínimo
-        if repuesto.necesita_reposicion:
-            # Verificar si ya existe una alerta pendiente para este repuesto hoy
-            hoy = timezone.now().date()
-            alerta_existente = AlertaStock.objects.filter(
-                repuesto=repuesto,
-                estado__in=['PENDIENTE', 'NOTIFICADA'],
-                fecha_creacion__date=hoy
-            ).exists()
-            
-            if not alerta_existente:
-                # Crear nueva alerta
-                AlertaStock.objects.create(
-                    repuesto=repuesto,
-                    stock_actual=repuesto.stock_actual,
-                    stock_minimo=repuesto.stock_minimo_seguridad
-                )
-                
-                # TODO: Aquí se pueden agregar notificaciones por email/WhatsApp
-                print(f"🚨 ALERTA: Stock bajo para {repuesto.nombre} - Stock: {repuesto.stock_actual}")
+        programar_evaluacion_alertas([instance.repuesto_id])
+
+
+@receiver(post_delete, sender=MovimientoInventario)
+def descontar_consumo_diario(sender, instance, **kwargs):
+    """Mantiene ConsumoDiario consistente al eliminar movimientos"""
+    ConsumoDiario.objects.descontar([instance])
@@ -0,0 +1,380 @@
+"""
+Generación de datos sintéticos con volumen y distribución de producción,
+para medir cambios de rendimiento (ver los comandos generar_datos_sinteticos
+y prueba_carga).
+
+Todo se escribe con inserciones masivas: COPY en PostgreSQL y bulk_create
+en otros motores. Los datos son reproducibles a partir de la semilla.
+"""
+import io
+import random
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+from django.db import connection, transaction
+from django.db.models import Case, IntegerField, Value, When
+from django.utils import timezone
+from usuarios.roles import SYSTEM_ROLES
+from .cache import invalidar_catalogo, invalidar_codigos_barras
+from .consumo import reconstruir_consumo_diario
+from .models import AlertaStock, MovimientoInventario, Repuesto
+
+User = get_user_model()
+
+# Prefijos que identifican los datos sintéticos (y permiten agregar más)
+PREFIJO_CODIGO = 'SINT-'
+PREFIJO_USUARIO = 'sintetico_'
+CLAVE_USUARIOS = 'sintetico123'
+
+TAMANO_LOTE = 5000
+
+# Participación de cada tipo en los movimientos: predominan las salidas
+# por uso en OT, las entradas reponen y los ajustes y bajas son escasos
+MEZCLA_TIPOS = {
+    'SALIDA_USO': 45,
+    'ENTRADA': 22,
+    'SALIDA_SOLICITUD': 15,
+    'AJUSTE_NEGATIVO': 4,
+    'AJUSTE_POSITIVO': 3,
+    'DEVOLUCION': 5,
+    'BAJA_POR_DANHO': 2,
+    'COMPRA_EXTERNA_USO_DIRECTO': 4,
+}
+
+# Peso relativo de cada día de la semana (lunes = 0)
+PESO_DIA_SEMANA = (1.0, 1.0, 1.0, 1.0, 0.9, 0.3, 0.05)
+
+# Roles de los usuarios sintéticos, en proporción
+MEZCLA_ROLES = {'TECNICO': 70, 'ENCARGADO_BODEGA': 20, 'SUPERVISOR': 10}
+
+COMPONENTES = [
+    'Filtro de aceite', 'Filtro de aire', 'Pastilla de freno', 'Disco de freno',
+    'Correa de distribución', 'Bujía', 'Amortiguador', 'Rodamiento', 'Bomba de agua',
+    'Sensor de oxígeno', 'Empaquetadura', 'Manguera', 'Fusible', 'Relé', 'Batería',
+    'Neumático', 'Rótula', 'Embrague', 'Radiador', 'Termostato',
+]
+MARCAS = ['Bosch', 'SKF', 'Mann', 'NGK', 'Gates', 'Valeo', 'Denso', 'Monroe', 'Mahle', 'Continental']
+PROVEEDORES = ['Repuestos del Sur', 'Distribuidora Central', 'Importadora Andes', 'Comercial Norte']
+
+
+@contextmanager
+def _fechas_explicitas(*campos):
+    """Permite asignar a mano campos auto_now/auto_now_add durante la carga"""
+    originales = [(campo, campo.auto_now, campo.auto_now_add) for campo in campos]
+    for campo in campos:
+        campo.auto_now = campo.auto_now_add = False
+    try:
+        yield
+    finally:
+        for campo, auto_now, auto_now_add in originales:
+            campo.auto_now, campo.auto_now_add = auto_now, auto_now_add
+
+
+def _texto_copy(valor):
+    """Valor en el formato de texto de COPY"""
+    if valor is None:
+        return '\\N'
+    return (
+        str(valor).replace('\\', '\\\\').replace('\t', '\\t')
+        .replace('\n', '\\n').replace('\r', '\\r')
+    )
+
+
+def insertar(modelo, objetos):
+    """
+    Inserta instancias sin PK. En PostgreSQL usa COPY, que evita el costo de
+    armar y parsear INSERT por fila; en otros motores, bulk_create.
+    """
+    if not objetos:
+        return
+    if connection.vendor != 'postgresql':
+        modelo.objects.bulk_create(objetos, batch_size=TAMANO_LOTE)
+        return
+
+    campos = [
+        campo for campo in modelo._meta.concrete_fields
+        if not campo.primary_key and campo.editable
+    ]
+    buffer = io.StringIO()
+    for objeto in objetos:
+        buffer.write('\t'.join(
+            _texto_copy(campo.get_db_prep_save(getattr(objeto, campo.attname), connection))
+            for campo in campos
+        ))
+        buffer.write('\n')
+    buffer.seek(0)
+    columnas = ', '.join(connection.ops.quote_name(campo.column) for campo in campos)
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f'COPY {connection.ops.quote_name(modelo._meta.db_table)} ({columnas}) FROM STDIN', buffer
+        )
+
+
+def _elegir(rng, mezcla, cantidad):
+    return rng.choices(list(mezcla), weights=list(mezcla.values()), k=cantidad)
+
+
+def generar_usuarios(cantidad, rng):
+    """Usuarios con roles del sistema; todos con la clave CLAVE_USUARIOS"""
+    inicio = User.objects.filter(username__startswith=PREFIJO_USUARIO).count()
+    clave = make_password(CLAVE_USUARIOS)
+    roles = _elegir(rng, MEZCLA_ROLES, cantidad)
+    ahora = timezone.now()
+    usuarios = [
+        User(
+            username=f'{PREFIJO_USUARIO}{inicio + i:05d}',
+            email=f'{PREFIJO_USUARIO}{inicio + i:05d}@example.com',
+            first_name='Usuario',
+            last_name=f'Sintético {inicio + i}',
+            password=clave,
+            rol=rol,
+            is_active=True,
+            date_joined=ahora,
+            fecha_creacion=ahora,
+            fecha_actualizacion=ahora,
+        )
+        for i, rol in enumerate(roles)
+    ]
+    campos = [User._meta.get_field('fecha_creacion'), User._meta.get_field('fecha_actualizacion')]
+    with _fechas_explicitas(*campos):
+        insertar(User, usuarios)
+
+    # Membresía en el grupo de cada rol, igual que los usuarios creados por la API
+    # Los nombres tienen ancho fijo: el rango los cubre sin un IN gigante
+    ids = dict(User.objects.filter(
+        username__gte=usuarios[0].username, username__lte=usuarios[-1].username
+    ).values_list('username', 'id'))
+    grupos = {clave: Group.objects.get_or_create(name=SYSTEM_ROLES[clave])[0].pk for clave in MEZCLA_ROLES}
+    Membresia = User.groups.through
+    insertar(Membresia, [
+        Membresia(usuario_id=ids[usuario.username], group_id=grupos[usuario.rol])
+        for usuario in usuarios
+    ])
+    return list(ids.values())
+
+
+def generar_repuestos(cantidad, rng, desde, usuario_ids):
+    """
+    Catálogo con stock mínimo y costo variados. Retorna (id, stock mínimo,
+    costo) de los repuestos creados.
+    """
+    inicio = Repuesto.objects.filter(codigo_barras__startswith=PREFIJO_CODIGO).count()
+    repuestos = []
+    for i in range(inicio, inicio + cantidad):
+        creado = desde - timedelta(days=rng.randint(0, 365))
+        repuestos.append(Repuesto(
+            nombre=f'{rng.choice(COMPONENTES)} {i:06d}',
+            descripcion='',
+            marca=rng.choice(MARCAS),
+            modelo=f'{rng.choice("ABCDEFGH")}-{rng.randint(100, 999)}',
+            codigo_barras=f'{PREFIJO_CODIGO}{i:09d}',
+            unidad_medida='unidades',
+            stock_actual=0,
+            stock_minimo_seguridad=rng.choice((0, 2, 5, 5, 10, 10, 20, 50)),
+            # Uno de cada diez sin costo registrado
+            costo_unitario=None if rng.random() < 0.1 else Decimal(rng.randint(500, 500000)) / 100,
+            activo=rng.random() >= 0.03,
+            creado_en=creado,
+            actualizado_en=creado,
+            creado_por_id=rng.choice(usuario_ids) if usuario_ids else None,
+        ))
+    with _fechas_explicitas(Repuesto._meta.get_field('creado_en'), Repuesto._meta.get_field('actualizado_en')):
+        insertar(Repuesto, repuestos)
+    return list(
+        Repuesto.objects.filter(
+            codigo_barras__gte=repuestos[0].codigo_barras, codigo_barras__lte=repuestos[-1].codigo_barras
+        ).order_by('id').values_list('id', 'stock_minimo_seguridad', 'costo_unitario')
+    )
+
+
+def _momentos_del_dia(rng, dia, cantidad, zona):
+    """Instantes ordenados dentro de un día, concentrados en horario laboral"""
+    momentos = []
+    for _ in range(cantidad):
+        if rng.random() < 0.85:
+            hora = min(max(rng.gauss(12.5, 2.5), 7), 19.99)
+        else:
+            hora = rng.uniform(0, 24)
+        segundos = int(hora * 3600)
+        momentos.append(timezone.make_aware(
+            datetime.combine(dia, time.min) + timedelta(seconds=segundos), zona
+        ))
+    momentos.sort()
+    return momentos
+
+
+def generar_movimientos(cantidad, rng, repuestos, usuario_ids, desde, hasta):
+    """
+    Movimientos repartidos por día (días hábiles y horario laboral con más
+    actividad) y por repuesto (pocos repuestos concentran la mayoría, como en
+    una bodega real). Se generan en orden cronológico para que el stock
+    anterior y posterior de cada movimiento sea consistente; al final cada
+    repuesto queda con el stock resultante.
+    """
+    zona = timezone.get_current_timezone()
+    dias = [desde + timedelta(days=n) for n in range((hasta - desde).days + 1)]
+    pesos_dias = [PESO_DIA_SEMANA[dia.weekday()] for dia in dias]
+    total_pesos = sum(pesos_dias)
+
+    # Popularidad tipo Zipf: el repuesto k tiene peso 1 / k
+    orden = list(range(len(repuestos)))
+    rng.shuffle(orden)
+    pesos_repuestos = [0.0] * len(repuestos)
+    for rango, posicion in enumerate(orden, start=1):
+        pesos_repuestos[posicion] = 1 / rango
+
+    # Stock al inicio del período
+    stock = {repuesto_id: rng.randint(0, 60) for repuesto_id, *_ in repuestos}
+    supervisores = usuario_ids[: max(1, len(usuario_ids) // 10)] if usuario_ids else [None]
+    registradores = usuario_ids or [None]
+
+    campo_fecha = MovimientoInventario._meta.get_field('fecha_movimiento')
+    ahora = timezone.now()
+    lote, generados, acumulado = [], 0, 0.0
+    with _fechas_explicitas(campo_fecha):
+        for dia, peso in zip(dias, pesos_dias):
+            # Reparto proporcional sin perder el redondeo acumulado
+            acumulado += cantidad * peso / total_pesos
+            del_dia = round(acumulado) - generados
+            if del_dia <= 0:
+                continue
+            elegidos = rng.choices(repuestos, weights=pesos_repuestos, k=del_dia)
+            tipos = _elegir(rng, MEZCLA_TIPOS, del_dia)
+            for momento, (repuesto_id, minimo, costo), tipo in zip(
+                _momentos_del_dia(rng, dia, del_dia, zona), elegidos, tipos
+            ):
+                # Las entradas reponen por caja; las salidas son de pocas unidades
+                if tipo in MovimientoInventario.TIPOS_ENTRADA:
+                    lote_minimo = max(minimo, 5)
+                    cantidad_movimiento = rng.randint(lote_minimo, lote_minimo * 3)
+                else:
+                    cantidad_movimiento = rng.choice((1, 1, 1, 2, 2, 3, 4, 5))
+                anterior = stock[repuesto_id]
+                posterior = MovimientoInventario.calcular_stock_posterior(tipo, anterior, cantidad_movimiento)
+                stock[repuesto_id] = posterior
+                ajuste = tipo.startswith('AJUSTE') or tipo == 'BAJA_POR_DANHO'
+                lote.append(MovimientoInventario(
+                    repuesto_id=repuesto_id,
+                    tipo_movimiento=tipo,
+                    cantidad=cantidad_movimiento,
+                    stock_anterior=anterior,
+                    stock_posterior=posterior,
+                    costo_unitario=costo,
+                    # Los de hoy no quedan en el futuro
+                    fecha_movimiento=min(momento, ahora),
+                    registrado_por_id=rng.choice(registradores),
+                    autorizado_por_id=rng.choice(supervisores) if ajuste else None,
+                    observaciones='',
+                    proveedor=rng.choice(PROVEEDORES) if tipo == 'ENTRADA' else '',
+                    numero_factura=f'F-{rng.randint(10000, 99999)}' if tipo == 'ENTRADA' else '',
+                    numero_ot=(
+                        f'OT-{rng.randint(1000, 9999)}'
+                        if tipo in ('SALIDA_USO', 'COMPRA_EXTERNA_USO_DIRECTO') else ''
+                    ),
+                ))
+            generados += del_dia
+            if len(lote) >= TAMANO_LOTE:
+                insertar(MovimientoInventario, lote)
+                lote = []
+        insertar(MovimientoInventario, lote)
+
+    # Stock final por repuesto con un UPDATE ... CASE por lote
+    ids = list(stock)
+    for inicio in range(0, len(ids), 1000):
+        parte = ids[inicio:inicio + 1000]
+        Repuesto.objects.filter(pk__in=parte).update(
+            stock_actual=Case(
+                *(When(pk=repuesto_id, then=Value(stock[repuesto_id])) for repuesto_id in parte),
+                output_field=IntegerField(),
+            ),
+            actualizado_en=ahora,
+        )
+    return generados, stock
+
+
+def generar_alertas(rng, repuestos, stock, usuario_ids, desde, hasta):
+    """
+    Una alerta abierta por cada repuesto bajo su mínimo y un historial de
+    alertas resueltas o ignoradas en el período.
+    """
+    segundos_periodo = int((hasta - desde).total_seconds())
+    alertas = []
+    for repuesto_id, minimo, _ in repuestos:
+        for _ in range(rng.choice((0, 0, 0, 1, 1, 2))):
+            creada = desde + timedelta(seconds=rng.randint(0, segundos_periodo))
+            resuelta = creada + timedelta(hours=rng.randint(2, 240))
+            alertas.append(AlertaStock(
+                repuesto_id=repuesto_id,
+                stock_actual=rng.randint(0, minimo),
+                stock_minimo=minimo,
+                estado='RESUELTA' if rng.random() < 0.85 else 'IGNORADA',
+                fecha_creacion=creada,
+                fecha_notificacion=creada + timedelta(minutes=5),
+                fecha_resolucion=resuelta,
+                actualizado_en=resuelta,
+                resuelta_por_id=rng.choice(usuario_ids) if usuario_ids else None,
+                observaciones='',
+            ))
+        if stock[repuesto_id] <= minimo:
+            creada = hasta - timedelta(hours=rng.randint(1, 72))
+            notificada = rng.random() < 0.7
+            alertas.append(AlertaStock(
+                repuesto_id=repuesto_id,
+                stock_actual=stock[repuesto_id],
+                stock_minimo=minimo,
+                estado='NOTIFICADA' if notificada else 'PENDIENTE',
+                fecha_creacion=creada,
+                fecha_notificacion=creada + timedelta(minutes=5) if notificada else None,
+                actualizado_en=creada,
+                observaciones='',
+            ))
+    campos = [AlertaStock._meta.get_field('fecha_creacion'), AlertaStock._meta.get_field('actualizado_en')]
+    with _fechas_explicitas(*campos):
+        for inicio in range(0, len(alertas), TAMANO_LOTE):
+            insertar(AlertaStock, alertas[inicio:inicio + TAMANO_LOTE])
+    return len(alertas)
+
+
+def generar_datos_sinteticos(repuestos, movimientos, usuarios, dias, semilla=0, progreso=None):
+    """
+    Genera usuarios, repuestos, movimientos de los últimos `dias` días y
+    alertas, y recalcula el consumo diario del período. Se puede ejecutar
+    varias veces: cada corrida agrega datos nuevos. Retorna los totales.
+    """
+    rng = random.Random(semilla)
+    progreso = progreso or (lambda mensaje: None)
+    hasta = timezone.localdate()
+    desde = hasta - timedelta(days=dias - 1)
+    inicio_periodo = timezone.make_aware(datetime.combine(desde, time.min))
+    fin_periodo = timezone.now()
+
+    with transaction.atomic():
+        progreso(f'Usuarios: {usuarios}')
+        usuario_ids = generar_usuarios(usuarios, rng) if usuarios else []
+        progreso(f'Repuestos: {repuestos}')
+        filas_repuestos = generar_repuestos(repuestos, rng, inicio_periodo, usuario_ids)
+        progreso(f'Movimientos: {movimientos}')
+        total_movimientos, stock = generar_movimientos(
+            movimientos, rng, filas_repuestos, usuario_ids, desde, hasta
+        ) if filas_repuestos else (0, {})
+        progreso('Alertas')
+        total_alertas = generar_alertas(
+            rng, filas_repuestos, stock, usuario_ids, inicio_periodo, fin_periodo
+        ) if filas_repuestos else 0
+        progreso('Consumo diario')
+        reconstruir_consumo_diario(desde, hasta)
+
+        # Las inserciones masivas no disparan signals
+        invalidar_catalogo()
+        invalidar_codigos_barras()
+
+    return {
+        'usuarios': len(usuario_ids),
+        'repuestos': len(filas_repuestos),
+        'movimientos': total_movimientos,
+        'alertas': total_alertas,
+    }
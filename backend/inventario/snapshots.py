@@ -0,0 +1,110 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Count, DecimalField, Exists, F, OuterRef, Subquery, Sum
+from django.utils import timezone
+from .models import Repuesto, MovimientoInventario, SnapshotInventario, SnapshotRepuesto
+
+# Los movimientos se leen desde un poco antes del corte del snapshot: un
+# movimiento fechado antes del corte pudo confirmarse después de la foto.
+# Releerlo no altera el resultado porque se usa su stock_posterior (absoluto).
+MARGEN_SNAPSHOT = timedelta(minutes=5)
+
+CENTAVOS = Decimal('0.01')
+
+
+def tomar_snapshot():
+    """
+    Materializa el stock y costo actuales de todos los repuestos con un único
+    INSERT ... SELECT. Retorna el SnapshotInventario creado.
+    """
+    quote = connection.ops.quote_name
+    with transaction.atomic():
+        snapshot = SnapshotInventario.objects.create(fecha_corte=timezone.now())
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {quote(SnapshotRepuesto._meta.db_table)} "
+                f"(snapshot_id, repuesto_id, stock, costo_unitario) "
+                f"SELECT %s, id, stock_actual, costo_unitario FROM {quote(Repuesto._meta.db_table)}",
+                [snapshot.pk]
+            )
+        totales = snapshot.detalles.aggregate(
+            total=Count('id'),
+            valor=Sum(
+                F('stock') * F('costo_unitario'),
+                output_field=DecimalField(max_digits=16, decimal_places=2)
+            )
+        )
+        snapshot.total_repuestos = totales['total']
+        snapshot.valor_total = (totales['valor'] or Decimal('0')).quantize(CENTAVOS)
+        snapshot.save(update_fields=['total_repuestos', 'valor_total'])
+    return snapshot
+
+
+def _stock_de_movimiento(movimientos, orden, campo):
+    """Subconsulta correlacionada: `campo` del primer movimiento del repuesto según `orden`"""
+    return Subquery(
+        movimientos.filter(repuesto=OuterRef('pk')).order_by(*orden).values(campo)[:1]
+    )
+
+
+def stock_a_fecha(fecha, repuesto_ids=None):
+    """
+    Stock y valorización de los repuestos existentes a `fecha`.
+
+    Parte del snapshot anterior más cercano y aplica solo los movimientos
+    posteriores a su corte: el stock de cada repuesto movido en esa ventana
+    es el stock_posterior de su último movimiento. Los repuestos sin dato en
+    el snapshot toman el stock_anterior de su primer movimiento posterior a
+    `fecha` o, si no tienen, su stock actual.
+
+    Todo se resuelve en una consulta sobre los repuestos, con subconsultas
+    correlacionadas que leen un movimiento por repuesto desde el índice
+    (repuesto, -fecha_movimiento): sin snapshot no se recorre el historial.
+
+    Retorna (snapshot o None, lista de filas ordenadas por nombre).
+    """
+    snapshot = SnapshotInventario.objects.filter(fecha_corte__lte=fecha).order_by('-fecha_corte').first()
+
+    repuestos = Repuesto.objects.filter(creado_en__lte=fecha)
+    if repuesto_ids is not None:
+        repuestos = repuestos.filter(pk__in=repuesto_ids)
+
+    ventana = MovimientoInventario.objects.filter(fecha_movimiento__lte=fecha)
+    if snapshot is not None:
+        ventana = ventana.filter(fecha_movimiento__gt=snapshot.fecha_corte - MARGEN_SNAPSHOT)
+    posteriores = MovimientoInventario.objects.filter(fecha_movimiento__gt=fecha)
+
+    anotaciones = {
+        'stock_ultimo': _stock_de_movimiento(ventana, ['-fecha_movimiento', '-id'], 'stock_posterior'),
+        'stock_primero': _stock_de_movimiento(posteriores, ['fecha_movimiento', 'id'], 'stock_anterior'),
+    }
+    if snapshot is not None:
+        detalle = SnapshotRepuesto.objects.filter(snapshot=snapshot, repuesto=OuterRef('pk'))
+        anotaciones.update(
+            en_snapshot=Exists(detalle),
+            stock_snapshot=Subquery(detalle.values('stock')[:1]),
+            costo_snapshot=Subquery(detalle.values('costo_unitario')[:1]),
+        )
+
+    filas = list(repuestos.annotate(**anotaciones).order_by('nombre', 'id').values(
+        'id', 'nombre', 'codigo_barras', 'unidad_medida', 'costo_unitario', 'stock_actual', *anotaciones
+    ))
+
+    for fila in filas:
+        stock_actual = fila.pop('stock_actual')
+        stock_ultimo = fila.pop('stock_ultimo')
+        stock_primero = fila.pop('stock_primero')
+        if fila.pop('en_snapshot', False):
+            stock = fila.pop('stock_snapshot')
+            fila['costo_unitario'] = fila.pop('costo_snapshot')
+        else:
+            fila.pop('stock_snapshot', None)
+            fila.pop('costo_snapshot', None)
+            stock = stock_primero if stock_primero is not None else stock_actual
+        fila['stock'] = stock_ultimo if stock_ultimo is not None else stock
+        costo = fila['costo_unitario']
+        fila['valor'] = (fila['stock'] * costo).quantize(CENTAVOS) if costo is not None else Decimal('0.00')
+
+    return snapshot, filas
@@ -1,3 +1,1230 @@
-from django.test import TestCase
+import asyncio
+import csv
+import io
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock, skipIf, skipUnless
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from asgiref.sync import sync_to_async
+from django.core import mail, signing
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+import numpy as np
+from openpyxl import Workbook, load_workbook
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APITestCase
+
+from .alertas import programar_evaluacion_alertas
+from .busqueda import busqueda_indexada_disponible
+from .cache import CacheCodigosBarras, cache_codigos_barras
+from .consumo import reconstruir_consumo_diario
+from .eventos import (
+    BrokerEventos, CLAVE_SUSCRIPTORES, broker, emitir_ticket, hay_suscriptores, publicar_stock,
+    usa_notify, validar_ticket
+)
+from .exportacion import COLUMNAS_MOVIMIENTOS, COLUMNAS_REPUESTOS
+from .importacion import importar_repuestos, validar_fila
+from .models import Repuesto, MovimientoInventario, AlertaStock, NotificacionAlerta, ConsumoDiario
+from .notificaciones import despachar_notificaciones
+from .recomendacion import calcular_puntos_reorden
+from .serializers import RepuestoSerializer
+from .services import registrar_movimientos_lote
+from .sinteticos import generar_datos_sinteticos
+from .snapshots import stock_a_fecha, tomar_snapshot
+from usuarios.authentication import obtener_token
+
+User = get_user_model()
+
+
+class NotificacionesAlertaTests(TestCase):
+    """Outbox de notificaciones y despachador"""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com')
+        User.objects.create_user('bodega', 'bodega@example.com', rol='ENCARGADO_BODEGA')
+        User.objects.create_user('tecnico', 'tecnico@example.com', rol='TECNICO')
+        self.repuestos = [
+            Repuesto.objects.create(
+                nombre=f'Repuesto {i}', stock_actual=5, stock_minimo_seguridad=3, creado_por=self.admin
+            )
+            for i in range(3)
+        ]
+
+    def bajar_stock(self, repuesto, cantidad=3):
+        with self.captureOnCommitCallbacks(execute=True):
+            MovimientoInventario.objects.create(
+                repuesto=repuesto, tipo_movimiento='SALIDA_USO', cantidad=cantidad, registrado_por=self.admin
+            )
+
+    def test_outbox_se_escribe_con_la_alerta(self):
+        self.bajar_stock(self.repuestos[0])
+        alerta = AlertaStock.objects.get()
+        self.assertEqual(
+            sorted(alerta.notificaciones.values_list('destinatario', flat=True)),
+            ['admin@example.com', 'bodega@example.com']
+        )
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_un_resumen_por_destinatario(self):
+        for repuesto in self.repuestos:
+            self.bajar_stock(repuesto)
+
+        resumen = despachar_notificaciones()
+
+        self.assertEqual(resumen['correos'], 2)
+        self.assertEqual(resumen['enviadas'], 6)
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertIn('Repuesto 2', mail.outbox[0].body)
+        self.assertFalse(NotificacionAlerta.objects.filter(estado='PENDIENTE').exists())
+        self.assertEqual(
+            set(AlertaStock.objects.values_list('estado', flat=True)), {'NOTIFICADA'}
+        )
+        self.assertFalse(AlertaStock.objects.filter(fecha_notificacion__isnull=True).exists())
+        self.assertEqual(despachar_notificaciones()['correos'], 0)
+
+    def test_reintento_con_backoff(self):
+        self.bajar_stock(self.repuestos[0])
+
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=OSError('smtp caído')):
+            resumen = despachar_notificaciones()
+
+        self.assertEqual(resumen['reintentos'], 2)
+        notificacion = NotificacionAlerta.objects.first()
+        self.assertEqual(notificacion.intentos, 1)
+        self.assertEqual(notificacion.ultimo_error, 'smtp caído')
+        self.assertGreater(notificacion.proximo_intento, timezone.now())
+        self.assertEqual(AlertaStock.objects.get().estado, 'PENDIENTE')
+
+        # Aún no vence el backoff
+        self.assertEqual(despachar_notificaciones()['enviadas'], 0)
+        NotificacionAlerta.objects.update(proximo_intento=timezone.now())
+        self.assertEqual(despachar_notificaciones()['enviadas'], 2)
+
+    def test_alerta_resuelta_no_se_notifica(self):
+        self.bajar_stock(self.repuestos[0])
+        AlertaStock.objects.update(estado='RESUELTA')
+
+        resumen = despachar_notificaciones()
+
+        self.assertEqual(resumen['descartadas'], 2)
+        self.assertEqual(len(mail.outbox), 0)
+
+
+class EvaluacionAlertasTests(TestCase):
+    """Los repuestos tocados se evalúan una vez, al confirmar su transacción"""
+
+    def setUp(self):
+        self.bajo, self.otro = [
+            Repuesto.objects.create(nombre=f'Repuesto {i}', stock_actual=1, stock_minimo_seguridad=3)
+            for i in range(2)
+        ]
+
+    def test_una_evaluacion_por_transaccion(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            programar_evaluacion_alertas([self.bajo.pk])
+            programar_evaluacion_alertas([self.otro.pk])
+            programar_evaluacion_alertas([self.bajo.pk])
+
+        with mock.patch('inventario.alertas.evaluar_alertas_stock') as evaluar:
+            for callback in callbacks:
+                callback()
+        evaluar.assert_called_once()
+        # Puede incluir ids de bloques revertidos antes en este hilo
+        self.assertLessEqual({self.bajo.pk, self.otro.pk}, evaluar.call_args.args[0])
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(AlertaStock.objects.count(), 0)  # ya evaluados
+
+    def test_rollback_no_deja_alertas(self):
+        Repuesto.objects.filter(pk=self.bajo.pk).update(stock_actual=5)
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    Repuesto.objects.filter(pk=self.bajo.pk).update(stock_actual=0)
+                    programar_evaluacion_alertas([self.bajo.pk])
+                    raise IntegrityError
+            except IntegrityError:
+                pass
+            programar_evaluacion_alertas([self.otro.pk])
+        self.assertEqual(list(AlertaStock.objects.values_list('repuesto', flat=True)), [self.otro.pk])
+
+
+class ConsultaCondicionalTests(TestCase):
+    """ETag / If-None-Match / If-Match en repuestos y alertas"""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.repuesto = Repuesto.objects.create(nombre='Filtro', stock_minimo_seguridad=2, creado_por=self.admin)
+
+    def test_lista_sin_cambios_responde_304(self):
+        respuesta = self.client.get('/api/inventario/repuestos/')
+        with self.assertNumQueries(1):
+            no_modificado = self.client.get('/api/inventario/repuestos/', HTTP_IF_NONE_MATCH=respuesta['ETag'])
+        self.assertEqual(no_modificado.status_code, 304)
+
+        Repuesto.objects.create(nombre='Correa', creado_por=self.admin)
+        modificado = self.client.get('/api/inventario/repuestos/', HTTP_IF_NONE_MATCH=respuesta['ETag'])
+        self.assertEqual(modificado.status_code, 200)
+        self.assertNotEqual(modificado['ETag'], respuesta['ETag'])
+
+    def test_if_match_desactualizado_responde_412(self):
+        url = f'/api/inventario/repuestos/{self.repuesto.pk}/'
+        etag = self.client.get(url)['ETag']
+        primera = self.client.patch(url, {'nombre': 'Filtro de aire'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(primera.status_code, 200)
+
+        segunda = self.client.patch(url, {'nombre': 'Filtro de aceite'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(segunda.status_code, 412)
+        self.repuesto.refresh_from_db()
+        self.assertEqual(self.repuesto.nombre, 'Filtro de aire')
+
+    def test_alertas_no_exponen_actualizado_en(self):
+        alerta = AlertaStock.objects.create(repuesto=self.repuesto, stock_actual=1, stock_minimo=2)
+        for url in ('/api/inventario/alertas/', '/api/inventario/lecturas/alertas/'):
+            with self.subTest(url=url):
+                respuesta = self.client.get(url)
+                self.assertEqual(respuesta.status_code, 200)
+                self.assertEqual(set(respuesta.data['results'][0]), {
+                    'id', 'repuesto', 'repuesto_nombre', 'stock_actual', 'stock_minimo', 'estado',
+                    'fecha_creacion', 'fecha_notificacion', 'fecha_resolucion', 'resuelta_por', 'observaciones',
+                })
+
+        # El ETag del detalle sigue cambiando con actualizado_en
+        url = f'/api/inventario/alertas/{alerta.pk}/'
+        etag = self.client.get(url)['ETag']
+        AlertaStock.objects.filter(pk=alerta.pk).update(actualizado_en=timezone.now() + timedelta(seconds=1))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class ListadoValoresTests(TestCase):
+    """La ruta desde .values() responde el mismo JSON que RepuestoSerializer"""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        for i, costo in enumerate([None, '0', '12.50', '3.33']):
+            Repuesto.objects.create(
+                nombre=f'Repuesto {i}', stock_actual=i * 2, stock_minimo_seguridad=3, costo_unitario=costo,
+                codigo_barras=f'C{i}' if i else None, creado_por=self.admin if i % 2 else None
+            )
+
+    def test_json_identico_al_serializer(self):
+        esperado = JSONRenderer().render(
+            RepuestoSerializer(Repuesto.objects.order_by('nombre'), many=True).data
+        )
+        respuesta = self.client.get('/api/inventario/repuestos/', HTTP_ACCEPT='application/json')
+        resultados = JSONRenderer().render(respuesta.data['results'])
+        self.assertEqual(resultados, esperado)
+
+        stock_bajo = self.client.get('/api/inventario/repuestos/stock_bajo/', HTTP_ACCEPT='application/json')
+        esperado = JSONRenderer().render(RepuestoSerializer(
+            Repuesto.objects.filter(stock_actual__lte=3).order_by('nombre'), many=True
+        ).data)
+        self.assertEqual(stock_bajo.content, esperado)
+
+
+class BusquedaRepuestosTests(APITestCase):
+    """?search= en repuestos: índices en PostgreSQL, icontains de DRF en otros motores"""
+
+    url = '/api/inventario/repuestos/'
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com')
+        self.client.force_authenticate(self.admin)
+        for nombre, marca, modelo, codigo, descripcion in (
+            ('Filtro de aceite', 'Bosch', 'F-100', '7801001', 'Para motor diésel'),
+            ('Filtro de aire', 'Mann', 'C-200', '7801002', ''),
+            ('Correa de distribución', 'Gates', 'T-300', '7802001', 'Incluye tensor'),
+            ('Pastilla de freno', 'Bosch', 'BP-400', None, ''),
+        ):
+            Repuesto.objects.create(
+                nombre=nombre, marca=marca, modelo=modelo, codigo_barras=codigo, descripcion=descripcion
+            )
+
+    def buscar(self, **parametros):
+        respuesta = self.client.get(self.url, parametros)
+        self.assertEqual(respuesta.status_code, 200)
+        return [fila['nombre'] for fila in respuesta.data['results']]
+
+    def test_sin_terminos_no_filtra(self):
+        for search in ('', '   '):
+            self.assertEqual(len(self.buscar(search=search)), 4)
+
+    @skipIf(busqueda_indexada_disponible(), 'fallback de motores sin búsqueda indexada')
+    def test_fallback_icontains(self):
+        # Cada término debe aparecer en alguno de los search_fields
+        self.assertEqual(self.buscar(search='filtro'), ['Filtro de aceite', 'Filtro de aire'])
+        self.assertEqual(self.buscar(search='bosch filtro'), ['Filtro de aceite'])
+        self.assertEqual(self.buscar(search='MOTOR'), ['Filtro de aceite'])
+        self.assertEqual(self.buscar(search='tensor'), ['Correa de distribución'])
+        self.assertEqual(self.buscar(search='7801'), ['Filtro de aceite', 'Filtro de aire'])
+        self.assertEqual(self.buscar(search='bosch', ordering='-nombre'), ['Pastilla de freno', 'Filtro de aceite'])
+        self.assertEqual(self.buscar(search='inexistente'), [])
+
+    @skipUnless(busqueda_indexada_disponible(), 'requiere PostgreSQL (search_vector y pg_trgm)')
+    def test_full_text_y_trigramas(self):
+        # Errores de tipeo por similitud trigram (word_similarity sobre el umbral 0.6)
+        self.assertIn('Filtro de aceite', self.buscar(search='fitro'))
+        # Full-text sobre search_vector, descripción incluida
+        self.assertEqual(self.buscar(search='tensor'), ['Correa de distribución'])
+        # Prefijo de código de barras
+        self.assertEqual(self.buscar(search='7802'), ['Correa de distribución'])
+        # Sin ?ordering= se ordena por relevancia; con él, por el orden pedido
+        self.assertEqual(self.buscar(search='filtro de aire')[0], 'Filtro de aire')
+        self.assertEqual(
+            self.buscar(search='bosch', ordering='-nombre')[:2], ['Pastilla de freno', 'Filtro de aceite']
+        )
+
+
+class ExportacionTests(APITestCase):
+    """exportar/ de repuestos y kardex: CSV en streaming y XLSX con los mismos filtros que el listado"""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com')
+        self.client.force_authenticate(self.admin)
+        self.repuestos = [
+            Repuesto.objects.create(
+                nombre=nombre, marca=marca, costo_unitario=costo, activo=activo,
+                codigo_barras=codigo, creado_por=self.admin, stock_actual=10,
+            )
+            for nombre, marca, costo, activo, codigo in (
+                ('Filtro, "aceite"', 'Bosch', Decimal('10.50'), True, '780100'),
+                ('Correa', 'Gates', None, True, None),
+                ('Bujía', 'Bosch', Decimal('3.00'), False, '780300'),
+            )
+        ]
+        for repuesto in self.repuestos[:2]:
+            for tipo, cantidad in (('SALIDA_USO', 2), ('ENTRADA', 5)):
+                MovimientoInventario.objects.create(
+                    repuesto=repuesto, tipo_movimiento=tipo, cantidad=cantidad,
+                    costo_unitario=Decimal('1.25'), registrado_por=self.admin,
+                )
+
+    def leer_csv(self, respuesta):
+        self.assertTrue(respuesta.streaming)
+        self.assertEqual(respuesta['Content-Type'], 'text/csv; charset=utf-8')
+        contenido = b''.join(respuesta.streaming_content).decode('utf-8')
+        self.assertTrue(contenido.startswith('﻿'))
+        return list(csv.reader(io.StringIO(contenido[1:])))
+
+    def leer_xlsx(self, respuesta):
+        self.assertEqual(
+            respuesta['Content-Type'], 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        )
+        libro = load_workbook(io.BytesIO(b''.join(respuesta.streaming_content)), read_only=True)
+        return [list(fila) for fila in libro.active.iter_rows(values_only=True)]
+
+    def test_repuestos_csv(self):
+        respuesta = self.client.get('/api/inventario/repuestos/exportar/', {'marca': 'Bosch', 'activo': 'true'})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn('attachment; filename="repuestos_', respuesta['Content-Disposition'])
+        filas = self.leer_csv(respuesta)
+
+        self.assertEqual(filas[0], [encabezado for _, encabezado in COLUMNAS_REPUESTOS])
+        self.assertEqual(len(filas), 2)
+        fila = dict(zip((campo for campo, _ in COLUMNAS_REPUESTOS), filas[1]))
+        self.assertEqual(
+            (fila['id'], fila['nombre'], fila['codigo_barras'], fila['costo_unitario'], fila['activo']),
+            (str(self.repuestos[0].pk), 'Filtro, "aceite"', '780100', '10.50', 'True'),
+        )
+        self.assertEqual(fila['creado_por__username'], 'admin')
+        self.assertEqual(
+            fila['creado_en'], timezone.localtime(Repuesto.objects.get(pk=self.repuestos[0].pk).creado_en).isoformat()
+        )
+
+    def test_kardex_xlsx_coincide_con_el_queryset_filtrado(self):
+        repuesto = self.repuestos[0]
+        respuesta = self.client.get(
+            '/api/inventario/movimientos/exportar/', {'formato': 'xlsx', 'repuesto': repuesto.pk}
+        )
+        self.assertEqual(respuesta.status_code, 200)
+        filas = self.leer_xlsx(respuesta)
+
+        self.assertEqual(filas[0], [encabezado for _, encabezado in COLUMNAS_MOVIMIENTOS])
+        esperado = MovimientoInventario.objects.filter(repuesto=repuesto).order_by('-fecha_movimiento', 'id')
+        self.assertEqual(
+            [(fila[0], fila[4], fila[5], fila[6], fila[7], fila[8]) for fila in filas[1:]],
+            [
+                (m.id, m.tipo_movimiento, m.cantidad, m.stock_anterior, m.stock_posterior, 1.25)
+                for m in esperado
+            ],
+        )
+        # Fechas locales sin zona horaria (Excel no las admite) y con precisión de milisegundos
+        self.assertAlmostEqual(
+            filas[1][1], timezone.localtime(esperado[0].fecha_movimiento).replace(tzinfo=None),
+            delta=timedelta(milliseconds=1),
+        )
+
+    def test_repuestos_xlsx_y_formato_invalido(self):
+        filas = self.leer_xlsx(self.client.get('/api/inventario/repuestos/exportar/', {'formato': 'xlsx'}))
+        self.assertEqual(
+            [fila[1] for fila in filas[1:]], list(Repuesto.objects.order_by('nombre').values_list('nombre', flat=True))
+        )
+        self.assertEqual(filas[1][9], 3.0)  # Bujía, Decimal como número
+
+        for url in ('/api/inventario/repuestos/exportar/', '/api/inventario/movimientos/exportar/'):
+            self.assertEqual(self.client.get(url, {'formato': 'pdf'}).status_code, 400)
+
+
+class CacheCodigosBarrasTests(SimpleTestCase):
+    """LRU acotado con TTL y generación de invalidación"""
+
+    def setUp(self):
+        self.cache = CacheCodigosBarras(max_entradas=2, ttl=30)
+
+    def registro(self, repuesto_id, stock=5):
+        return {'id': repuesto_id, 'stock_actual': stock}
+
+    def test_ttl(self):
+        with mock.patch('inventario.cache.time.monotonic', return_value=100):
+            self.cache.guardar('780100', self.registro(1), self.cache.generacion)
+        with mock.patch('inventario.cache.time.monotonic', return_value=129):
+            self.assertEqual(self.cache.obtener('780100'), self.registro(1))
+        with mock.patch('inventario.cache.time.monotonic', return_value=131):
+            self.assertIsNone(self.cache.obtener('780100'))
+
+    def test_lru_y_cambio_de_codigo(self):
+        for i, codigo in enumerate(['780100', '780200'], start=1):
+            self.cache.guardar(codigo, self.registro(i), self.cache.generacion)
+        self.cache.obtener('780100')
+        self.cache.guardar('780300', self.registro(3), self.cache.generacion)
+        self.assertIsNone(self.cache.obtener('780200'))  # el menos usado
+
+        # El repuesto 1 cambió de código: la entrada anterior se descarta
+        self.cache.guardar('780999', self.registro(1), self.cache.generacion)
+        self.assertIsNone(self.cache.obtener('780100'))
+        self.assertEqual(self.cache.obtener('780999'), self.registro(1))
+
+    def test_llenado_concurrente_con_una_invalidacion(self):
+        # Una request lee la fila antes del commit y guarda después de la invalidación
+        generacion = self.cache.generacion
+        self.cache.invalidar_repuesto(1)
+        self.cache.guardar('780100', self.registro(1, stock=9), generacion)
+        self.assertIsNone(self.cache.obtener('780100'))
+
+        generacion = self.cache.generacion
+        self.cache.limpiar()
+        self.cache.guardar('780100', self.registro(1, stock=9), generacion)
+        self.assertIsNone(self.cache.obtener('780100'))
+
+
+class EscaneoTests(APITestCase):
+    """GET repuestos/escanear/: aciertos sin consultas e invalidación al confirmar escrituras"""
+
+    url = '/api/inventario/repuestos/escanear/'
+
+    def setUp(self):
+        cache_codigos_barras.limpiar()
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com')
+        self.client.force_authenticate(self.admin)
+        self.repuesto = Repuesto.objects.create(
+            nombre='Filtro', codigo_barras='780100', stock_actual=5, stock_minimo_seguridad=2
+        )
+
+    def escanear(self, codigo='780100'):
+        return self.client.get(self.url, {'codigo': codigo})
+
+    def test_acierto_y_fallo(self):
+        with self.assertNumQueries(1):
+            respuesta = self.escanear()
+        self.assertEqual((respuesta.data['stock_actual'], respuesta.data['necesita_reposicion']), (5, False))
+        with self.assertNumQueries(0):
+            self.assertEqual(self.escanear().data, respuesta.data)
+
+        self.assertEqual(self.escanear('000').status_code, 404)
+        self.assertIsNone(cache_codigos_barras.obtener('000'))
+        self.assertEqual(self.client.get(self.url).status_code, 400)
+
+    def test_movimiento_invalida_al_confirmar(self):
+        self.escanear()
+        with self.captureOnCommitCallbacks(execute=True):
+            MovimientoInventario.objects.create(repuesto=self.repuesto, tipo_movimiento='SALIDA_USO', cantidad=4)
+            # Hasta el commit se sigue sirviendo el valor confirmado
+            self.assertEqual(self.escanear().data['stock_actual'], 5)
+        respuesta = self.escanear()
+        self.assertEqual((respuesta.data['stock_actual'], respuesta.data['necesita_reposicion']), (1, True))
+
+    def test_cambio_de_codigo_y_lote(self):
+        self.escanear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.repuesto.codigo_barras = '780200'
+            self.repuesto.save()
+        self.assertEqual(self.escanear().status_code, 404)
+        self.assertEqual(self.escanear('780200').status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            registrar_movimientos_lote(
+                [(0, {'repuesto': self.repuesto.pk, 'tipo_movimiento': 'ENTRADA', 'cantidad': 3})], self.admin
+            )
+        self.assertEqual(self.escanear('780200').data['stock_actual'], 8)
+
+
+class ImportacionRepuestosTests(TestCase):
+    """Upsert del catálogo por codigo_barras desde CSV y XLSX"""
+
+    def setUp(self):
+        self.existente = Repuesto.objects.create(nombre='Filtro', codigo_barras='780100', stock_actual=7)
+
+    def importar_csv(self, texto):
+        return importar_repuestos(io.BytesIO(texto.encode()), 'catalogo.csv')
+
+    def test_inserta_actualiza_y_rechaza(self):
+        reporte = self.importar_csv(
+            'nombre,codigo_barras,stock_minimo_seguridad,costo_unitario\n'
+            'Filtro de aceite,780100,4,"10,50"\n'   # actualiza
+            'Correa,780200,2,\n'                    # inserta
+            'Bujía,,1,3\n'                          # inserta sin código
+            'Correa dentada,780200,2,\n'            # código repetido en el archivo
+            'Pastilla,780300,-1,\n'                 # stock mínimo inválido
+            ',780400,1,\n'                          # sin nombre
+        )
+
+        self.assertEqual(
+            {clave: reporte[clave] for clave in ('total_filas', 'creados', 'actualizados', 'rechazados')},
+            {'total_filas': 6, 'creados': 2, 'actualizados': 1, 'rechazados': 3},
+        )
+        self.assertEqual([error['linea'] for error in reporte['errores']], [5, 6, 7])
+        self.assertIn('codigo_barras', reporte['errores'][0]['errores'])
+
+        self.existente.refresh_from_db()
+        self.assertEqual(self.existente.nombre, 'Filtro de aceite')
+        self.assertEqual(self.existente.costo_unitario, Decimal('10.50'))
+        # El stock solo cambia con movimientos
+        self.assertEqual(self.existente.stock_actual, 7)
+        self.assertEqual(Repuesto.objects.get(codigo_barras='780200').nombre, 'Correa')
+        self.assertEqual(Repuesto.objects.count(), 3)
+
+    def test_celdas_vacias_conservan_el_valor(self):
+        Repuesto.objects.filter(pk=self.existente.pk).update(
+            stock_minimo_seguridad=10, unidad_medida='litros', activo=False,
+            costo_unitario=Decimal('4.20'), marca='Bosch',
+        )
+        reporte = self.importar_csv(
+            'nombre,codigo_barras,marca,unidad_medida,stock_minimo_seguridad,costo_unitario,activo\n'
+            'Filtro de aceite,780100,,,,,\n'          # solo cambia el nombre
+            'Correa,780200,Gates,,,,\n'               # nuevo: valores por defecto
+            'Filtro de aire,780300,,metros,3,,no\n'   # nuevo, otro grupo de columnas
+        )
+        self.assertEqual((reporte['creados'], reporte['actualizados'], reporte['rechazados']), (2, 1, 0))
+
+        self.existente.refresh_from_db()
+        self.assertEqual(
+            (self.existente.nombre, self.existente.marca, self.existente.unidad_medida,
+             self.existente.stock_minimo_seguridad, self.existente.costo_unitario, self.existente.activo),
+            ('Filtro de aceite', 'Bosch', 'litros', 10, Decimal('4.20'), False),
+        )
+        self.assertEqual(
+            list(Repuesto.objects.filter(codigo_barras__in=['780200', '780300']).order_by('codigo_barras').values_list(
+                'marca', 'unidad_medida', 'stock_minimo_seguridad', 'costo_unitario', 'activo'
+            )),
+            [('Gates', 'unidades', 1, None, True), ('', 'metros', 3, None, False)],
+        )
+
+    def test_codigo_numerico_desde_xlsx(self):
+        libro = Workbook()
+        libro.active.append(['Nombre', 'Código de barras'])
+        libro.active.append(['Amortiguador', 7801234567890.0])
+        libro.active.append(['Filtro', 780100.0])
+        archivo = io.BytesIO()
+        libro.save(archivo)
+        archivo.seek(0)
+
+        reporte = importar_repuestos(archivo, 'catalogo.xlsx')
+
+        self.assertEqual((reporte['creados'], reporte['actualizados']), (1, 1))
+        self.assertTrue(Repuesto.objects.filter(codigo_barras='7801234567890').exists())
+        self.assertEqual(Repuesto.objects.count(), 2)
+
+        # Celdas numéricas con punto decimal en el XML: openpyxl las lee como float
+        datos, errores = validar_fila({'nombre': 'Amortiguador', 'codigo_barras': 7801234567890.0, 'marca': 2015.0})
+        self.assertEqual(errores, {})
+        self.assertEqual((datos['codigo_barras'], datos['marca']), ('7801234567890', '2015'))
+
+
+class PuntosReordenTests(SimpleTestCase):
+    """Media, desviación y punto de reorden vectorizados contra valores calculados a mano"""
+
+    def test_serie_fija(self):
+        hasta = date(2024, 1, 10)
+        antiguo = hasta.toordinal() - 100
+        ids = np.array([1, 2, 3, 4])
+        creados = np.array([antiguo, antiguo, hasta.toordinal(), hasta.toordinal() - 2])
+        # (repuesto, consumo del día); el 99 no está activo y se ignora
+        filas = np.array([(1, 2), (1, 4), (1, 4), (3, 3), (4, 1), (4, 2), (99, 50)])
+
+        resultado = calcular_puntos_reorden(
+            ids, np.zeros(4, dtype=np.int64), creados, filas[:, 0], filas[:, 1].astype(np.float64),
+            hasta, dias=5, lead_time=4, nivel_servicio=0.95,
+        )
+
+        # 1: [2, 4, 4, 0, 0] -> media 2, varianza (36 - 5 * 2²) / 4 = 4
+        #    seguridad ceil(1.645 * 2 * 2) = 7, reorden ceil(2 * 4 + 6.58) = 15
+        # 2: sin consumo -> todo cero
+        # 3: creado el último día: un solo día de historia, sin desviación
+        # 4: creado hace 3 días: [1, 2, 0] -> media 1, varianza (5 - 3) / 2 = 1
+        #    seguridad ceil(1.645 * 1 * 2) = 4, reorden ceil(4 + 3.29) = 8
+        self.assertEqual(resultado['dias_historia'].tolist(), [5, 5, 1, 3])
+        np.testing.assert_allclose(resultado['media'], [2, 0, 3, 1])
+        np.testing.assert_allclose(resultado['desviacion'], [2, 0, 0, 1])
+        self.assertEqual(resultado['stock_seguridad'].tolist(), [7, 0, 0, 4])
+        self.assertEqual(resultado['punto_reorden'].tolist(), [15, 0, 12, 8])
+
+    def test_sin_consumo(self):
+        vacio = np.array([], dtype=np.int64)
+        resultado = calcular_puntos_reorden(
+            np.array([5, 8]), np.array([2, 0]), np.array([0, 0]), vacio, vacio.astype(np.float64),
+            date(2024, 1, 10), dias=30, lead_time=7, nivel_servicio=0.95,
+        )
+        self.assertEqual(resultado['punto_reorden'].tolist(), [0, 0])
+        self.assertEqual(resultado['suma'].tolist(), [0, 0])
+
+
+class AplicarMovimientoTests(TestCase):
+    """UPDATE ... RETURNING condicional y respaldo con SELECT ... FOR UPDATE"""
+
+    def setUp(self):
+        self.repuesto = Repuesto.objects.create(nombre='Filtro', stock_actual=10)
+        self.bloqueando = mock.patch.object(
+            Repuesto.objects, '_aplicar_movimiento_bloqueando',
+            wraps=Repuesto.objects._aplicar_movimiento_bloqueando,
+        ).start()
+        self.addCleanup(mock.patch.stopall)
+
+    def mover(self, tipo, cantidad):
+        movimiento = MovimientoInventario.objects.create(
+            repuesto=self.repuesto, tipo_movimiento=tipo, cantidad=cantidad
+        )
+        fila = Repuesto.objects.values('stock_actual', 'actualizado_en').get(pk=self.repuesto.pk)
+        # El repuesto cacheado en el movimiento queda igual a la fila (ETag incluido)
+        self.assertEqual(self.repuesto.stock_actual, fila['stock_actual'])
+        self.assertEqual(self.repuesto.actualizado_en, fila['actualizado_en'])
+        return movimiento
+
+    def test_entrada_y_salida_ida_y_vuelta(self):
+        actualizado_en = self.repuesto.actualizado_en
+        entrada = self.mover('ENTRADA', 5)
+        self.assertEqual((entrada.stock_anterior, entrada.stock_posterior), (10, 15))
+        self.assertGreater(self.repuesto.actualizado_en, actualizado_en)
+
+        salida = self.mover('SALIDA_USO', 5)
+        self.assertEqual((salida.stock_anterior, salida.stock_posterior), (15, 10))
+        self.assertEqual(self.repuesto.stock_actual, 10)
+        if Repuesto.objects.soporta_update_returning():
+            self.bloqueando.assert_not_called()
+
+    def test_salida_con_stock_insuficiente_queda_en_cero(self):
+        salida = self.mover('BAJA_POR_DANHO', 25)
+        self.assertEqual((salida.stock_anterior, salida.stock_posterior), (10, 0))
+        self.bloqueando.assert_called_once()
+
+        vacio = self.mover('SALIDA_USO', 1)
+        self.assertEqual((vacio.stock_anterior, vacio.stock_posterior), (0, 0))
+
+    def test_motor_sin_update_returning_usa_el_bloqueo(self):
+        # MariaDB acepta INSERT ... RETURNING pero no UPDATE ... RETURNING
+        with mock.patch.object(connection, 'vendor', 'mysql'):
+            self.assertFalse(Repuesto.objects.soporta_update_returning())
+            entrada = self.mover('ENTRADA', 2)
+            salida = self.mover('SALIDA_USO', 5)
+        self.assertEqual((entrada.stock_anterior, entrada.stock_posterior), (10, 12))
+        self.assertEqual((salida.stock_anterior, salida.stock_posterior), (12, 7))
+        self.assertEqual(self.bloqueando.call_count, 2)
+
+    def test_compra_externa_no_modifica_el_repuesto(self):
+        actualizado_en = self.repuesto.actualizado_en
+        compra = self.mover('COMPRA_EXTERNA_USO_DIRECTO', 3)
+        self.assertEqual((compra.stock_anterior, compra.stock_posterior), (10, 10))
+        self.assertEqual(self.repuesto.actualizado_en, actualizado_en)
+
+
+class ConsumoDiarioTests(APITestCase):
+    """El rollup en línea coincide con reconstruir_consumo_diario tras altas, ediciones y bajas"""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'clave12345')
+        self.client.force_authenticate(self.admin)
+        self.filtro = Repuesto.objects.create(nombre='Filtro', stock_actual=50)
+        self.correa = Repuesto.objects.create(nombre='Correa', stock_actual=50)
+        self.movimientos = [
+            MovimientoInventario.objects.create(
+                repuesto=repuesto, tipo_movimiento=tipo, cantidad=cantidad, costo_unitario=costo
+            )
+            for repuesto, tipo, cantidad, costo in (
+                (self.filtro, 'SALIDA_USO', 3, Decimal('10.50')),
+                (self.filtro, 'SALIDA_USO', 2, None),
+                (self.filtro, 'ENTRADA', 8, Decimal('9.00')),
+                (self.correa, 'SALIDA_SOLICITUD', 4, Decimal('1.25')),
+            )
+        ]
+
+    def consumo(self):
+        return {
+            (fila.repuesto_id, fila.fecha, fila.tipo_movimiento): (fila.cantidad, fila.valor, fila.movimientos)
+            for fila in ConsumoDiario.objects.filter(movimientos__gt=0)
+        }
+
+    def verificar(self):
+        en_linea = self.consumo()
+        reconstruir_consumo_diario()
+        self.assertEqual(en_linea, self.consumo())
+        return en_linea
+
+    def test_altas(self):
+        consumo = self.verificar()
+        hoy = timezone.localdate()
+        self.assertEqual(consumo[(self.filtro.pk, hoy, 'SALIDA_USO')], (5, Decimal('31.50'), 2))
+
+    def test_editar_cantidad_tipo_y_repuesto(self):
+        movimiento = self.movimientos[0]
+        for cambios in ({'cantidad': 7}, {'tipo_movimiento': 'BAJA_POR_DANHO'},
+                        {'repuesto': self.correa.pk, 'costo_unitario': '2.00'}):
+            respuesta = self.client.patch(f'/api/inventario/movimientos/{movimiento.pk}/', cambios)
+            self.assertEqual(respuesta.status_code, 200, respuesta.content)
+            self.verificar()
+
+    def test_editar_otros_campos_no_escribe_consumo(self):
+        movimiento = self.movimientos[1]
+        movimiento.observaciones = 'Revisado'
+        with self.assertNumQueries(1):
+            movimiento.save(update_fields=['observaciones'])
+        with self.assertNumQueries(4):
+            # SAVEPOINT + SELECT ... FOR UPDATE + UPDATE + RELEASE, sin tocar el consumo
+            movimiento.save()
+        self.verificar()
+
+    def test_editar_fecha_cambia_de_dia(self):
+        movimiento = self.movimientos[2]
+        movimiento.fecha_movimiento -= timedelta(days=3)
+        movimiento.save()
+        consumo = self.verificar()
+        self.assertIn((self.filtro.pk, timezone.localdate(movimiento.fecha_movimiento), 'ENTRADA'), consumo)
+
+    def test_eliminar(self):
+        self.movimientos[3].delete()
+        self.assertNotIn(self.correa.pk, {repuesto_id for repuesto_id, _, _ in self.verificar()})
+
+    def test_reconstruir_rango(self):
+        hoy = timezone.localdate()
+        antiguo = self.movimientos[3]
+        antiguo.fecha_movimiento -= timedelta(days=10)
+        antiguo.save()
+        ConsumoDiario.objects.update(cantidad=999)
+
+        escritas = reconstruir_consumo_diario(hoy, hoy)
+        self.assertEqual(escritas, 2)
+        self.assertEqual(
+            ConsumoDiario.objects.get(repuesto=self.correa, tipo_movimiento='SALIDA_SOLICITUD').cantidad, 999
+        )
+        self.assertEqual(
+            ConsumoDiario.objects.get(repuesto=self.filtro, tipo_movimiento='SALIDA_USO').cantidad, 5
+        )
+
+
+class MovimientosLoteTests(APITestCase):
+    """POST movimientos/lote/ equivale a registrar cada fila por separado"""
+
+    URL = '/api/inventario/movimientos/lote/'
+    # (repuesto, tipo, cantidad, costo): repuestos repetidos y salidas que dejan el stock en 0
+    FILAS = [
+        (0, 'SALIDA_USO', 4, '10.00'),
+        (1, 'ENTRADA', 3, '2.50'),
+        (0, 'ENTRADA', 2, None),
+        (1, 'SALIDA_USO', 9, '2.50'),
+        (0, 'SALIDA_SOLICITUD', 20, '10.00'),
+        (2, 'COMPRA_EXTERNA_USO_DIRECTO', 1, '99.90'),
+        (0, 'DEVOLUCION', 1, None),
+        (1, 'BAJA_POR_DANHO', 1, None),
+    ]
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'clave12345')
+        self.client.force_authenticate(self.admin)
+
+    def crear_repuestos(self, prefijo):
+        return [
+            Repuesto.objects.create(nombre=f'{prefijo} {i}', stock_actual=stock)
+            for i, stock in enumerate((10, 2, 5))
+        ]
+
+    def datos(self, repuestos, fila):
+        posicion, tipo, cantidad, costo = fila
+        datos = {'repuesto': repuestos[posicion].pk, 'tipo_movimiento': tipo, 'cantidad': cantidad}
+        if costo is not None:
+            datos['costo_unitario'] = costo
+        return datos
+
+    def estado(self, repuestos):
+        """Stock, kardex y consumo diario por posición del repuesto"""
+        posiciones = {repuesto.pk: i for i, repuesto in enumerate(repuestos)}
+        return (
+            [Repuesto.objects.get(pk=repuesto.pk).stock_actual for repuesto in repuestos],
+            [
+                (posiciones[repuesto_id], anterior, posterior)
+                for repuesto_id, anterior, posterior in MovimientoInventario.objects.filter(
+                    repuesto__in=repuestos
+                ).order_by('id').values_list('repuesto_id', 'stock_anterior', 'stock_posterior')
+            ],
+            sorted(
+                (posiciones[fila.repuesto_id], fila.fecha, fila.tipo_movimiento,
+                 fila.cantidad, fila.valor, fila.movimientos)
+                for fila in ConsumoDiario.objects.filter(repuesto__in=repuestos)
+            ),
+        )
+
+    def test_equivale_a_posts_individuales(self):
+        individuales = self.crear_repuestos('Individual')
+        for fila in self.FILAS:
+            respuesta = self.client.post('/api/inventario/movimientos/', self.datos(individuales, fila))
+            self.assertEqual(respuesta.status_code, 201, respuesta.content)
+
+        lote = self.crear_repuestos('Lote')
+        respuesta = self.client.post(
+            self.URL, [self.datos(lote, fila) for fila in self.FILAS], format='json'
+        )
+        self.assertEqual(respuesta.status_code, 201, respuesta.content)
+        self.assertEqual(respuesta.data['procesados'], len(self.FILAS))
+
+        esperado = self.estado(individuales)
+        self.assertEqual(self.estado(lote), esperado)
+        self.assertEqual(esperado[0], [1, 0, 5])
+        self.assertEqual(
+            [(r['stock_anterior'], r['stock_posterior']) for r in respuesta.data['resultados']],
+            [(anterior, posterior) for _, anterior, posterior in esperado[1]]
+        )
+
+    def test_bloquea_los_repuestos_en_orden_de_id(self):
+        repuestos = self.crear_repuestos('Lote')
+        filas = [self.datos(repuestos, fila) for fila in reversed(self.FILAS)]
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.post(self.URL, filas, format='json')
+
+        tabla = Repuesto._meta.db_table
+        bloqueo = next(
+            consulta['sql'] for consulta in consultas.captured_queries
+            if consulta['sql'].startswith('SELECT') and f'FROM "{tabla}"' in consulta['sql']
+        )
+        ids = ', '.join(str(repuesto.pk) for repuesto in repuestos)
+        self.assertIn(f'IN ({ids})', bloqueo)
+        self.assertIn(f'ORDER BY "{tabla}"."id" ASC', bloqueo)
+        if connection.features.has_select_for_update:
+            self.assertIn('FOR UPDATE', bloqueo)
+
+    def test_filas_invalidas_y_codigos_de_estado(self):
+        repuesto = self.crear_repuestos('Lote')[0]
+        filas = [
+            {'repuesto': repuesto.pk, 'tipo_movimiento': 'SALIDA_USO', 'cantidad': 3},
+            {'repuesto': 999999, 'tipo_movimiento': 'ENTRADA', 'cantidad': 1},
+            {'repuesto': repuesto.pk, 'tipo_movimiento': 'AJUSTE_POSITIVO', 'cantidad': 1},
+            {'repuesto': repuesto.pk, 'tipo_movimiento': 'ENTRADA', 'cantidad': 0},
+        ]
+        respuesta = self.client.post(self.URL, {'movimientos': filas}, format='json')
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertEqual((respuesta.data['procesados'], respuesta.data['rechazados']), (1, 3))
+        self.assertEqual(
+            [resultado['estado'] for resultado in respuesta.data['resultados']],
+            ['ok', 'error', 'error', 'error']
+        )
+        self.assertIn('repuesto', respuesta.data['resultados'][1]['errores'])
+        self.assertIn('tipo_movimiento', respuesta.data['resultados'][2]['errores'])
+        self.assertIn('cantidad', respuesta.data['resultados'][3]['errores'])
+
+        # Sin ninguna fila procesada no se escribe nada
+        respuesta = self.client.post(self.URL, filas[1:], format='json')
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(respuesta.data['procesados'], 0)
+        self.assertEqual(MovimientoInventario.objects.count(), 1)
+
+        for cuerpo in ([], {}, {'movimientos': 'x'}):
+            self.assertEqual(self.client.post(self.URL, cuerpo, format='json').status_code, 400)
+
+    def test_limite_de_filas(self):
+        repuesto = self.crear_repuestos('Lote')[0]
+        fila = {'repuesto': repuesto.pk, 'tipo_movimiento': 'ENTRADA', 'cantidad': 1}
+
+        respuesta = self.client.post(self.URL, [fila] * 1001, format='json')
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertIn('1000', respuesta.data['error'])
+        self.assertFalse(MovimientoInventario.objects.exists())
+
+        respuesta = self.client.post(self.URL, [fila] * 1000, format='json')
+        self.assertEqual(respuesta.status_code, 201)
+        repuesto.refresh_from_db()
+        self.assertEqual(repuesto.stock_actual, 1010)
+        self.assertEqual(ConsumoDiario.objects.get(repuesto=repuesto).movimientos, 1000)
+
+
+class StockAFechaTests(TestCase):
+    """stock_a_fecha coincide con reproducir el kardex, con y sin snapshot"""
+
+    @classmethod
+    def setUpTestData(cls):
+        generar_datos_sinteticos(repuestos=25, movimientos=500, usuarios=2, dias=20, semilla=11)
+
+    def kardex(self, fecha):
+        """Stock a `fecha` aplicando cada movimiento desde el stock inicial de cada repuesto"""
+        stocks = {}
+        for repuesto_id, fecha_movimiento, tipo, cantidad, anterior in MovimientoInventario.objects.order_by(
+            'fecha_movimiento', 'id'
+        ).values_list('repuesto_id', 'fecha_movimiento', 'tipo_movimiento', 'cantidad', 'stock_anterior'):
+            stock = stocks.setdefault(repuesto_id, anterior)
+            if fecha_movimiento <= fecha:
+                stocks[repuesto_id] = MovimientoInventario.calcular_stock_posterior(tipo, stock, cantidad)
+        return {
+            repuesto_id: stocks.get(repuesto_id, stock_actual)
+            for repuesto_id, stock_actual in Repuesto.objects.filter(creado_en__lte=fecha).values_list(
+                'id', 'stock_actual'
+            )
+        }
+
+    def verificar(self, fecha, snapshot):
+        # Snapshot + repuestos con sus subconsultas, sin importar el volumen
+        with self.assertNumQueries(2):
+            encontrado, filas = stock_a_fecha(fecha)
+        self.assertEqual(encontrado, snapshot)
+        self.assertEqual({fila['id']: fila['stock'] for fila in filas}, self.kardex(fecha))
+
+    def test_sin_snapshot(self):
+        ahora = timezone.now()
+        for dias in (15, 5, 0):
+            self.verificar(ahora - timedelta(days=dias), None)
+
+    def test_con_snapshot(self):
+        antes = timezone.now() - timedelta(days=3)
+        snapshot = tomar_snapshot()
+        for repuesto in Repuesto.objects.order_by('pk')[:6]:
+            for tipo, cantidad in (('ENTRADA', 4), ('SALIDA_USO', 9)):
+                MovimientoInventario.objects.create(repuesto=repuesto, tipo_movimiento=tipo, cantidad=cantidad)
+
+        self.verificar(timezone.now(), snapshot)
+        self.verificar(antes, None)
+
+
+class DatosSinteticosTests(TestCase):
+    """El dataset sintético es reproducible y su kardex es consistente"""
+
+    def test_stock_consistente_con_los_movimientos(self):
+        totales = generar_datos_sinteticos(repuestos=30, movimientos=600, usuarios=5, dias=20, semilla=7)
+        self.assertEqual(totales['movimientos'], 600)
+        self.assertFalse(MovimientoInventario.objects.filter(fecha_movimiento__gt=timezone.now()).exists())
+
+        for repuesto in Repuesto.objects.all():
+            movimientos = list(repuesto.movimientos.order_by('fecha_movimiento', 'id'))
+            for anterior, siguiente in zip(movimientos, movimientos[1:]):
+                self.assertEqual(anterior.stock_posterior, siguiente.stock_anterior)
+            if movimientos:
+                self.assertEqual(movimientos[-1].stock_posterior, repuesto.stock_actual)
+            abiertas = repuesto.alertas.filter(estado__in=AlertaStock.ESTADOS_ABIERTOS).count()
+            self.assertEqual(abiertas, int(repuesto.necesita_reposicion))
+
+
+class LecturasAsyncTests(APITestCase):
+    """Los endpoints async de lecturas.py responden lo mismo que los ViewSets"""
+
+    RUTAS = [
+        'repuestos/?page=2&ordering=-stock_actual',
+        'repuestos/?page=last&fields=id,nombre',
+        'repuestos/?page=99',
+        'repuestos/999999/',
+        'repuestos/stock_bajo/',
+        'repuestos/estadisticas/?necesita_reposicion=true',
+        'alertas/?estado=PENDIENTE',
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        generar_datos_sinteticos(repuestos=45, movimientos=400, usuarios=2, dias=10, semilla=3)
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.admin)
+
+    def test_mismo_json_que_los_viewsets(self):
+        pk = Repuesto.objects.first().pk
+        for ruta in self.RUTAS + [f'repuestos/{pk}/', f'repuestos/{pk}/?fields=id,nombre']:
+            with self.subTest(ruta=ruta):
+                asincrona = self.client.get(f'/api/inventario/lecturas/{ruta}', HTTP_ACCEPT='application/json')
+                sincrona = self.client.get(f'/api/inventario/{ruta}', HTTP_ACCEPT='application/json')
+                self.assertEqual(asincrona.status_code, sincrona.status_code)
+                # Los enlaces de paginación apuntan a la misma ruta async
+                self.assertEqual(asincrona.content.replace(b'/lecturas', b''), sincrona.content)
+
+    def test_lista_sin_cambios_responde_304_sin_leer_filas(self):
+        url = '/api/inventario/lecturas/alertas/'
+        respuesta = self.client.get(url)
+        with self.assertNumQueries(1):
+            no_modificado = self.client.get(url, HTTP_IF_NONE_MATCH=respuesta['ETag'])
+        self.assertEqual(no_modificado.status_code, 304)
+
+    def test_requiere_autenticacion(self):
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get('/api/inventario/lecturas/repuestos/').status_code, 401)
+
+
+class EventosTests(APITestCase):
+    """Broker, tickets y stream SSE de eventos"""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com')
+        self.token = obtener_token(self.admin)
+
+    def pedir_ticket(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        respuesta = self.client.post('/api/inventario/eventos/ticket/')
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta.data['ticket']
+
+    def test_ticket_de_un_solo_uso_sin_el_token(self):
+        ticket = self.pedir_ticket()
+        self.assertNotIn(self.token.key, ticket)
+        self.assertNotEqual(ticket, self.pedir_ticket())
+        self.assertIsNotNone(validar_ticket(ticket))
+        self.assertIsNone(validar_ticket(ticket))
+
+    def test_ticket_vencido_ajeno_o_revocado(self):
+        vencido = emitir_ticket(self.token)
+        with mock.patch('django.core.signing.time.time', return_value=time.time() + 31):
+            self.assertIsNone(validar_ticket(vencido))
+        # Misma clave, otro propósito
+        self.assertIsNone(validar_ticket(signing.dumps({'u': self.admin.pk, 't': ''})))
+        self.assertIsNone(validar_ticket(''))
+
+        revocado = emitir_ticket(self.token)
+        self.token.delete()
+        self.assertIsNone(validar_ticket(revocado))
+
+    def test_sin_suscriptores_no_se_publica(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            publicar_stock([(1, 5)])
+        self.assertEqual(callbacks, [])
+
+        # PostgreSQL: sin la marca de streams abiertos no hay pg_notify
+        with mock.patch('inventario.eventos.usa_notify', return_value=True):
+            with override_settings(CACHE_COMPARTIDO=True):
+                with self.assertNumQueries(0):
+                    publicar_stock([(1, 5)])
+                cache.set(CLAVE_SUSCRIPTORES, True)
+                self.assertTrue(hay_suscriptores())
+            # Sin cache compartida no se ven los streams de otros procesos
+            cache.delete(CLAVE_SUSCRIPTORES)
+            self.assertTrue(hay_suscriptores())
+
+    async def test_broker_reparte_entre_hilos_y_pide_resync(self):
+        broker_prueba = BrokerEventos(tamano_cola=2)
+        cola = broker_prueba.suscribir()
+        await asyncio.to_thread(broker_prueba.publicar, {'tipo': 'stock', 'datos': {'id': 1}})
+        self.assertEqual(await asyncio.wait_for(cola.get(), 1), {'tipo': 'stock', 'datos': {'id': 1}, 'id': 1})
+
+        for i in range(3):
+            await asyncio.to_thread(broker_prueba.publicar, {'tipo': 'stock', 'datos': {'id': i}})
+        await asyncio.sleep(0)
+        self.assertEqual((cola.qsize(), cola.get_nowait()['tipo']), (1, 'resync'))
+
+        broker_prueba.desuscribir(cola)
+        self.assertFalse(broker_prueba.hay_suscriptores)
+
+    @override_settings(INVENTARIO_EVENTOS_REVALIDACION=0, INVENTARIO_EVENTOS_HEARTBEAT=1)
+    async def test_stream_entrega_eventos_y_cierra_al_revocar_el_token(self):
+        ticket = await sync_to_async(emitir_ticket)(self.token)
+        respuesta = await self.async_client.get('/api/inventario/eventos/', {'token': self.token.key})
+        self.assertEqual(respuesta.status_code, 401)
+
+        respuesta = await self.async_client.get('/api/inventario/eventos/', {'ticket': ticket})
+        self.assertEqual(respuesta['Content-Type'], 'text/event-stream')
+        stream = aiter(respuesta.streaming_content)
+        self.assertEqual(await anext(stream), b'retry: 5000\n\n')
+
+        broker.publicar({'tipo': 'stock', 'datos': {'repuestos': [{'id': 1, 'stock_actual': 4}]}})
+        self.assertRegex(
+            await anext(stream),
+            rb'^id: \d+\nevent: stock\ndata: \{"repuestos": \[\{"id": 1, "stock_actual": 4\}\]\}\n\n$'
+        )
+
+        await sync_to_async(self.token.delete)()
+        with self.assertRaises(StopAsyncIteration):
+            await asyncio.wait_for(anext(stream), 5)
+        self.assertFalse(broker.hay_suscriptores)
+
+
+class PresupuestoConsultasTests(APITestCase):
+    """
+    Presupuesto de consultas SQL y tamaño de respuesta por endpoint. Cada
+    presupuesto se verifica con dos volúmenes de datos: si las consultas
+    crecen con las filas hay un N+1. Si un cambio legítimo modifica un
+    número, se actualiza aquí junto con el cambio.
+    """
+
+    # Endpoint -> (consultas, bytes máximos por fila serializada)
+    PRESUPUESTOS = {
+        # validadores ETag + COUNT + página
+        'repuestos-lista': (3, 550),
+        # repuesto con creado_por unido
+        'repuestos-detalle': (1, 550),
+        # agregados condicionales en una consulta; luego desde cache
+        'repuestos-estadisticas': (1, 200),
+        'repuestos-stock-bajo': (1, 550),
+        # COUNT + página con repuesto y usuarios unidos
+        'movimientos-lista': (2, 450),
+        'movimientos-cursor': (1, 450),
+        # SELECT del repuesto + SAVEPOINT + UPDATE ... RETURNING del stock +
+        # INSERT del movimiento + upsert de ConsumoDiario + RELEASE. La
+        # evaluación de alertas corre en on_commit, fuera de la medición
+        'movimientos-entrada': (6, 450),
+        # validadores ETag + COUNT + página con repuesto unido
+        'alertas-lista': (3, 400),
+        # alerta con repuesto unido; sus timestamps alimentan el ETag
+        'alertas-detalle': (1, 400),
+    }
+    # Consultas extra en PostgreSQL: el pg_notify del evento de stock se
+    # ejecuta dentro de la transacción (sin CACHE_COMPARTIDO siempre, ver
+    # eventos.hay_suscriptores)
+    CONSULTAS_NOTIFY = {'movimientos-entrada': 1}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com')
+        cls.usuarios = [
+            User.objects.create_user(f'bodega{i}', f'bodega{i}@example.com', rol='ENCARGADO_BODEGA')
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        cache_codigos_barras.limpiar()
+        self.client.force_authenticate(self.admin)
+
+    def sembrar(self, cantidad):
+        """Catálogo con costos, creadores y códigos variados, movimientos y alertas"""
+        inicio = Repuesto.objects.count()
+        for i in range(inicio, inicio + cantidad):
+            repuesto = Repuesto.objects.create(
+                nombre=f'Repuesto {i:04d}',
+                descripcion='Repuesto de prueba para presupuesto de consultas',
+                marca=f'Marca {i % 7}',
+                modelo=f'M-{i}',
+                codigo_barras=f'780{i:010d}' if i % 3 else None,
+                stock_actual=20,
+                stock_minimo_seguridad=5,
+                costo_unitario=f'{i % 50 + 1}.90' if i % 4 else None,
+                creado_por=self.usuarios[i % len(self.usuarios)] if i % 5 else None,
+            )
+            with self.captureOnCommitCallbacks(execute=True):
+                MovimientoInventario.objects.create(
+                    repuesto=repuesto, tipo_movimiento='ENTRADA', cantidad=5,
+                    registrado_por=self.usuarios[i % len(self.usuarios)],
+                )
+                # Uno de cada cuatro queda bajo el mínimo y abre alerta
+                MovimientoInventario.objects.create(
+                    repuesto=repuesto, tipo_movimiento='SALIDA_USO',
+                    cantidad=22 if i % 4 == 0 else 3,
+                    registrado_por=self.usuarios[(i + 1) % len(self.usuarios)],
+                )
+
+    def medir(self, nombre, peticion):
+        """Ejecuta la petición y verifica su presupuesto; retorna la respuesta"""
+        consultas, bytes_por_fila = self.PRESUPUESTOS[nombre]
+        if usa_notify():
+            consultas += self.CONSULTAS_NOTIFY.get(nombre, 0)
+        with CaptureQueriesContext(connection) as capturadas:
+            response = peticion()
+        self.assertLess(response.status_code, 300, response.content[:500])
+        self.assertEqual(
+            len(capturadas), consultas,
+            f'{nombre}: {len(capturadas)} consultas (presupuesto {consultas}):\n'
+            + '\n'.join(q['sql'] for q in capturadas.captured_queries)
+        )
+
+        datos = response.data
+        if isinstance(datos, dict) and 'results' in datos:
+            datos = datos['results']
+        filas = len(datos) if isinstance(datos, list) else 1
+        # 200 bytes para el envoltorio de la paginación
+        self.assertLessEqual(
+            len(response.content), bytes_por_fila * filas + 200,
+            f'{nombre}: {len(response.content)} bytes para {filas} filas'
+        )
+        return response
+
+    def test_repuestos(self):
+        for cantidad in (8, 40):
+            self.sembrar(cantidad)
+            total = Repuesto.objects.count()
+            response = self.medir('repuestos-lista', lambda: self.client.get('/api/inventario/repuestos/'))
+            self.assertEqual(response.data['count'], total)
+            if total > 20:
+                self.medir('repuestos-lista', lambda: self.client.get('/api/inventario/repuestos/', {'page': 2}))
+
+            repuesto = Repuesto.objects.filter(creado_por__isnull=False).last()
+            self.medir('repuestos-detalle', lambda: self.client.get(f'/api/inventario/repuestos/{repuesto.pk}/'))
+            # only() de ?fields= también carga los timestamps del ETag
+            self.medir('repuestos-detalle', lambda: self.client.get(
+                f'/api/inventario/repuestos/{repuesto.pk}/', {'fields': 'id,nombre'}
+            ))
+
+            bajo = Repuesto.objects.filter(stock_actual__lte=5).count()
+            response = self.medir('repuestos-stock-bajo', lambda: self.client.get('/api/inventario/repuestos/stock_bajo/'))
+            self.assertEqual(len(response.data), bajo)
+
+    @override_settings(CACHE_COMPARTIDO=True)
+    def test_estadisticas_se_sirven_desde_cache(self):
+        self.sembrar(12)
+        url = '/api/inventario/repuestos/estadisticas/'
+        self.medir('repuestos-estadisticas', lambda: self.client.get(url))
+        with self.assertNumQueries(0):
+            total = self.client.get(url).data['total_repuestos']
+
+        # Una escritura confirmada cambia la versión del catálogo
+        with self.captureOnCommitCallbacks(execute=True):
+            Repuesto.objects.create(nombre='Nuevo')
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url).data['total_repuestos'], total + 1)
+
+    @override_settings(CACHE_COMPARTIDO=False)
+    def test_estadisticas_sin_cache_compartida(self):
+        self.sembrar(5)
+        for _ in range(2):
+            self.medir('repuestos-estadisticas', lambda: self.client.get('/api/inventario/repuestos/estadisticas/'))
+
+    def test_movimientos(self):
+        for cantidad in (5, 30):
+            self.sembrar(cantidad)
+            self.medir('movimientos-lista', lambda: self.client.get('/api/inventario/movimientos/'))
+            for page_size in (10, 100):
+                response = self.medir('movimientos-cursor', lambda: self.client.get(
+                    '/api/inventario/movimientos/', {'paginacion': 'cursor', 'page_size': page_size}
+                ))
+                self.assertEqual(len(response.data['results']), min(page_size, MovimientoInventario.objects.count()))
+
+    def test_entrada_repuestos(self):
+        self.sembrar(10)
+        repuesto = Repuesto.objects.first()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.medir('movimientos-entrada', lambda: self.client.post(
+                '/api/inventario/movimientos/entrada_repuestos/',
+                {'repuesto_id': repuesto.pk, 'cantidad': 4, 'proveedor': 'Proveedor', 'costo_unitario': '10.00'},
+                format='json'
+            ))
+
+    def test_alertas(self):
+        for cantidad in (8, 48):
+            self.sembrar(cantidad)
+            abiertas = AlertaStock.objects.count()
+            response = self.medir('alertas-lista', lambda: self.client.get('/api/inventario/alertas/'))
+            self.assertEqual(response.data['count'], abiertas)
+
+            alerta = AlertaStock.objects.first()
+            self.medir('alertas-detalle', lambda: self.client.get(f'/api/inventario/alertas/{alerta.pk}/'))
+            self.medir('alertas-detalle', lambda: self.client.get(
+                f'/api/inventario/alertas/{alerta.pk}/', {'fields': 'id,estado'}
+            ))
+            self.medir('alertas-lista', lambda: self.client.get('/api/inventario/alertas/', {'fields': 'id'}))
@@ -1,6 +1,10 @@
+import logging
+
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from . import views
+from . import lecturas, views
+
+logger = logging.getLogger(__name__)
 
 app_name = 'inventario'
 
@@ -8,13 +12,19 @@ router = DefaultRouter()
 router.register(r'repuestos', views.RepuestoViewSet)
 router.register(r'movimientos', views.MovimientoInventarioViewSet)
 router.register(r'alertas', views.AlertaStockViewSet)
+router.register(r'sugerencias-stock-minimo', views.SugerenciaStockMinimoViewSet)
 
-# ✅ VERIFICAR: Imprimir las URLs registradas para debug
-print("=== DEBUG URLs INVENTARIO ===")
-for pattern in router.urls:
-    print(f"URL: {pattern.pattern}")
-print("=============================")
+if logger.isEnabledFor(logging.DEBUG):
+    logger.debug('URLs de inventario registradas', extra={'rutas': [str(p.pattern) for p in router.urls]})
 
 urlpatterns = [
+    path('eventos/', views.eventos, name='eventos'),
+    path('eventos/ticket/', views.ticket_eventos, name='eventos-ticket'),
+    # Lecturas async, para servir con ASGI (ver lecturas.py)
+    path('lecturas/repuestos/', lecturas.RepuestosAsync.as_view(), name='lecturas-repuestos'),
+    path('lecturas/repuestos/estadisticas/', lecturas.EstadisticasAsync.as_view(), name='lecturas-estadisticas'),
+    path('lecturas/repuestos/stock_bajo/', lecturas.StockBajoAsync.as_view(), name='lecturas-stock-bajo'),
+    path('lecturas/repuestos/<int:pk>/', lecturas.RepuestoDetalleAsync.as_view(), name='lecturas-repuesto'),
+    path('lecturas/alertas/', lecturas.AlertasAsync.as_view(), name='lecturas-alertas'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -0,0 +1,114 @@
+from decimal import Decimal
+from functools import partial
+
+from django.db.models import BooleanField, DecimalField, ExpressionWrapper, F, Q, Value
+from django.db.models.functions import Coalesce
+from rest_framework import ISO_8601, serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+# Equivalentes en SQL de las propiedades de Repuesto que muestra el serializer
+ANOTACIONES_REPUESTO = {
+    'necesita_reposicion': ExpressionWrapper(
+        Q(stock_actual__lte=F('stock_minimo_seguridad')), output_field=BooleanField()
+    ),
+    # Sin costo (nulo o cero) el valor es 0.00, igual que la propiedad
+    'valor_total_stock': Coalesce(
+        ExpressionWrapper(
+            F('stock_actual') * F('costo_unitario'),
+            output_field=DecimalField(max_digits=20, decimal_places=2)
+        ),
+        Value(Decimal('0.00')),
+        output_field=DecimalField(max_digits=20, decimal_places=2)
+    ),
+}
+
+
+def _fecha_iso(valor, zona):
+    """DateTimeField.to_representation en ISO 8601 con la zona ya resuelta"""
+    texto = valor.astimezone(zona).isoformat()
+    return texto[:-6] + 'Z' if texto.endswith('+00:00') else texto
+
+
+def _convertidor(campo):
+    """Función que formatea un valor crudo igual que el campo del serializer"""
+    # ReadOnlyField devuelve el valor tal cual y .values() ya trae la PK de
+    # las relaciones
+    if isinstance(campo, (serializers.ReadOnlyField, serializers.PrimaryKeyRelatedField)):
+        return None
+    if isinstance(campo, serializers.DateTimeField) and not hasattr(campo, 'timezone'):
+        # La zona horaria se resuelve una vez y no en cada fila
+        zona = campo.default_timezone()
+        if zona is not None and getattr(campo, 'format', api_settings.DATETIME_FORMAT) == ISO_8601:
+            return partial(_fecha_iso, zona=zona)
+    return campo.to_representation
+
+
+class SerializacionValores:
+    """
+    Serialización de solo lectura desde filas de .values(): produce los mismos
+    dicts que `serializer.data` (mismo orden de claves y formato de cada
+    campo) sin instanciar modelos ni recorrer la maquinaria por fila del
+    serializer. Las propiedades del modelo se reemplazan por `anotaciones`.
+    """
+
+    def __init__(self, serializer, anotaciones):
+        self.anotaciones = {}
+        self.columnas = []
+        # (nombre, clave en la fila, to_representation o None, cruza relación)
+        self.campos = []
+        for nombre, campo in serializer.fields.items():
+            if campo.write_only:
+                continue
+            if nombre in anotaciones:
+                self.anotaciones[nombre] = anotaciones[nombre]
+                clave = nombre
+            else:
+                clave = '__'.join(campo.source_attrs)
+            self.columnas.append(clave)
+            self.campos.append((nombre, clave, _convertidor(campo), len(campo.source_attrs) > 1))
+
+    def preparar(self, queryset):
+        """Queryset de dicts con las columnas que necesita el serializer"""
+        return queryset.annotate(**self.anotaciones).values(*self.columnas)
+
+    def serializar(self, filas):
+        datos = []
+        for fila in filas:
+            item = {}
+            for nombre, clave, convertir, relacion in self.campos:
+                valor = fila[clave]
+                if valor is None:
+                    # El serializer omite los campos `relacion.campo` cuya
+                    # relación es nula y deja en null los demás
+                    if not relacion:
+                        item[nombre] = None
+                    continue
+                item[nombre] = convertir(valor) if convertir else valor
+            datos.append(item)
+        return datos
+
+
+class ListadoValoresMixin:
+    """
+    ViewSet cuyo list() responde desde .values() con SerializacionValores.
+    El JSON es idéntico al de serializer_class; respeta filtros, paginación
+    y ?fields= (ver campos.py).
+    """
+
+    anotaciones_valores = {}
+
+    def serializacion_valores(self):
+        return SerializacionValores(self.get_serializer(), self.anotaciones_valores)
+
+    def respuesta_valores(self, queryset, paginar=True):
+        serializacion = self.serializacion_valores()
+        filas = serializacion.preparar(queryset)
+        if paginar:
+            pagina = self.paginate_queryset(filas)
+            if pagina is not None:
+                return self.get_paginated_response(serializacion.serializar(pagina))
+        return Response(serializacion.serializar(filas))
+
+    def list(self, request, *args, **kwargs):
+        return self.respuesta_valores(self.filter_queryset(self.get_queryset()))
@@ -1,51 +1,75 @@
 from rest_framework import viewsets, status, filters
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q, Sum, Count, F
+from django.db import transaction
+from django.db.models import Q, Sum, Count, F, DecimalField
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.utils import timezone
-from .models import Repuesto, MovimientoInventario, AlertaStock
+from django.utils.dateparse import parse_date, parse_datetime
+from datetime import datetime, time
+import asyncio
+import json
+import logging
+from decimal import Decimal
+from .models import Repuesto, MovimientoInventario, AlertaStock, SugerenciaStockMinimo
 from .serializers import (
     RepuestoSerializer, 
     MovimientoInventarioSerializer, 
-    AlertaStockSerializer
+    MovimientoLoteSerializer,
+    AlertaStockSerializer,
+    SugerenciaStockMinimoSerializer
 )
+from .services import registrar_movimientos_lote
+from .cache import obtener_estadisticas, cache_codigos_barras
+from .condicional import ConsultaCondicionalMixin
+from .campos import ConsultaPlanificadaMixin
+from .valores import ListadoValoresMixin, ANOTACIONES_REPUESTO
+from .pagination import MovimientoCursorPagination
+from .exportacion import exportar, FORMATOS, COLUMNAS_REPUESTOS, COLUMNAS_MOVIMIENTOS
+from .importacion import importar_repuestos, ErrorImportacion
+from .busqueda import RepuestoSearchFilter, RepuestoOrderingFilter
+from .snapshots import stock_a_fecha
+from .consumo import serie_consumo, PERIODOS, RANGO_POR_DEFECTO
+from .recomendacion import aprobar_sugerencias
+from .eventos import (
+    broker, iniciar_escucha, publicar_alertas, emitir_ticket, validar_ticket,
+    token_vigente, marcar_suscriptores
+)
+from usuarios.roles import tiene_capacidad, GESTIONAR_REPUESTOS, AUTORIZAR_AJUSTES
+
+logger = logging.getLogger(__name__)
 
-class RepuestoViewSet(viewsets.ModelViewSet):
+class RepuestoViewSet(ConsultaCondicionalMixin, ListadoValoresMixin, ConsultaPlanificadaMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestión completa de repuestos
     """
     queryset = Repuesto.objects.all()
     serializer_class = RepuestoSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, RepuestoSearchFilter, RepuestoOrderingFilter]
     
     # ✅ ARREGLO: Remover 'necesita_reposicion' porque es una property, no un campo del modelo
     filterset_fields = ['activo', 'marca']
     
+    # En PostgreSQL la búsqueda usa search_vector y trigramas (ver busqueda.py);
+    # estos campos se usan como respaldo con icontains en otros motores
     search_fields = ['nombre', 'descripcion', 'marca', 'modelo', 'codigo_barras']
     ordering_fields = ['nombre', 'stock_actual', 'stock_minimo_seguridad', 'creado_en']
     ordering = ['nombre']
+    acciones_planificadas = ['list', 'retrieve', 'stock_bajo']
+    # list y stock_bajo se sirven desde .values() (ver valores.py)
+    anotaciones_valores = ANOTACIONES_REPUESTO
 
     def perform_create(self, serializer):
         """Asignar usuario creador al crear repuesto"""
-        try:
-            print(f"DEBUG perform_create: Usuario = {self.request.user}")
-            print(f"DEBUG perform_create: Usuario ID = {self.request.user.id}")
-            print(f"DEBUG perform_create: Datos del serializer = {serializer.validated_data}")
-            
-            # ✅ IMPORTANTE: Asignar el usuario creador
-            repuesto = serializer.save(creado_por=self.request.user)
-            
-            print(f"DEBUG perform_create: Repuesto creado = {repuesto}")
-            print(f"DEBUG perform_create: Repuesto ID = {repuesto.id}")
-            
-        except Exception as e:
-            print(f"ERROR en perform_create: {e}")
-            import traceback
-            traceback.print_exc()
-            raise
+        # ✅ IMPORTANTE: Asignar el usuario creador
+        repuesto = serializer.save(creado_por=self.request.user)
+        logger.info('Repuesto creado', extra={'repuesto_id': repuesto.pk, 'usuario_id': self.request.user.pk})
 
     def get_permissions(self):
         """
@@ -53,18 +77,8 @@ class RepuestoViewSet(viewsets.ModelViewSet):
         - Lectura: Todos los autenticados
         - Escritura: Solo Supervisor y Encargado de Bodega
         """
-        if self.action in ['create', 'update', 'partial_update', 'destroy']:
-            user = self.request.user
-            
-            # ✅ ARREGLO: Verificar permisos correctamente
-            print(f"DEBUG: Usuario {user.username}, is_superuser: {user.is_superuser}")
-            if hasattr(user, 'rol'):
-                print(f"DEBUG: rol: {user.rol}")
-            print(f"DEBUG: grupos: {[g.name for g in user.groups.all()]}")
-            
-            if not (user.is_superuser or 
-                   (hasattr(user, 'rol') and user.rol in ['SUPER_ADMIN', 'SUPERVISOR', 'ENCARGADO_BODEGA']) or
-                   user.groups.filter(name__in=['Supervisor', 'Encargado de Bodega']).exists()):
+        if self.action in ['create', 'update', 'partial_update', 'destroy', 'importar']:
+            if not tiene_capacidad(self.request.user, GESTIONAR_REPUESTOS):
                 self.permission_denied(
                     self.request, 
                     message="Solo supervisores y encargados de bodega pueden modificar repuestos."
@@ -95,56 +109,179 @@ class RepuestoViewSet(viewsets.ModelViewSet):
         queryset = self.get_queryset()
         
         try:
-            # ✅ CORREGIR: Calcular estadísticas de manera segura
-            total_repuestos = queryset.count()
-            repuestos_activos = queryset.filter(activo=True).count()
-            
-            # Calcular alertas de stock bajo
-            alertas_stock_bajo = queryset.filter(
-                stock_actual__lte=F('stock_minimo_seguridad')
-            ).count()
-            
-            # Calcular valor total del inventario de forma segura
-            valor_total = 0
-            for repuesto in queryset.filter(activo=True, costo_unitario__isnull=False):
-                valor_total += (repuesto.costo_unitario or 0) * repuesto.stock_actual
-            
-            repuestos_sin_stock = queryset.filter(stock_actual=0).count()
-            
-            stats = {
-                'total_repuestos': total_repuestos,
-                'repuestos_activos': repuestos_activos,
-                'alertas_stock_bajo': alertas_stock_bajo,
-                'valor_total_inventario': float(valor_total),
-                'repuestos_sin_stock': repuestos_sin_stock,
-            }
-            
-            print(f"DEBUG: Estadísticas calculadas: {stats}")
+            # Snapshot cacheado por versión del catálogo; se recalcula con una
+            # sola consulta de agregados condicionales cuando hay escrituras
+            filtro = request.query_params.get('necesita_reposicion', '').lower()
+            stats = obtener_estadisticas(filtro, lambda: self._calcular_estadisticas(queryset))
             return Response(stats)
             
-        except Exception as e:
-            print(f"ERROR en estadísticas: {e}")
-            import traceback
-            traceback.print_exc()
-            
-            return Response({
-                'total_repuestos': 0,
-                'repuestos_activos': 0,
-                'alertas_stock_bajo': 0,
-                'valor_total_inventario': 0.0,
-                'repuestos_sin_stock': 0,
-            }, status=status.HTTP_200_OK)
+        except Exception:
+            logger.exception('Error calculando estadísticas del inventario')
+            return Response(self.ESTADISTICAS_VACIAS, status=status.HTTP_200_OK)
+
+    # Respuesta de estadisticas si el cálculo falla
+    ESTADISTICAS_VACIAS = {
+        'total_repuestos': 0,
+        'repuestos_activos': 0,
+        'alertas_stock_bajo': 0,
+        'valor_total_inventario': 0.0,
+        'repuestos_sin_stock': 0,
+    }
+
+    @staticmethod
+    def agregados_estadisticas():
+        """Agregados condicionales de todas las estadísticas, para una única consulta"""
+        return {
+            'total_repuestos': Count('id'),
+            'repuestos_activos': Count('id', filter=Q(activo=True)),
+            'alertas_stock_bajo': Count(
+                'id', filter=Q(stock_actual__lte=F('stock_minimo_seguridad'))
+            ),
+            'valor_total_inventario': Sum(
+                F('costo_unitario') * F('stock_actual'),
+                filter=Q(activo=True, costo_unitario__isnull=False),
+                output_field=DecimalField(max_digits=20, decimal_places=2)
+            ),
+            'repuestos_sin_stock': Count('id', filter=Q(stock_actual=0)),
+        }
+
+    @staticmethod
+    def normalizar_estadisticas(stats):
+        stats['valor_total_inventario'] = float(stats['valor_total_inventario'] or 0)
+        return stats
+
+    def _calcular_estadisticas(self, queryset):
+        """Calcula todas las estadísticas en una única consulta"""
+        return self.normalizar_estadisticas(queryset.aggregate(**self.agregados_estadisticas()))
 
     @action(detail=False, methods=['get'])
-    def stock_bajo(self, request):
-        """Listar repuestos con stock bajo"""
-        repuestos_bajo_stock = self.get_queryset().filter(
+    def exportar(self, request):
+        """Exportar el catálogo filtrado a CSV o XLSX (?formato=csv|xlsx)"""
+        formato = request.query_params.get('formato', 'csv')
+        if formato not in FORMATOS:
+            return Response(
+                {'error': f'Formato no soportado. Use: {", ".join(FORMATOS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        queryset = self.filter_queryset(self.get_queryset())
+        return exportar(queryset, COLUMNAS_REPUESTOS, 'repuestos', formato)
+
+    @action(detail=False, methods=['post'])
+    def importar(self, request):
+        """
+        Importar un catálogo de repuestos desde un archivo CSV/XLSX (campo
+        'archivo'). Hace upsert por codigo_barras y reporta las líneas rechazadas;
+        las celdas vacías no modifican el repuesto existente.
+        """
+        archivo = request.FILES.get('archivo')
+        if not archivo:
+            return Response(
+                {'error': 'Debe adjuntar un archivo en el campo "archivo"'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            reporte = importar_repuestos(archivo, archivo.name, request.user)
+        except ErrorImportacion as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(reporte, status=status.HTTP_200_OK)
+
+    # Campos del registro compacto que devuelve el escaneo
+    CAMPOS_ESCANEO = [
+        'id', 'nombre', 'codigo_barras', 'marca', 'modelo', 'unidad_medida',
+        'stock_actual', 'stock_minimo_seguridad', 'activo',
+    ]
+
+    @action(detail=False, methods=['get'])
+    def escanear(self, request):
+        """
+        Resolver un código de barras (?codigo=...) a un registro compacto del
+        repuesto. Sirve desde el cache en memoria y solo consulta la base de
+        datos ante un fallo de cache.
+        """
+        codigo = request.query_params.get('codigo', '').strip()
+        if not codigo:
+            return Response(
+                {'error': 'El parámetro codigo es requerido'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        registro = cache_codigos_barras.obtener(codigo)
+        if registro is None:
+            # Antes de leer: si se invalida mientras tanto, no se guarda
+            generacion = cache_codigos_barras.generacion
+            registro = Repuesto.objects.filter(
+                codigo_barras=codigo
+            ).values(*self.CAMPOS_ESCANEO).first()
+            if registro is None:
+                return Response(
+                    {'error': 'Código de barras no registrado'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            registro['necesita_reposicion'] = (
+                registro['stock_actual'] <= registro['stock_minimo_seguridad']
+            )
+            cache_codigos_barras.guardar(codigo, registro, generacion)
+
+        return Response(registro)
+
+    @action(detail=False, methods=['get'])
+    def stock_a_fecha(self, request):
+        """
+        Stock y valorización de los repuestos a una fecha pasada
+        (?fecha=AAAA-MM-DD para el cierre de ese día, o fecha y hora ISO 8601;
+        opcional ?repuesto=1,2,3). Se calcula desde el snapshot más cercano.
+        """
+        texto = request.query_params.get('fecha', '').strip()
+        try:
+            dia = parse_date(texto)
+            fecha = datetime.combine(dia, time.max) if dia else parse_datetime(texto)
+            if fecha is None:
+                raise ValueError
+        except ValueError:
+            return Response(
+                {'error': 'Fecha inválida. Use AAAA-MM-DD o fecha y hora ISO 8601'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if timezone.is_naive(fecha):
+            fecha = timezone.make_aware(fecha)
+
+        repuesto_ids = None
+        if request.query_params.get('repuesto'):
+            try:
+                repuesto_ids = [int(valor) for valor in request.query_params['repuesto'].split(',')]
+            except ValueError:
+                return Response(
+                    {'error': 'repuesto debe ser una lista de IDs separados por coma'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        snapshot, filas = stock_a_fecha(fecha, repuesto_ids)
+        valor_total = sum((fila['valor'] for fila in filas), Decimal('0.00'))
+        # Decimales como string, igual que los serializers
+        for fila in filas:
+            fila['valor'] = str(fila['valor'])
+            if fila['costo_unitario'] is not None:
+                fila['costo_unitario'] = str(fila['costo_unitario'])
+        return Response({
+            'fecha': fecha,
+            'snapshot': snapshot.fecha_corte if snapshot else None,
+            'total_repuestos': len(filas),
+            'valor_total': str(valor_total),
+            'repuestos': filas,
+        })
+
+    def consulta_stock_bajo(self):
+        return self.get_queryset().filter(
             stock_actual__lte=F('stock_minimo_seguridad'),
             activo=True
         )
-        
-        serializer = self.get_serializer(repuestos_bajo_stock, many=True)
-        return Response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def stock_bajo(self, request):
+        """Listar repuestos con stock bajo"""
+        return self.respuesta_valores(self.consulta_stock_bajo(), paginar=False)
 
     @action(detail=True, methods=['post'])
     def ajustar_stock(self, request, pk=None):
@@ -168,10 +305,7 @@ class RepuestoViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        user = request.user
-        if not (user.is_superuser or 
-               (hasattr(user, 'rol') and user.rol in ['SUPER_ADMIN', 'SUPERVISOR']) or
-               user.groups.filter(name='Supervisor').exists()):
+        if not tiene_capacidad(request.user, AUTORIZAR_AJUSTES):
             return Response(
                 {'error': 'Solo supervisores pueden autorizar ajustes'},
                 status=status.HTTP_403_FORBIDDEN
@@ -190,7 +324,7 @@ class RepuestoViewSet(viewsets.ModelViewSet):
         return Response({'message': 'Ajuste realizado exitosamente'})
 
 
-class MovimientoInventarioViewSet(viewsets.ModelViewSet):
+class MovimientoInventarioViewSet(ConsultaPlanificadaMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestión de movimientos de inventario
     """
@@ -200,21 +334,145 @@ class MovimientoInventarioViewSet(viewsets.ModelViewSet):
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['repuesto', 'tipo_movimiento', 'registrado_por']
     ordering_fields = ['fecha_movimiento']
-    ordering = ['-fecha_movimiento']
+    ordering = ['-fecha_movimiento', 'id']
+
+    # Máximo de filas aceptadas por lote
+    MAX_MOVIMIENTOS_LOTE = 1000
+
+    @property
+    def paginator(self):
+        """
+        Paginación por cursor opcional: ?paginacion=cursor (o un ?cursor=
+        de una página anterior). Sin el parámetro se mantiene la paginación
+        por número de página.
+        """
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params if self.request else {}
+            if params.get('paginacion') == 'cursor' or 'cursor' in params:
+                self._paginator = MovimientoCursorPagination()
+            else:
+                return super().paginator
+        return self._paginator
 
     def perform_create(self, serializer):
         """Asignar usuario registrador al crear movimiento"""
         serializer.save(registrado_por=self.request.user)
 
+    @action(detail=False, methods=['get'])
+    def exportar(self, request):
+        """Exportar el kardex filtrado a CSV o XLSX (?formato=csv|xlsx)"""
+        formato = request.query_params.get('formato', 'csv')
+        if formato not in FORMATOS:
+            return Response(
+                {'error': f'Formato no soportado. Use: {", ".join(FORMATOS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        queryset = self.filter_queryset(self.get_queryset())
+        return exportar(queryset, COLUMNAS_MOVIMIENTOS, 'kardex', formato)
+
+    @action(detail=False, methods=['get'])
+    def serie_consumo(self, request):
+        """
+        Serie temporal de consumo desde los totales diarios
+        (?periodo=dia|semana|mes, ?desde=/?hasta=AAAA-MM-DD, ?repuesto=1,2,
+        ?tipo_movimiento=SALIDA_USO,...; por defecto, todos los tipos de salida)
+        """
+        periodo = request.query_params.get('periodo', 'dia')
+        if periodo not in PERIODOS:
+            return Response(
+                {'error': f'Periodo no soportado. Use: {", ".join(PERIODOS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            hasta = parse_date(request.query_params.get('hasta', '')) or timezone.localdate()
+            desde = parse_date(request.query_params.get('desde', '')) or hasta - RANGO_POR_DEFECTO[periodo]
+        except ValueError:
+            return Response(
+                {'error': 'Fecha inválida. Use AAAA-MM-DD'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        tipos_validos = dict(MovimientoInventario.TIPOS_MOVIMIENTO)
+        tipos = request.query_params.get('tipo_movimiento')
+        tipos = tipos.split(',') if tipos else MovimientoInventario.TIPOS_SALIDA
+        if any(tipo not in tipos_validos for tipo in tipos):
+            return Response(
+                {'error': 'tipo_movimiento inválido'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        repuesto_ids = None
+        if request.query_params.get('repuesto'):
+            try:
+                repuesto_ids = [int(valor) for valor in request.query_params['repuesto'].split(',')]
+            except ValueError:
+                return Response(
+                    {'error': 'repuesto debe ser una lista de IDs separados por coma'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        return Response({
+            'periodo': periodo,
+            'desde': desde,
+            'hasta': hasta,
+            'tipos_movimiento': tipos,
+            'serie': serie_consumo(periodo, desde, hasta, tipos, repuesto_ids),
+        })
+
+    @action(detail=False, methods=['post'])
+    def lote(self, request):
+        """
+        Registrar un lote de movimientos en una sola transacción.
+        Acepta una lista de movimientos o {"movimientos": [...]} y
+        devuelve el resultado de cada fila en el mismo orden.
+        """
+        filas = request.data
+        if isinstance(filas, dict):
+            filas = filas.get('movimientos')
+
+        if not isinstance(filas, list) or not filas:
+            return Response(
+                {'error': 'Se requiere una lista de movimientos'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if len(filas) > self.MAX_MOVIMIENTOS_LOTE:
+            return Response(
+                {'error': f'El lote no puede superar {self.MAX_MOVIMIENTOS_LOTE} movimientos'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        resultados = {}
+        validas = []
+        for indice, fila in enumerate(filas):
+            serializer = MovimientoLoteSerializer(data=fila)
+            if serializer.is_valid():
+                validas.append((indice, serializer.validated_data))
+            else:
+                resultados[indice] = {
+                    'indice': indice,
+                    'estado': 'error',
+                    'errores': serializer.errors,
+                }
+
+        resultados.update(registrar_movimientos_lote(validas, request.user))
+        resultados = [resultados[indice] for indice in range(len(filas))]
+
+        procesados = sum(1 for resultado in resultados if resultado['estado'] == 'ok')
+        return Response(
+            {
+                'procesados': procesados,
+                'rechazados': len(resultados) - procesados,
+                'resultados': resultados,
+            },
+            status=status.HTTP_201_CREATED if procesados else status.HTTP_400_BAD_REQUEST
+        )
+
     @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
     def entrada_repuestos(self, request):
         """Endpoint específico para registrar entrada de repuestos"""
         try:
-            print(f"=== DEBUG ENTRADA REPUESTOS ===")
-            print(f"Method: {request.method}")
-            print(f"Usuario: {request.user}")
-            print(f"Datos recibidos: {request.data}")
-        
             repuesto_id = request.data.get('repuesto_id')
             cantidad = request.data.get('cantidad')
             proveedor = request.data.get('proveedor', '')
@@ -224,14 +482,12 @@ class MovimientoInventarioViewSet(viewsets.ModelViewSet):
 
                     # Validaciones básicas
             if not repuesto_id:
-                print("❌ Error: repuesto_id faltante")
                 return Response(
                     {'error': 'repuesto_id es requerido'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
             if not cantidad:
-                print("❌ Error: cantidad faltante")
                 return Response(
                     {'error': 'cantidad es requerida'},
                     status=status.HTTP_400_BAD_REQUEST
@@ -239,9 +495,7 @@ class MovimientoInventarioViewSet(viewsets.ModelViewSet):
 
             try:
                 repuesto = Repuesto.objects.get(id=repuesto_id)
-                print(f"✅ Repuesto encontrado: {repuesto.nombre}")
             except Repuesto.DoesNotExist:
-                print(f"❌ Repuesto con ID {repuesto_id} no encontrado")
                 return Response(
                     {'error': 'Repuesto no encontrado'},
                     status=status.HTTP_404_NOT_FOUND
@@ -249,20 +503,13 @@ class MovimientoInventarioViewSet(viewsets.ModelViewSet):
 
             try:
                 cantidad = int(cantidad)
-                print(f"✅ Cantidad procesada: {cantidad}")
             except ValueError:
-                print(f"❌ Cantidad inválida: {cantidad}")
                 return Response(
                     {'error': 'Cantidad debe ser un número válido'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
         
-            # Stock antes del movimiento
-            stock_anterior = repuesto.stock_actual
-            print(f"📊 Stock anterior: {stock_anterior}")
-            
             # Crear movimiento de entrada
-            print("🔄 Creando movimiento de inventario...")
             movimiento = MovimientoInventario.objects.create(
                 repuesto=repuesto,
                 tipo_movimiento='ENTRADA',
@@ -274,27 +521,26 @@ class MovimientoInventarioViewSet(viewsets.ModelViewSet):
                 observaciones=observaciones
             )
             
-            # Verificar que se creó correctamente
-            repuesto.refresh_from_db()  # Actualizar desde la base de datos
-            print(f"✅ Movimiento creado: ID {movimiento.id}")
-            print(f"📊 Stock después: {repuesto.stock_actual}")
-            print(f"=== FIN DEBUG ENTRADA REPUESTOS ===")
+            logger.info('Entrada de repuestos registrada', extra={
+                'movimiento_id': movimiento.pk,
+                'repuesto_id': repuesto.pk,
+                'cantidad': cantidad,
+                'stock_anterior': movimiento.stock_anterior,
+                'stock_posterior': movimiento.stock_posterior,
+            })
             
             # Devolver datos del movimiento
             serializer = self.get_serializer(movimiento)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
             
         except Exception as e:
-            print(f"❌ ERROR INESPERADO en entrada_repuestos: {e}")
-            import traceback
-            traceback.print_exc()
-            
+            logger.exception('Error inesperado registrando entrada de repuestos')
             return Response(
                 {'error': f'Error interno del servidor: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
             
-class AlertaStockViewSet(viewsets.ReadOnlyModelViewSet):
+class AlertaStockViewSet(ConsultaCondicionalMixin, ConsultaPlanificadaMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet para consulta de alertas de stock (solo lectura)
     """
@@ -304,6 +550,8 @@ class AlertaStockViewSet(viewsets.ReadOnlyModelViewSet):
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['estado', 'repuesto']
     ordering = ['-fecha_creacion']
+    # La respuesta incluye el nombre del repuesto
+    campos_modificacion = ['actualizado_en', 'repuesto__actualizado_en']
 
     @action(detail=True, methods=['post'])
     def marcar_resuelta(self, request, pk=None):
@@ -315,6 +563,149 @@ class AlertaStockViewSet(viewsets.ReadOnlyModelViewSet):
         alerta.fecha_resolucion = timezone.now()
         alerta.resuelta_por = request.user
         alerta.observaciones = observaciones
-        alerta.save()
+        with transaction.atomic():
+            alerta.save()
+            publicar_alertas([alerta])
         
-        return Response({'message': 'Alerta marcada como resuelta'})
\ No newline at end of file
+        return Response({'message': 'Alerta marcada como resuelta'})
+
+
+class SugerenciaStockMinimoViewSet(ConsultaPlanificadaMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Sugerencias de stock mínimo calculadas con manage.py calcular_stock_minimo.
+    Aprobarlas actualiza el stock mínimo del repuesto.
+    """
+    queryset = SugerenciaStockMinimo.objects.all()
+    serializer_class = SugerenciaStockMinimoSerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = ['estado', 'repuesto']
+    ordering_fields = ['fecha_calculo', 'stock_minimo_sugerido']
+    ordering = ['-fecha_calculo', 'id']
+
+    def get_permissions(self):
+        """Aprobar o rechazar: solo quienes gestionan repuestos"""
+        if self.action in ['aprobar', 'rechazar', 'aprobar_lote']:
+            if not tiene_capacidad(self.request.user, GESTIONAR_REPUESTOS):
+                self.permission_denied(
+                    self.request,
+                    message="Solo supervisores y encargados de bodega pueden resolver sugerencias."
+                )
+        return super().get_permissions()
+
+    @action(detail=True, methods=['post'])
+    def aprobar(self, request, pk=None):
+        """Aplicar la sugerencia al stock mínimo del repuesto"""
+        sugerencia = self.get_object()
+        if not aprobar_sugerencias(SugerenciaStockMinimo.objects.filter(pk=sugerencia.pk), request.user):
+            return Response(
+                {'error': 'La sugerencia ya fue resuelta'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response({'message': 'Stock mínimo actualizado'})
+
+    @action(detail=False, methods=['post'])
+    def aprobar_lote(self, request):
+        """Aprobar varias sugerencias pendientes ({"ids": [...]})"""
+        ids = request.data.get('ids')
+        if not isinstance(ids, list) or not ids:
+            return Response(
+                {'error': 'Debe enviar una lista "ids"'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            ids = [int(valor) for valor in ids]
+        except (TypeError, ValueError):
+            return Response(
+                {'error': 'Los ids deben ser números enteros'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        aprobadas = aprobar_sugerencias(SugerenciaStockMinimo.objects.filter(pk__in=ids), request.user)
+        return Response({'aprobadas': aprobadas})
+
+    @action(detail=True, methods=['post'])
+    def rechazar(self, request, pk=None):
+        """Descartar la sugerencia sin cambiar el repuesto"""
+        actualizadas = SugerenciaStockMinimo.objects.filter(
+            pk=self.get_object().pk, estado='PENDIENTE'
+        ).update(
+            estado='RECHAZADA',
+            fecha_resolucion=timezone.now(),
+            resuelta_por=request.user
+        )
+        if not actualizadas:
+            return Response(
+                {'error': 'La sugerencia ya fue resuelta'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response({'message': 'Sugerencia rechazada'})
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def ticket_eventos(request):
+    """Ticket de corta duración para abrir el stream de eventos (ver eventos.emitir_ticket)"""
+    return Response({
+        'ticket': emitir_ticket(request.auth),
+        'expira_en': settings.INVENTARIO_EVENTOS_TICKET_TTL,
+    })
+
+
+async def eventos(request):
+    """
+    Stream Server-Sent Events con los cambios de stock y de alertas
+    confirmados. EventSource no permite cabeceras: se abre con
+    ?ticket= obtenido de eventos/ticket/. El token se revalida cada
+    INVENTARIO_EVENTOS_REVALIDACION segundos y el stream se cierra si fue
+    revocado. Solo disponible al servir con ASGI.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {'error': 'El stream de eventos requiere un servidor ASGI'},
+            status=501
+        )
+
+    credenciales = await sync_to_async(validar_ticket)(request.GET.get('ticket', ''))
+    if credenciales is None:
+        return JsonResponse({'detail': 'Ticket inválido o expirado.'}, status=401)
+
+    iniciar_escucha()
+
+    async def stream():
+        cola = broker.suscribir()
+        loop = asyncio.get_running_loop()
+        ahora = loop.time()
+        # Conexiones acotadas: si el cliente se fue, el stream termina igual
+        fin = ahora + settings.INVENTARIO_EVENTOS_DURACION_MAXIMA
+        revalidar_en = ahora + settings.INVENTARIO_EVENTOS_REVALIDACION
+        marcar_en = ahora
+        try:
+            yield 'retry: 5000\n\n'
+            while loop.time() < fin:
+                ahora = loop.time()
+                if ahora >= revalidar_en:
+                    if not await sync_to_async(token_vigente)(*credenciales):
+                        break
+                    revalidar_en = ahora + settings.INVENTARIO_EVENTOS_REVALIDACION
+                if ahora >= marcar_en:
+                    await marcar_suscriptores()
+                    marcar_en = ahora + settings.INVENTARIO_EVENTOS_HEARTBEAT
+                try:
+                    evento = await asyncio.wait_for(cola.get(), settings.INVENTARIO_EVENTOS_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield ': ping\n\n'
+                    continue
+                yield (
+                    f"id: {evento['id']}\n"
+                    f"event: {evento['tipo']}\n"
+                    f"data: {json.dumps(evento['datos'])}\n\n"
+                )
+        finally:
+            broker.desuscribir(cola)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Evita que nginx acumule el stream en su buffer
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
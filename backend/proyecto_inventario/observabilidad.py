@@ -0,0 +1,271 @@
+"""
+Observabilidad: métricas por endpoint en formato Prometheus y logging
+estructurado (JSON) con muestreo.
+
+Las métricas viven en memoria de cada proceso; con varios workers cada uno
+expone las suyas.
+"""
+import json
+import logging
+import random
+import threading
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.http import HttpResponse, HttpResponseForbidden, HttpResponseNotFound, JsonResponse
+from django.utils.crypto import constant_time_compare
+
+logger_requests = logging.getLogger('observabilidad.requests')
+
+# Límites (segundos) de los buckets del histograma de latencia
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE_PROMETHEUS = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class EstadisticasRuta:
+    """Acumulados de un (método, ruta, status)"""
+
+    __slots__ = ('buckets', 'cantidad', 'duracion', 'consultas', 'duracion_db', 'bytes')
+
+    def __init__(self):
+        self.buckets = [0] * len(BUCKETS_LATENCIA)
+        self.cantidad = 0
+        self.duracion = 0.0
+        self.consultas = 0
+        self.duracion_db = 0.0
+        self.bytes = 0
+
+
+class RegistroMetricas:
+    """Métricas de requests del proceso, seguras entre hilos"""
+
+    def __init__(self):
+        self._rutas = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, metodo, ruta, status, duracion, consultas, duracion_db, tamano):
+        clave = (metodo, ruta, str(status))
+        with self._lock:
+            estadisticas = self._rutas.get(clave)
+            if estadisticas is None:
+                estadisticas = self._rutas[clave] = EstadisticasRuta()
+            for i, limite in enumerate(BUCKETS_LATENCIA):
+                if duracion <= limite:
+                    estadisticas.buckets[i] += 1
+                    break
+            estadisticas.cantidad += 1
+            estadisticas.duracion += duracion
+            estadisticas.consultas += consultas
+            estadisticas.duracion_db += duracion_db
+            if tamano is not None:
+                estadisticas.bytes += tamano
+
+    def limpiar(self):
+        with self._lock:
+            self._rutas.clear()
+
+    def exportar(self):
+        """Texto en formato de exposición de Prometheus"""
+        with self._lock:
+            rutas = sorted(self._rutas.items())
+            copias = [(clave, list(e.buckets), e.cantidad, e.duracion, e.consultas, e.duracion_db, e.bytes)
+                      for clave, e in rutas]
+
+        lineas = []
+
+        def cabecera(nombre, tipo, ayuda):
+            lineas.append(f'# HELP {nombre} {ayuda}')
+            lineas.append(f'# TYPE {nombre} {tipo}')
+
+        def etiquetas(clave, **extra):
+            metodo, ruta, status = clave
+            pares = {'method': metodo, 'route': ruta, 'status': status, **extra}
+            return ','.join(f'{k}="{_escapar(v)}"' for k, v in pares.items())
+
+        cabecera('http_request_duration_seconds', 'histogram', 'Latencia de las requests por ruta')
+        for clave, buckets, cantidad, duracion, *_ in copias:
+            acumulado = 0
+            for limite, conteo in zip(BUCKETS_LATENCIA, buckets):
+                acumulado += conteo
+                lineas.append(f'http_request_duration_seconds_bucket{{{etiquetas(clave, le=limite)}}} {acumulado}')
+            lineas.append(f'http_request_duration_seconds_bucket{{{etiquetas(clave, le="+Inf")}}} {cantidad}')
+            lineas.append(f'http_request_duration_seconds_sum{{{etiquetas(clave)}}} {duracion:.6f}')
+            lineas.append(f'http_request_duration_seconds_count{{{etiquetas(clave)}}} {cantidad}')
+
+        series = [
+            ('http_request_db_queries_total', 'Consultas SQL ejecutadas por las requests', 4, '{}'),
+            ('http_request_db_duration_seconds_total', 'Tiempo en la base de datos de las requests', 5, '{:.6f}'),
+            ('http_response_size_bytes_total', 'Bytes de respuesta (sin contar streaming)', 6, '{}'),
+        ]
+        for nombre, ayuda, posicion, formato in series:
+            cabecera(nombre, 'counter', ayuda)
+            for copia in copias:
+                lineas.append(f'{nombre}{{{etiquetas(copia[0])}}} {formato.format(copia[posicion])}')
+
+        return '\n'.join(lineas) + '\n'
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registro = RegistroMetricas()
+
+
+class ContadorConsultas:
+    """execute_wrapper que cuenta consultas y mide su duración"""
+
+    __slots__ = ('consultas', 'duracion')
+
+    def __init__(self):
+        self.consultas = 0
+        self.duracion = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duracion += time.perf_counter() - inicio
+            self.consultas += 1
+
+
+class MetricasMiddleware:
+    """
+    Mide cada request (latencia, consultas SQL, tiempo en base de datos y
+    tamaño de la respuesta) y la agrega por ruta. La ruta es el nombre de la
+    vista resuelta (p. ej. `inventario:repuesto-list`), con cardinalidad acotada.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        contador = ContadorConsultas()
+        inicio = time.perf_counter()
+        with ExitStack() as pila:
+            for conexion in connections.all():
+                pila.enter_context(conexion.execute_wrapper(contador))
+            response = self.get_response(request)
+        self._registrar(request, response, time.perf_counter() - inicio, contador)
+        return response
+
+    async def __acall__(self, request):
+        contador = ContadorConsultas()
+        inicio = time.perf_counter()
+        with ExitStack() as pila:
+            for conexion in connections.all():
+                pila.enter_context(conexion.execute_wrapper(contador))
+            response = await self.get_response(request)
+        self._registrar(request, response, time.perf_counter() - inicio, contador)
+        return response
+
+    def _registrar(self, request, response, duracion, contador):
+        match = getattr(request, 'resolver_match', None)
+        ruta = match.view_name if match else 'sin_ruta'
+        tamano = None if response.streaming else len(response.content)
+        registro.registrar(
+            request.method, ruta, response.status_code, duracion,
+            contador.consultas, contador.duracion, tamano
+        )
+
+        # Las requests normales se muestrean antes de armar el registro
+        lenta = duracion >= settings.OBSERVABILIDAD_REQUEST_LENTA
+        if not lenta and random.random() >= settings.OBSERVABILIDAD_MUESTREO_REQUESTS:
+            return
+        datos = {
+            'metodo': request.method,
+            'ruta': ruta,
+            'status': response.status_code,
+            'duracion_ms': round(duracion * 1000, 1),
+            'consultas': contador.consultas,
+            'db_ms': round(contador.duracion * 1000, 1),
+            'bytes': tamano,
+        }
+        if lenta:
+            logger_requests.warning('Request lenta', extra=datos)
+        else:
+            logger_requests.info('Request', extra=datos)
+
+
+def metricas(request):
+    """
+    GET /api/metrics en formato Prometheus. Requiere `Authorization: Bearer
+    <OBSERVABILIDAD_METRICAS_TOKEN>` si el token está configurado; sin token
+    solo se expone con DEBUG.
+    """
+    token = settings.OBSERVABILIDAD_METRICAS_TOKEN
+    if token:
+        if not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return HttpResponseForbidden()
+    elif not settings.DEBUG:
+        return HttpResponseNotFound()
+    return HttpResponse(registro.exportar(), content_type=CONTENT_TYPE_PROMETHEUS)
+
+
+def salud(request):
+    """
+    GET /api/health para el healthcheck del contenedor y del balanceador:
+    200 si la base de datos responde, 503 si no.
+    """
+    try:
+        with connections['default'].cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except DatabaseError:
+        logger_requests.warning('Healthcheck: base de datos no disponible', exc_info=True)
+        return JsonResponse({'estado': 'error', 'base_de_datos': False}, status=503)
+    return JsonResponse({'estado': 'ok', 'base_de_datos': True})
+
+
+# ---------------------------------------------------------------------------
+# Logging
+# ---------------------------------------------------------------------------
+
+# Atributos estándar de LogRecord; el resto viene de `extra`
+_ATRIBUTOS_RECORD = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'muestreo'}
+
+
+class FormatoJSON(logging.Formatter):
+    """Una línea JSON por registro, con los campos pasados en `extra`"""
+
+    def format(self, record):
+        datos = {
+            'fecha': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'nivel': record.levelname,
+            'logger': record.name,
+            'mensaje': record.getMessage(),
+        }
+        for clave, valor in vars(record).items():
+            if clave not in _ATRIBUTOS_RECORD:
+                datos[clave] = valor
+        if record.exc_info:
+            datos['excepcion'] = self.formatException(record.exc_info)
+        return json.dumps(datos, ensure_ascii=False, default=str)
+
+
+class FiltroMuestreo(logging.Filter):
+    """
+    Deja pasar todos los registros WARNING o superiores y una fracción de los
+    demás: `extra={'muestreo': 0.1}` en el registro o la `tasa` del filtro.
+    """
+
+    def __init__(self, tasa=1.0):
+        super().__init__()
+        self.tasa = float(tasa)
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        tasa = getattr(record, 'muestreo', self.tasa)
+        return tasa >= 1 or random.random() < tasa
@@ -1,6 +1,8 @@
 import os
 from pathlib import Path
 
+from corsheaders.defaults import default_headers
+
 # Build paths inside the project
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -20,6 +22,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'setup',
     
     # Third party apps
@@ -37,8 +40,12 @@ INSTALLED_APPS = [
 
 
 MIDDLEWARE = [
+    # Primero, para medir la request completa
+    'proyecto_inventario.observabilidad.MetricasMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # Archivos estáticos servidos por la aplicación (ver STORAGES)
+    'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -76,9 +83,41 @@ DATABASES = {
         'PASSWORD': os.environ.get('DB_PASSWORD', 'inventario_pass'),
         'HOST': os.environ.get('DB_HOST', 'localhost'),
         'PORT': os.environ.get('DB_PORT', '5432'),
+        # Segundos que se reutiliza la conexión entre requests. En 0 con
+        # runserver y ASGI, que no reutilizan hilos; gunicorn.conf.py lo
+        # activa para los workers WSGI
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 0)),
+        # Verifica la conexión reutilizada antes de usarla (reinicios o
+        # cortes de PostgreSQL)
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Cache
+# En producción con varios workers usar un backend compartido (redis/memcached)
+# mediante DJANGO_CACHE_BACKEND y DJANGO_CACHE_LOCATION (ver DESPLIEGUE.md)
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('DJANGO_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('DJANGO_CACHE_LOCATION', 'inventario'),
+    }
+}
+
+# Los datos que se cachean entre requests y se invalidan al escribir (token ->
+# usuario, roles, estadísticas) solo se cachean si la cache es compartida: con
+# LocMemCache cada worker invalidaría solo su propia copia
+CACHE_COMPARTIDO = CACHES['default']['BACKEND'] not in (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+# Vigencia máxima (segundos) del snapshot de estadísticas del inventario (solo con CACHE_COMPARTIDO)
+INVENTARIO_ESTADISTICAS_TTL = int(os.environ.get('INVENTARIO_ESTADISTICAS_TTL', 300))
+
+# Cache en memoria del endpoint de escaneo de códigos de barras
+INVENTARIO_ESCANEO_CACHE_MAX = int(os.environ.get('INVENTARIO_ESCANEO_CACHE_MAX', 10000))
+INVENTARIO_ESCANEO_CACHE_TTL = int(os.environ.get('INVENTARIO_ESCANEO_CACHE_TTL', 30))
+
 # Custom user model
 AUTH_USER_MODEL = 'usuarios.Usuario'
 
@@ -111,6 +150,20 @@ STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
 
+# Sin DEBUG los estáticos se sirven comprimidos y con hash en el nombre,
+# cacheables indefinidamente; requiere collectstatic con DEBUG=0
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': (
+            'django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+            else 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+        ),
+    },
+}
+
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
@@ -121,7 +174,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Django REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'usuarios.authentication.CachedTokenAuthentication',
         
     ],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -136,6 +189,14 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Autenticación por token
+# Segundos que se cachea token -> usuario (solo con CACHE_COMPARTIDO)
+TOKEN_CACHE_TTL = int(os.environ.get('TOKEN_CACHE_TTL', 300))
+# Horas de validez de un token (0 = sin expiración); ver manage.py purgar_tokens
+TOKEN_EXPIRATION_HOURS = int(os.environ.get('TOKEN_EXPIRATION_HOURS', 0))
+# Segundos que se cachea el rol efectivo de cada usuario (solo con CACHE_COMPARTIDO, ver usuarios/roles.py)
+ROLES_CACHE_TTL = int(os.environ.get('ROLES_CACHE_TTL', 3600))
+
 CSRF_COOKIE_HTTPONLY = False
 CSRF_COOKIE_NAME = 'csrftoken'
 
@@ -147,8 +208,12 @@ CORS_ALLOWED_ORIGINS = [
 
 CORS_ALLOW_CREDENTIALS = True
 
+# Validadores de GET condicional y actualización optimista (inventario/condicional.py)
+CORS_ALLOW_HEADERS = (*default_headers, 'if-match', 'if-none-match')
+CORS_EXPOSE_HEADERS = ['ETag', 'Last-Modified']
+
 # Email configuration
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
 EMAIL_HOST = os.environ.get('EMAIL_HOST', 'smtp.gmail.com')
 EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 587))
 EMAIL_USE_TLS = True
@@ -156,19 +221,65 @@ EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
 DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'noreply@inventario.com')
 
+# Stream de eventos en vivo (/api/inventario/eventos/, requiere ASGI)
+# Eventos en espera por cliente antes de pedirle recargar todo
+INVENTARIO_EVENTOS_TAMANO_COLA = int(os.environ.get('INVENTARIO_EVENTOS_TAMANO_COLA', 100))
+# Segundos entre heartbeats y duración máxima de cada conexión (el navegador reconecta solo)
+INVENTARIO_EVENTOS_HEARTBEAT = int(os.environ.get('INVENTARIO_EVENTOS_HEARTBEAT', 15))
+INVENTARIO_EVENTOS_DURACION_MAXIMA = int(os.environ.get('INVENTARIO_EVENTOS_DURACION_MAXIMA', 300))
+# Vigencia del ticket para abrir el stream y cada cuánto se revalida el token (segundos)
+INVENTARIO_EVENTOS_TICKET_TTL = int(os.environ.get('INVENTARIO_EVENTOS_TICKET_TTL', 30))
+INVENTARIO_EVENTOS_REVALIDACION = int(os.environ.get('INVENTARIO_EVENTOS_REVALIDACION', 60))
+
+# Recomendación de stock mínimo (ver manage.py calcular_stock_minimo)
+# Días de consumo considerados, lead time de reposición y nivel de servicio
+INVENTARIO_RECOMENDACION_DIAS = int(os.environ.get('INVENTARIO_RECOMENDACION_DIAS', 180))
+INVENTARIO_LEAD_TIME_DIAS = int(os.environ.get('INVENTARIO_LEAD_TIME_DIAS', 7))
+INVENTARIO_NIVEL_SERVICIO = float(os.environ.get('INVENTARIO_NIVEL_SERVICIO', 0.95))
+
+# Notificaciones de alertas de stock (ver manage.py despachar_notificaciones)
+# Intentos de envío antes de marcar una notificación como fallida
+INVENTARIO_NOTIFICACIONES_MAX_INTENTOS = int(os.environ.get('INVENTARIO_NOTIFICACIONES_MAX_INTENTOS', 5))
+# Espera base entre reintentos (segundos); se duplica en cada intento
+INVENTARIO_NOTIFICACIONES_BACKOFF = int(os.environ.get('INVENTARIO_NOTIFICACIONES_BACKOFF', 60))
+
 # Logging
+# Observabilidad (proyecto_inventario/observabilidad.py)
+# Si se define, /api/metrics exige "Authorization: Bearer <token>"; sin token solo responde con DEBUG
+OBSERVABILIDAD_METRICAS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+# Requests a partir de esta duración (segundos) se registran siempre como WARNING
+OBSERVABILIDAD_REQUEST_LENTA = float(os.environ.get('LOG_REQUEST_LENTA', 1.0))
+# Fracción de las demás requests que se registran
+OBSERVABILIDAD_MUESTREO_REQUESTS = float(os.environ.get('LOG_MUESTREO_REQUESTS', 0.05))
+
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'DEBUG' if DEBUG else 'INFO')
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'formatters': {
+        'json': {
+            '()': 'proyecto_inventario.observabilidad.FormatoJSON',
+        },
+    },
+    'filters': {
+        'muestreo': {
+            '()': 'proyecto_inventario.observabilidad.FiltroMuestreo',
+        },
+    },
     'handlers': {
         'file': {
             'level': 'INFO',
             'class': 'logging.FileHandler',
             'filename': BASE_DIR / 'logs' / 'django.log',
+            'formatter': 'json',
+            'filters': ['muestreo'],
         },
         'console': {
-            'level': 'INFO',
+            'level': 'DEBUG',
             'class': 'logging.StreamHandler',
+            'formatter': 'json',
+            'filters': ['muestreo'],
         },
     },
     'root': {
@@ -181,6 +292,10 @@ LOGGING = {
             'level': 'INFO',
             'propagate': False,
         },
+        'inventario': {'level': LOG_LEVEL},
+        'setup': {'level': LOG_LEVEL},
+        'usuarios': {'level': LOG_LEVEL},
+        'observabilidad': {'level': 'INFO'},
     },
 }
 
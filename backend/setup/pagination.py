@@ -0,0 +1,12 @@
+from rest_framework.pagination import CursorPagination
+
+
+class UsuarioCursorPagination(CursorPagination):
+    """
+    Paginación por cursor (keyset) para el directorio de usuarios: sin OFFSET
+    ni COUNT(*), el costo de cada página no depende de su profundidad.
+    """
+    ordering = ('-date_joined', '-id')
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
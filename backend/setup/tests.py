@@ -1,3 +1,144 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
 
-# Create your tests here.
+from usuarios.roles import SYSTEM_ROLES, resolver_rol
+
+User = get_user_model()
+
+
+class ListUsersTests(APITestCase):
+    """Directorio de usuarios: consultas acotadas por página"""
+
+    # Página por número: COUNT + usuarios + grupos precargados
+    CONSULTAS_PAGINA = 3
+    # Página por cursor: usuarios + grupos precargados
+    CONSULTAS_CURSOR = 2
+    # Tamaño máximo de la respuesta: por usuario más el envoltorio de paginación
+    BYTES_POR_USUARIO = 350
+    BYTES_ENVOLTORIO = 300
+
+    url = '/api/setup/users/'
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'clave12345')
+        self.grupos = {
+            clave: Group.objects.get_or_create(name=nombre)[0]
+            for clave, nombre in SYSTEM_ROLES.items()
+            if clave != 'SUPER_ADMIN'
+        }
+        self.client.force_authenticate(self.admin)
+        resolver_rol(self.admin)
+
+    def crear_usuarios(self, cantidad, rol='TECNICO'):
+        for i in range(User.objects.count(), User.objects.count() + cantidad):
+            user = User.objects.create_user(f'usuario{i}', f'usuario{i}@example.com')
+            user.groups.add(self.grupos[rol])
+
+    def test_presupuesto_de_consultas_por_pagina(self):
+        for cantidad in (5, 40):
+            self.crear_usuarios(cantidad)
+            with self.assertNumQueries(self.CONSULTAS_PAGINA):
+                response = self.client.get(self.url, {'page_size': 20})
+            self.assertEqual(response.status_code, 200)
+
+    def test_presupuesto_de_consultas_por_cursor(self):
+        for cantidad in (5, 40):
+            self.crear_usuarios(cantidad)
+            with self.assertNumQueries(self.CONSULTAS_CURSOR):
+                response = self.client.get(self.url, {'paginacion': 'cursor', 'page_size': 20})
+            self.assertEqual(response.status_code, 200)
+
+    def test_presupuesto_de_bytes(self):
+        self.crear_usuarios(40)
+        for parametros in ({'page_size': 20}, {'paginacion': 'cursor', 'page_size': 20}):
+            response = self.client.get(self.url, parametros)
+            filas = len(response.data['users'])
+            self.assertEqual(filas, 20)
+            self.assertLessEqual(
+                len(response.content), self.BYTES_POR_USUARIO * filas + self.BYTES_ENVOLTORIO
+            )
+
+    def test_cursor_recorre_todos_sin_duplicados(self):
+        self.crear_usuarios(25)
+        vistos = []
+        response = self.client.get(self.url, {'paginacion': 'cursor', 'page_size': 7})
+        while True:
+            vistos += [user['id'] for user in response.data['users']]
+            siguiente = response.data['pagination']['next']
+            if not siguiente:
+                break
+            response = self.client.get(siguiente)
+        self.assertEqual(len(vistos), 26)
+        self.assertEqual(len(set(vistos)), 26)
+
+    def test_rol_y_filtro_por_rol(self):
+        self.crear_usuarios(3, rol='TECNICO')
+        self.crear_usuarios(2, rol='SUPERVISOR')
+        sin_grupo = User.objects.create_user('sin_grupo', 'sg@example.com')
+        sin_grupo.rol = 'ENCARGADO_BODEGA'
+        sin_grupo.save()
+
+        response = self.client.get(self.url, {'role': 'SUPERVISOR'})
+        self.assertEqual(response.data['pagination']['total_users'], 2)
+        self.assertEqual({user['role'] for user in response.data['users']}, {'SUPERVISOR'})
+
+        response = self.client.get(self.url, {'role': 'ENCARGADO_BODEGA'})
+        self.assertEqual([user['username'] for user in response.data['users']], ['sin_grupo'])
+
+        response = self.client.get(self.url, {'role': 'SUPER_ADMIN'})
+        self.assertEqual([user['role'] for user in response.data['users']], ['SUPER_ADMIN'])
+
+    def test_busqueda(self):
+        self.crear_usuarios(3)
+        response = self.client.get(self.url, {'search': 'usuario2'})
+        self.assertEqual([user['username'] for user in response.data['users']], ['usuario2'])
+
+    def test_sin_permiso(self):
+        self.crear_usuarios(1)
+        self.client.force_authenticate(User.objects.get(username='usuario1'))
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 403)
+
+
+# Presupuestos con la cache compartida de producción (sin ella el rol se lee en cada login)
+@override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'], CACHE_COMPARTIDO=True
+)
+class LoginTests(APITestCase):
+    """Login: consultas y tamaño de la respuesta acotados"""
+
+    # (url, consultas del primer login, consultas con token existente, bytes máximos).
+    # El primer login agrega el INSERT del token con su savepoint
+    PRESUPUESTOS = [
+        # usuario + token + grupos del serializer
+        ('/api/auth/login/', 6, 3, 450),
+        # usuario + token + grupos; luego el rol se lee de la cache
+        ('/api/setup/auth/login/', 6, 2, 300),
+    ]
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('tecnico', 'tecnico@example.com', 'clave12345')
+
+    def test_presupuesto_de_consultas(self):
+        credenciales = {'username': 'tecnico', 'password': 'clave12345'}
+        for url, primero, siguientes, maximo in self.PRESUPUESTOS:
+            with self.subTest(url=url):
+                cache.clear()
+                Token.objects.filter(user=self.user).delete()
+                for consultas in (primero, siguientes):
+                    with self.assertNumQueries(consultas):
+                        response = self.client.post(url, credenciales, format='json')
+                    self.assertEqual(response.status_code, 200)
+                    self.assertLessEqual(len(response.content), maximo)
+
+    def test_credenciales_incorrectas(self):
+        for url, *_ in self.PRESUPUESTOS:
+            with self.assertNumQueries(1):
+                response = self.client.post(url, {'username': 'tecnico', 'password': 'otra'}, format='json')
+            self.assertIn(response.status_code, (400, 401))
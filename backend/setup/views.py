@@ -2,21 +2,26 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.authtoken.models import Token
+from usuarios.authentication import obtener_token
 from django.contrib.auth import get_user_model, authenticate
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import Group
 from django.db import transaction
 from django.core.paginator import Paginator
+from django.db.models import Exists, OuterRef, Prefetch, Q
+from usuarios.roles import SYSTEM_ROLES, calcular_rol, resolver_rol, tiene_capacidad, GESTIONAR_USUARIOS
+from .pagination import UsuarioCursorPagination
+import logging
 import re
+
+logger = logging.getLogger(__name__)
 User = get_user_model()
-# Roles predefinidos del sistema
-SYSTEM_ROLES = {
-    'SUPER_ADMIN': 'Super Administrador',
-    'SUPERVISOR': 'Supervisor',
-    'ENCARGADO_BODEGA': 'Encargado de Bodega',
-    'TECNICO': 'Técnico'
-}
+
+# Columnas que necesita el directorio de usuarios
+CAMPOS_DIRECTORIO = (
+    'id', 'username', 'email', 'first_name', 'last_name', 'is_active',
+    'is_superuser', 'rol', 'date_joined', 'last_login',
+)
 
 @api_view(['GET', 'POST'])
 @permission_classes([AllowAny])  # Permite acceso sin autenticación
@@ -131,57 +136,56 @@ def list_users(request):
     Lista todos los usuarios del sistema (solo para super admin y supervisores)
     """
     # Verificar permisos
-    if not (request.user.is_superuser or request.user.groups.filter(name='Supervisor').exists()):
+    if not tiene_capacidad(request.user, GESTIONAR_USUARIOS):
         return Response({
             'error': 'No tienes permisos para ver esta información'
         }, status=status.HTTP_403_FORBIDDEN)
     
-    # Obtener parámetros de paginación
-    page = request.GET.get('page', 1)
-    page_size = request.GET.get('page_size', 10)
     search = request.GET.get('search', '')
     role_filter = request.GET.get('role', '')
     
-    # Filtrar usuarios
-    users = User.objects.all().order_by('-date_joined')
+    # Filtrar usuarios: una sola consulta, con los grupos precargados
+    users = User.objects.only(*CAMPOS_DIRECTORIO).prefetch_related(
+        Prefetch('groups', queryset=Group.objects.only('name').order_by('pk'))
+    )
     
     if search:
         users = users.filter(
-            username__icontains=search
-        ) | users.filter(
-            first_name__icontains=search
-        ) | users.filter(
-            last_name__icontains=search
-        ) | users.filter(
-            email__icontains=search
+            Q(username__icontains=search) |
+            Q(first_name__icontains=search) |
+            Q(last_name__icontains=search) |
+            Q(email__icontains=search)
         )
     
     if role_filter:
-        if role_filter == 'SUPER_ADMIN':
-            users = users.filter(is_superuser=True)
-        else:
-            users = users.filter(groups__name=SYSTEM_ROLES.get(role_filter))
-    
-    # Paginar
-    paginator = Paginator(users, page_size)
-    page_obj = paginator.get_page(page)
+        users = users.filter(filtro_rol(role_filter))
+    
+    # Paginación por cursor (opt-in) o por número de página
+    if request.GET.get('paginacion') == 'cursor' or 'cursor' in request.GET:
+        paginator = UsuarioCursorPagination()
+        page_users = paginator.paginate_queryset(users, request)
+        pagination = {
+            'next': paginator.get_next_link(),
+            'previous': paginator.get_previous_link(),
+            'has_next': paginator.has_next,
+            'has_previous': paginator.has_previous,
+        }
+    else:
+        paginator = Paginator(users.order_by('-date_joined', '-id'), request.GET.get('page_size', 10))
+        page_obj = paginator.get_page(request.GET.get('page', 1))
+        page_users = page_obj.object_list
+        pagination = {
+            'current_page': page_obj.number,
+            'total_pages': paginator.num_pages,
+            'total_users': paginator.count,
+            'has_next': page_obj.has_next(),
+            'has_previous': page_obj.has_previous(),
+        }
     
-    # Serializar datos
+    # Serializar datos (el rol se calcula con los grupos ya precargados)
     users_data = []
-    for user in page_obj:
-        # Determinar rol principal
-        role = 'SUPER_ADMIN' if user.is_superuser else 'USER'
-        role_display = 'Super Administrador' if user.is_superuser else 'Usuario'
-        
-        if not user.is_superuser:
-            user_groups = user.groups.all()
-            if user_groups:
-                group = user_groups.first()
-                for key, value in SYSTEM_ROLES.items():
-                    if value == group.name:
-                        role = key
-                        role_display = value
-                        break
+    for user in page_users:
+        role, role_display, _ = calcular_rol(user, [group.name for group in user.groups.all()])
         
         users_data.append({
             'id': user.id,
@@ -199,15 +203,24 @@ def list_users(request):
     
     return Response({
         'users': users_data,
-        'pagination': {
-            'current_page': page_obj.number,
-            'total_pages': paginator.num_pages,
-            'total_users': paginator.count,
-            'has_next': page_obj.has_next(),
-            'has_previous': page_obj.has_previous(),
-        }
+        'pagination': pagination,
     })
 
+
+def filtro_rol(role):
+    """
+    Filtro de usuarios cuyo rol efectivo es `role` (misma regla que
+    usuarios.roles.calcular_rol), resuelto con subconsultas EXISTS para no
+    duplicar filas por el join con grupos.
+    """
+    if role == 'SUPER_ADMIN':
+        return Q(is_superuser=True)
+    
+    grupos_usuario = Group.objects.filter(user=OuterRef('pk'))
+    en_grupo = Exists(grupos_usuario.filter(name=SYSTEM_ROLES.get(role)))
+    en_algun_grupo_del_sistema = Exists(grupos_usuario.filter(name__in=SYSTEM_ROLES.values()))
+    return Q(is_superuser=False) & (en_grupo | (Q(rol=role) & ~en_algun_grupo_del_sistema))
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def create_user(request):
@@ -215,7 +228,7 @@ def create_user(request):
     Crear un nuevo usuario (solo para super admin y supervisores)
     """
     # Verificar permisos
-    if not (request.user.is_superuser or request.user.groups.filter(name='Supervisor').exists()):
+    if not tiene_capacidad(request.user, GESTIONAR_USUARIOS):
         return Response({
             'error': 'No tienes permisos para crear usuarios'
         }, status=status.HTTP_403_FORBIDDEN)
@@ -273,23 +286,22 @@ def create_user(request):
                 user.is_staff = True
                 user.rol = 'SUPER_ADMIN' 
                 user.save()
-                print(f"✅ Usuario {username} creado como SUPER_ADMIN")
+                logger.info('Usuario creado', extra={'usuario_id': user.pk, 'rol': role})
             else:
                 # Limpiar grupos existentes
                 user.groups.clear()
                 
                 # Obtener nombre del grupo desde SYSTEM_ROLES
                 group_name = SYSTEM_ROLES.get(role)
-                print(f"🔍 Buscando grupo: {group_name} para rol: {role}")
                 
                 if group_name:
                     group, created = Group.objects.get_or_create(name=group_name)
                     user.groups.add(group)
-                    print(f"✅ Usuario {username} asignado al grupo: {group_name}")
                     user.rol = role 
                     user.save()
+                    logger.info('Usuario creado', extra={'usuario_id': user.pk, 'rol': role})
                 else:
-                    print(f"❌ Rol no encontrado: {role}")
+                    logger.warning('Usuario creado sin rol válido', extra={'usuario_id': user.pk, 'rol': role})
             
             return Response({
                 'success': True,
@@ -314,7 +326,7 @@ def update_user(request, user_id):
     Actualizar un usuario existente
     """
     # Verificar permisos
-    if not (request.user.is_superuser or request.user.groups.filter(name='Supervisor').exists()):
+    if not tiene_capacidad(request.user, GESTIONAR_USUARIOS):
         return Response({
             'error': 'No tienes permisos para editar usuarios'
         }, status=status.HTTP_403_FORBIDDEN)
@@ -392,8 +404,7 @@ def update_user(request, user_id):
                         group, created = Group.objects.get_or_create(name=group_name)
                         user.groups.add(group)
                     else:
-                        # Opcional: imprimir una advertencia si se recibe un rol no válido
-                        print(f"Advertencia: Rol '{role}' no válido o no encontrado en SYSTEM_ROLES para la actualización del usuario.")
+                        logger.warning('Rol no válido al actualizar usuario', extra={'usuario_id': user.pk, 'rol': role})
                 
             user.save() # Esto guardará todos los cambios, incluyendo el campo 'rol'
             
@@ -457,30 +468,10 @@ def login_view(request):
     if user is not None:
         if user.is_active:
             # Crear o obtener token
-            token, created = Token.objects.get_or_create(user=user)
+            token = obtener_token(user)
             
             # Determinar rol del usuario
-            role = 'SUPER_ADMIN' if user.is_superuser else 'USER'
-            role_display = 'Super Administrador' if user.is_superuser else 'Usuario'
-            
-            if not user.is_superuser:
-                user_groups = user.groups.all()
-                print(f"🔍 Usuario: {user.username}")
-                print(f"📋 Grupos: {[g.name for g in user_groups]}")
-    
-                if user_groups:
-                    group = user_groups.first()
-                    print(f"🎯 Primer grupo: {group.name}")
-        
-                    for key, value in SYSTEM_ROLES.items():
-                        print(f"🔄 Comparando: '{value}' == '{group.name}' -> {value == group.name}")
-                        if value == group.name:
-                            role = key
-                            role_display = value
-                            print(f"✅ Rol asignado: {role} ({role_display})")
-                            break
-                    else:
-                        print(f"❌ Sin grupos asignados")
+            role, role_display, _ = resolver_rol(user)
             
             return Response({
                 'token': token.key,
@@ -529,18 +520,7 @@ def verify_token(request):
     Endpoint para verificar si un token es válido
     """
     # Determinar rol del usuario
-    role = 'SUPER_ADMIN' if request.user.is_superuser else 'USER'
-    role_display = 'Super Administrador' if request.user.is_superuser else 'Usuario'
-    
-    if not request.user.is_superuser:
-        user_groups = request.user.groups.all()
-        if user_groups:
-            group = user_groups.first()
-            for key, value in SYSTEM_ROLES.items():
-                if value == group.name:
-                    role = key
-                    role_display = value
-                    break
+    role, role_display, _ = resolver_rol(request.user)
     
     return Response({
         'user': {
@@ -3,4 +3,7 @@ from django.apps import AppConfig
 class UsuariosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'usuarios'
-    verbose_name = 'Usuarios'
\ No newline at end of file
+    verbose_name = 'Usuarios'
+
+    def ready(self):
+        import usuarios.signals
\ No newline at end of file
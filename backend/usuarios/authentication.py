@@ -0,0 +1,77 @@
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+def clave_cache_token(key):
+    """Clave de cache para un token (se guarda el hash, no el token en claro)"""
+    return 'usuarios:token:' + hashlib.sha256(key.encode()).hexdigest()
+
+
+def invalidar_tokens(keys):
+    """
+    Descarta tokens del cache de autenticación al confirmar la transacción:
+    antes, una request concurrente volvería a cachear el estado previo
+    """
+    claves = [clave_cache_token(key) for key in keys]
+
+    def invalidar():
+        cache.delete_many(claves)
+
+    transaction.on_commit(invalidar)
+
+
+def token_expirado(token):
+    """True si el token superó TOKEN_EXPIRATION_HOURS (0 = sin expiración)"""
+    horas = settings.TOKEN_EXPIRATION_HOURS
+    if not horas:
+        return False
+    return token.created < timezone.now() - timedelta(hours=horas)
+
+
+def obtener_token(user):
+    """Obtiene el token del usuario, reemplazándolo si ya expiró"""
+    token, created = Token.objects.get_or_create(user=user)
+    if not created and token_expirado(token):
+        token.delete()
+        token = Token.objects.create(user=user)
+    return token
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication que cachea token -> usuario durante TOKEN_CACHE_TTL
+    segundos, evitando la consulta a authtoken_token en cada request.
+    Las entradas se invalidan al eliminar el token (logout) o modificar el
+    usuario (ver usuarios/signals.py). Sin CACHE_COMPARTIDO no se cachea: la
+    invalidación no llegaría a los demás workers.
+    """
+
+    def authenticate_credentials(self, key):
+        clave = clave_cache_token(key)
+        token = cache.get(clave) if settings.CACHE_COMPARTIDO else None
+
+        if token is None:
+            try:
+                token = Token.objects.select_related('user').get(key=key)
+            except Token.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+            if settings.CACHE_COMPARTIDO:
+                cache.set(clave, token, timeout=settings.TOKEN_CACHE_TTL)
+
+        if token_expirado(token):
+            token.delete()
+            raise exceptions.AuthenticationFailed('El token ha expirado.')
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        return (token.user, token)
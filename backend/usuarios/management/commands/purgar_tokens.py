@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+
+class Command(BaseCommand):
+    help = (
+        'Elimina los tokens de autenticación expirados (TOKEN_EXPIRATION_HOURS). '
+        'Pensado para ejecutarse periódicamente (cron).'
+    )
+
+    def handle(self, *args, **options):
+        horas = settings.TOKEN_EXPIRATION_HOURS
+        if not horas:
+            self.stdout.write('TOKEN_EXPIRATION_HOURS no está configurado; no hay tokens que purgar.')
+            return
+
+        limite = timezone.now() - timedelta(hours=horas)
+        # delete() del queryset dispara post_delete por token, lo que también
+        # los descarta del cache de autenticación
+        eliminados, _ = Token.objects.filter(created__lt=limite).delete()
+        self.stdout.write(self.style.SUCCESS(f'Tokens expirados eliminados: {eliminados}'))
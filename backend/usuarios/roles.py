@@ -0,0 +1,126 @@
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+# Roles predefinidos del sistema (clave -> nombre del grupo)
+SYSTEM_ROLES = {
+    'SUPER_ADMIN': 'Super Administrador',
+    'SUPERVISOR': 'Supervisor',
+    'ENCARGADO_BODEGA': 'Encargado de Bodega',
+    'TECNICO': 'Técnico'
+}
+
+ROL_POR_GRUPO = {nombre: clave for clave, nombre in SYSTEM_ROLES.items()}
+
+# Capacidades que otorga cada rol
+GESTIONAR_REPUESTOS = 'gestionar_repuestos'
+AUTORIZAR_AJUSTES = 'autorizar_ajustes'
+GESTIONAR_USUARIOS = 'gestionar_usuarios'
+
+CAPACIDADES_POR_ROL = {
+    'SUPER_ADMIN': frozenset([GESTIONAR_REPUESTOS, AUTORIZAR_AJUSTES, GESTIONAR_USUARIOS]),
+    'SUPERVISOR': frozenset([GESTIONAR_REPUESTOS, AUTORIZAR_AJUSTES, GESTIONAR_USUARIOS]),
+    'ENCARGADO_BODEGA': frozenset([GESTIONAR_REPUESTOS]),
+    'TECNICO': frozenset(),
+}
+
+CLAVE_VERSION_ROLES = 'usuarios:roles:version'
+
+
+class RolEfectivo(NamedTuple):
+    rol: str
+    rol_display: str
+    capacidades: frozenset
+
+
+def calcular_rol(user, nombres_grupos):
+    """
+    Calcula el rol efectivo y las capacidades de un usuario a partir de sus
+    grupos (en orden) sin consultar la base de datos.
+
+    - Superusuario: SUPER_ADMIN.
+    - Si no, el primer grupo que corresponda a un rol del sistema y, en su
+      defecto, el campo Usuario.rol.
+    - Las capacidades son la unión de las del rol del campo `rol` y las de
+      todos los grupos del sistema a los que pertenece.
+    """
+    roles_grupos = [ROL_POR_GRUPO[nombre] for nombre in nombres_grupos if nombre in ROL_POR_GRUPO]
+    rol_campo = getattr(user, 'rol', None)
+
+    if user.is_superuser:
+        rol = 'SUPER_ADMIN'
+    elif roles_grupos:
+        rol = roles_grupos[0]
+    elif rol_campo in SYSTEM_ROLES:
+        rol = rol_campo
+    else:
+        rol = 'USER'
+
+    roles = set(roles_grupos)
+    roles.add(rol)
+    if rol_campo:
+        roles.add(rol_campo)
+
+    capacidades = frozenset().union(*(CAPACIDADES_POR_ROL.get(r, frozenset()) for r in roles))
+    return RolEfectivo(rol, SYSTEM_ROLES.get(rol, 'Usuario'), capacidades)
+
+
+def _clave_cache(user_id):
+    version = cache.get(CLAVE_VERSION_ROLES, 1)
+    return f'usuarios:rol:{version}:{user_id}'
+
+
+def resolver_rol(user):
+    """
+    Rol efectivo del usuario. Se memoiza en el objeto usuario durante el
+    request y, con CACHE_COMPARTIDO, se cachea entre requests hasta que
+    cambien sus grupos, su rol o los grupos del sistema (ver
+    usuarios/signals.py). Sin cache compartida un cambio de rol no
+    invalidaría a los demás workers, así que se consulta en cada request.
+    """
+    rol_efectivo = getattr(user, '_rol_efectivo', None)
+    if rol_efectivo is not None:
+        return rol_efectivo
+
+    if not user.is_authenticated:
+        rol_efectivo = RolEfectivo('USER', 'Usuario', frozenset())
+    else:
+        clave = _clave_cache(user.pk) if settings.CACHE_COMPARTIDO else None
+        rol_efectivo = cache.get(clave) if clave else None
+        if rol_efectivo is None:
+            nombres_grupos = list(user.groups.order_by('pk').values_list('name', flat=True))
+            rol_efectivo = calcular_rol(user, nombres_grupos)
+            if clave:
+                cache.set(clave, rol_efectivo, timeout=settings.ROLES_CACHE_TTL)
+
+    user._rol_efectivo = rol_efectivo
+    return rol_efectivo
+
+
+def tiene_capacidad(user, capacidad):
+    """True si el usuario tiene la capacidad indicada"""
+    return capacidad in resolver_rol(user).capacidades
+
+
+def invalidar_rol(user_ids):
+    """Descarta el rol cacheado de los usuarios indicados al confirmar la transacción"""
+    user_ids = list(user_ids)
+
+    def invalidar():
+        cache.delete_many([_clave_cache(user_id) for user_id in user_ids])
+
+    transaction.on_commit(invalidar)
+
+
+def invalidar_roles():
+    """Descarta el rol cacheado de todos los usuarios (p. ej. al renombrar un grupo)"""
+    transaction.on_commit(_incrementar_version)
+
+
+def _incrementar_version():
+    try:
+        cache.incr(CLAVE_VERSION_ROLES)
+    except ValueError:
+        cache.set(CLAVE_VERSION_ROLES, 2, timeout=None)
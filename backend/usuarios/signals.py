@@ -0,0 +1,44 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+from .authentication import invalidar_tokens
+from .roles import invalidar_rol, invalidar_roles
+
+User = get_user_model()
+
+
+@receiver(post_delete, sender=Token)
+def invalidar_token_eliminado(sender, instance, **kwargs):
+    """Logout o expiración: el token deja de ser válido al confirmarse el borrado"""
+    invalidar_tokens([instance.key])
+
+
+@receiver(post_save, sender=User)
+def invalidar_tokens_usuario(sender, instance, created, update_fields=None, **kwargs):
+    """Cambios del usuario (rol, estado, datos) invalidan su token y rol cacheados"""
+    if created or update_fields == frozenset(['last_login']):
+        return
+    invalidar_tokens(Token.objects.filter(user=instance).values_list('key', flat=True))
+    invalidar_rol([instance.pk])
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidar_rol_grupos_usuario(sender, instance, action, reverse, pk_set, **kwargs):
+    """Asignar o quitar grupos cambia el rol efectivo del usuario"""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        invalidar_rol([instance.pk])
+    elif pk_set:
+        invalidar_rol(pk_set)
+    else:
+        # group.user_set.clear(): no se conocen los usuarios afectados
+        invalidar_roles()
+
+
+@receiver([post_save, post_delete], sender=Group)
+def invalidar_roles_grupo(sender, instance, **kwargs):
+    """Renombrar o eliminar un grupo puede cambiar el rol de todos sus miembros"""
+    invalidar_roles()
@@ -0,0 +1,172 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient
+
+from usuarios.authentication import CachedTokenAuthentication, clave_cache_token
+from usuarios.roles import SYSTEM_ROLES, resolver_rol
+
+User = get_user_model()
+
+
+# En los tests la LocMemCache hace de cache compartida (un solo proceso)
+@override_settings(CACHE_COMPARTIDO=True)
+class CachedTokenAuthenticationTests(TestCase):
+    """Cache token -> usuario: aciertos sin consultas e invalidación al confirmar"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('tecnico', 'tecnico@example.com', 'clave12345')
+        self.token = Token.objects.create(user=self.user)
+        self.autenticacion = CachedTokenAuthentication()
+
+    def autenticar(self):
+        return self.autenticacion.authenticate_credentials(self.token.key)
+
+    def test_acierto_de_cache_sin_consultas(self):
+        with self.assertNumQueries(1):
+            self.autenticar()
+        with self.assertNumQueries(0):
+            user, token = self.autenticar()
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(token.key, self.token.key)
+
+    def test_logout_invalida_el_token(self):
+        self.autenticar()
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        with self.captureOnCommitCallbacks(execute=True):
+            respuesta = client.post('/api/auth/logout/')
+        self.assertEqual(respuesta.status_code, 200)
+
+        self.assertIsNone(cache.get(clave_cache_token(self.token.key)))
+        with self.assertRaises(AuthenticationFailed):
+            self.autenticar()
+
+    def test_modificar_usuario_invalida_al_confirmar(self):
+        self.autenticar()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+            # Hasta el commit, otra request podría volver a cachear el estado previo
+            self.assertIsNotNone(cache.get(clave_cache_token(self.token.key)))
+
+        self.assertIsNone(cache.get(clave_cache_token(self.token.key)))
+        with self.assertRaises(AuthenticationFailed):
+            self.autenticar()
+
+    def test_login_no_invalida(self):
+        self.autenticar()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.user.last_login = timezone.now()
+            self.user.save(update_fields=['last_login'])
+        self.assertEqual(callbacks, [])
+        with self.assertNumQueries(0):
+            self.autenticar()
+
+    @override_settings(TOKEN_EXPIRATION_HOURS=1)
+    def test_token_expirado(self):
+        self.autenticar()
+        Token.objects.filter(pk=self.token.pk).update(created=timezone.now() - timedelta(hours=2))
+        # La entrada cacheada conserva la fecha de creación: se vuelve a leer
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaisesMessage(AuthenticationFailed, 'El token ha expirado.'):
+                self.autenticar()
+        self.assertFalse(Token.objects.filter(pk=self.token.pk).exists())
+        self.assertIsNone(cache.get(clave_cache_token(self.token.key)))
+
+    @override_settings(CACHE_COMPARTIDO=False)
+    def test_sin_cache_compartida_no_cachea(self):
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                self.autenticar()
+        self.assertIsNone(cache.get(clave_cache_token(self.token.key)))
+
+        # Otro worker desactiva al usuario: la próxima request ya lo ve
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        with self.assertRaises(AuthenticationFailed):
+            self.autenticar()
+
+
+@override_settings(CACHE_COMPARTIDO=True)
+class PurgarTokensTests(TestCase):
+    """manage.py purgar_tokens elimina los expirados y los descarta del cache"""
+
+    def setUp(self):
+        cache.clear()
+        self.vigente = Token.objects.create(user=User.objects.create_user('vigente'))
+        self.expirado = Token.objects.create(user=User.objects.create_user('expirado'))
+        Token.objects.filter(pk=self.expirado.pk).update(created=timezone.now() - timedelta(hours=5))
+
+    @override_settings(TOKEN_EXPIRATION_HOURS=4)
+    def test_elimina_solo_los_expirados(self):
+        CachedTokenAuthentication().authenticate_credentials(self.vigente.key)
+        cache.set(clave_cache_token(self.expirado.key), self.expirado)
+
+        salida = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('purgar_tokens', stdout=salida)
+
+        self.assertIn('Tokens expirados eliminados: 1', salida.getvalue())
+        self.assertEqual(list(Token.objects.values_list('key', flat=True)), [self.vigente.key])
+        self.assertIsNone(cache.get(clave_cache_token(self.expirado.key)))
+        self.assertIsNotNone(cache.get(clave_cache_token(self.vigente.key)))
+
+    @override_settings(TOKEN_EXPIRATION_HOURS=0)
+    def test_sin_expiracion_no_elimina(self):
+        call_command('purgar_tokens', stdout=StringIO())
+        self.assertEqual(Token.objects.count(), 2)
+
+
+@override_settings(CACHE_COMPARTIDO=True)
+class RolCacheadoTests(TestCase):
+    """El rol efectivo se cachea y se invalida al confirmar cambios de grupos o rol"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('bodega', rol='TECNICO')
+
+    def rol(self):
+        # Instancia nueva: sin el rol memoizado durante la request
+        return resolver_rol(User.objects.get(pk=self.user.pk)).rol
+
+    def test_acierto_de_cache_sin_consultas(self):
+        self.assertEqual(self.rol(), 'TECNICO')
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(resolver_rol(user).rol, 'TECNICO')
+
+    def test_grupos_y_rol_invalidan_al_confirmar(self):
+        self.assertEqual(self.rol(), 'TECNICO')
+        grupo = Group.objects.create(name=SYSTEM_ROLES['SUPERVISOR'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.groups.add(grupo)
+            self.assertEqual(self.rol(), 'TECNICO')
+        self.assertEqual(self.rol(), 'SUPERVISOR')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.groups.clear()
+            self.user.rol = 'ENCARGADO_BODEGA'
+            self.user.save()
+        self.assertEqual(self.rol(), 'ENCARGADO_BODEGA')
+
+    @override_settings(CACHE_COMPARTIDO=False)
+    def test_sin_cache_compartida_lee_el_rol_en_cada_request(self):
+        self.assertEqual(self.rol(), 'TECNICO')
+        # Otro worker asciende al usuario: la próxima request ya lo ve
+        User.objects.filter(pk=self.user.pk).update(rol='SUPERVISOR')
+        self.assertEqual(self.rol(), 'SUPERVISOR')
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(1):
+            resolver_rol(user)
+        with self.assertNumQueries(0):
+            resolver_rol(user)
@@ -2,8 +2,8 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework.authtoken.models import Token
 from .serializers import LoginSerializer, UsuarioSerializer
+from .authentication import obtener_token
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
@@ -11,7 +11,7 @@ def login(request):
     serializer = LoginSerializer(data=request.data)
     if serializer.is_valid():
         user = serializer.validated_data['user']
-        token, created = Token.objects.get_or_create(user=user)
+        token = obtener_token(user)
         return Response({
             'token': token.key,
             'user': UsuarioSerializer(user).data
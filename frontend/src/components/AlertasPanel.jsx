@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { inventoryService } from '../services/inventoryService';
+import { suscribirEventosInventario } from '../services/eventosInventario';
 
 const AlertasPanel = ({ onAlertaResuelta }) => {
   const [alertas, setAlertas] = useState([]);
@@ -11,6 +12,14 @@ const AlertasPanel = ({ onAlertaResuelta }) => {
     loadAlertas();
   }, []);
 
+  // Recargar solo cuando llegan alertas nuevas o cambian de estado
+  useEffect(() => {
+    return suscribirEventosInventario({
+      alerta: () => loadAlertas(),
+      resync: () => loadAlertas(),
+    });
+  }, []);
+
   const loadAlertas = async () => {
     setLoading(true);
     try {
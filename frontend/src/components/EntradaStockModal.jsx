@@ -22,7 +22,11 @@ const EntradaStockModal = ({ repuesto, onClose, onSuccess }) => {
 
   const loadRepuestos = async () => {
     try {
-      const data = await inventoryService.getRepuestos({ activo: 'true' });
+      const data = await inventoryService.getRepuestos({
+        activo: 'true',
+        // Solo las columnas que muestra el selector
+        fields: 'id,nombre,marca,modelo,stock_actual'
+      });
       setRepuestos(Array.isArray(data) ? data : data.results || []);
     } catch (error) {
       console.error('Error loading repuestos:', error);
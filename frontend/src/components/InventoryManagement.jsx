@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { inventoryService } from '../services/inventoryService';
+import { suscribirEventosInventario } from '../services/eventosInventario';
 import InventoryDashboard from './InventoryDashboard';
 import RepuestosTable from './RepuestosTable';
 import MovimientosTable from './MovimientosTable';
@@ -37,6 +38,24 @@ const InventoryManagement = ({ onBack }) => {
     loadDashboardData();
   }, []);
 
+  // Refrescar las estadísticas ante cambios en vivo, agrupando ráfagas de eventos
+  useEffect(() => {
+    let timeout = null;
+    const programarRecarga = () => {
+      clearTimeout(timeout);
+      timeout = setTimeout(loadDashboardData, 2000);
+    };
+    const cerrar = suscribirEventosInventario({
+      stock: programarRecarga,
+      alerta: programarRecarga,
+      resync: programarRecarga,
+    });
+    return () => {
+      clearTimeout(timeout);
+      cerrar();
+    };
+  }, []);
+
   const loadDashboardData = async () => {
     console.log('=== INICIANDO CARGA DE DATOS ===');
     setLoading(true);
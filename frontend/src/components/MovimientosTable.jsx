@@ -4,6 +4,8 @@ import { inventoryService } from '../services/inventoryService';
 const MovimientosTable = () => {
   const [movimientos, setMovimientos] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [nextCursor, setNextCursor] = useState(null);
   const [filters, setFilters] = useState({
     tipo_movimiento: '',
     repuesto: ''
@@ -13,11 +15,18 @@ const MovimientosTable = () => {
     loadMovimientos();
   }, [filters]);
 
+  // Extrae el cursor de la URL "next" devuelta por la paginación por cursor
+  const getCursor = (nextUrl) => {
+    if (!nextUrl) return null;
+    return new URL(nextUrl).searchParams.get('cursor');
+  };
+
   const loadMovimientos = async () => {
     setLoading(true);
     try {
-      const data = await inventoryService.getMovimientos(filters);
+      const data = await inventoryService.getMovimientos({ ...filters, paginacion: 'cursor' });
       setMovimientos(Array.isArray(data) ? data : data.results || []);
+      setNextCursor(getCursor(data.next));
     } catch (error) {
       console.error('Error loading movimientos:', error);
     } finally {
@@ -25,6 +34,20 @@ const MovimientosTable = () => {
     }
   };
 
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const data = await inventoryService.getMovimientos({ ...filters, paginacion: 'cursor', cursor: nextCursor });
+      setMovimientos(prev => [...prev, ...(data.results || [])]);
+      setNextCursor(getCursor(data.next));
+    } catch (error) {
+      console.error('Error loading more movimientos:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleFilterChange = (key, value) => {
     setFilters(prev => ({ ...prev, [key]: value }));
   };
@@ -202,6 +225,13 @@ const MovimientosTable = () => {
               ))}
             </tbody>
           </table>
+          {nextCursor && (
+            <div className="load-more">
+              <button onClick={loadMore} disabled={loadingMore} className="load-more-button">
+                {loadingMore ? 'Cargando...' : 'Cargar más'}
+              </button>
+            </div>
+          )}
         </div>
       )}
     </div>
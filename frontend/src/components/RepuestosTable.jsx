@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { inventoryService } from '../services/inventoryService';
+import { suscribirEventosInventario } from '../services/eventosInventario';
 
 const RepuestosTable = ({ onCreateNew, onEdit, onEntradaStock, onAjusteStock }) => {
   const [repuestos, setRepuestos] = useState([]);
@@ -14,6 +15,21 @@ const RepuestosTable = ({ onCreateNew, onEdit, onEntradaStock, onAjusteStock })
     loadRepuestos();
   }, [filters]);
 
+  // Aplicar los cambios de stock en vivo sin volver a pedir la lista
+  useEffect(() => {
+    return suscribirEventosInventario({
+      stock: ({ repuestos: cambios = [] }) => {
+        const stockPorId = new Map(cambios.map(c => [c.id, c.stock_actual]));
+        setRepuestos(prev => prev.map(repuesto =>
+          stockPorId.has(repuesto.id)
+            ? { ...repuesto, stock_actual: stockPorId.get(repuesto.id) }
+            : repuesto
+        ));
+      },
+      resync: () => loadRepuestos(),
+    });
+  }, [filters]);
+
   const loadRepuestos = async () => {
     setLoading(true);
     try {
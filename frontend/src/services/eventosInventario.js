@@ -0,0 +1,60 @@
+import { inventoryService } from './inventoryService';
+
+// Espera antes de reabrir un stream cortado (igual al `retry` del servidor)
+const REINTENTO_MS = 5000;
+
+// Stream de eventos en vivo del inventario (Server-Sent Events).
+// `handlers` mapea tipo de evento -> callback: stock, alerta y resync
+// (el servidor pide recargar todo cuando el cliente se atrasó).
+// EventSource no envía cabeceras, así que cada conexión se abre con un
+// ticket de un solo uso en vez del token. Retorna una función para cerrar.
+export const suscribirEventosInventario = (handlers) => {
+  if (!localStorage.getItem('token') || typeof EventSource === 'undefined') {
+    return () => {};
+  }
+
+  let source = null;
+  let reintento = null;
+  let cerrado = false;
+
+  const conectar = async () => {
+    let ticket;
+    try {
+      ({ ticket } = await inventoryService.request('/eventos/ticket/', { method: 'POST' }));
+    } catch (error) {
+      // Sesión cerrada o token revocado: no se reintenta
+      if (error.status !== 401 && error.status !== 403 && !cerrado) {
+        reintento = setTimeout(conectar, REINTENTO_MS);
+      }
+      return;
+    }
+    if (cerrado) {
+      return;
+    }
+
+    source = new EventSource(
+      `${inventoryService.baseURL}/eventos/?ticket=${encodeURIComponent(ticket)}`
+    );
+    Object.entries(handlers).forEach(([tipo, handler]) => {
+      source.addEventListener(tipo, (event) => handler(JSON.parse(event.data || '{}')));
+    });
+    // El ticket ya se usó: al cortarse el stream se pide otro en lugar de
+    // dejar que EventSource reconecte con la misma URL
+    source.onerror = () => {
+      source.close();
+      if (!cerrado) {
+        reintento = setTimeout(conectar, REINTENTO_MS);
+      }
+    };
+  };
+
+  conectar();
+
+  return () => {
+    cerrado = true;
+    clearTimeout(reintento);
+    if (source) {
+      source.close();
+    }
+  };
+};
@@ -115,7 +115,7 @@ class InventoryService {
       });
 
       const queryString = params.toString();
-      const endpoint = `/repuestos/${queryString ? `?${queryString}` : ''}`;
+      const endpoint = `/lecturas/repuestos/${queryString ? `?${queryString}` : ''}`;
       
       console.log('🔍 Obteniendo repuestos con endpoint:', endpoint);
       return await this.request(endpoint);
@@ -166,7 +166,7 @@ class InventoryService {
   async getEstadisticas() {
     try {
       console.log('📊 Obteniendo estadísticas...');
-      const result = await this.request('/repuestos/estadisticas/');
+      const result = await this.request('/lecturas/repuestos/estadisticas/');
       console.log('✅ Estadísticas obtenidas:', result);
       return result;
     } catch (error) {
@@ -179,7 +179,7 @@ class InventoryService {
   async getStockBajo() {
     try {
       console.log('⚠️ Obteniendo stock bajo...');
-      return await this.request('/repuestos/stock_bajo/');
+      return await this.request('/lecturas/repuestos/stock_bajo/');
     } catch (error) {
       console.error('❌ Error en getStockBajo:', error);
       throw error;
@@ -246,7 +246,7 @@ class InventoryService {
       });
 
       const queryString = params.toString();
-      const endpoint = `/alertas/${queryString ? `?${queryString}` : ''}`;
+      const endpoint = `/lecturas/alertas/${queryString ? `?${queryString}` : ''}`;
       
       console.log('🚨 Obteniendo alertas con endpoint:', endpoint);
       return await this.request(endpoint);